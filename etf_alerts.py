@@ -0,0 +1,327 @@
+#!/usr/bin/python3
+# etf_alerts.py - Alertes de prix : règles d'un fichier évaluées à chaque relevé des cotations (--alerts)
+
+import os
+import csv
+import time
+import sqlite3
+from datetime import datetime
+import numpy as np
+from colorama import Fore, Style
+from etf_db import connect
+from etf_core import yahooquery_ticker
+from etf_net import get_quotes
+from etf_format import fmt
+from etf_metrics import inc, record_failure, write_metrics
+from etf_logging import log_info, log_warning, log_debug, is_debug_enabled, span
+
+# Types de règles : prix_sup / prix_inf (seuil de cours), variation (% depuis la clôture
+# précédente, négatif pour une baisse), drawdown (% sous le plus haut 52 semaines),
+# mm50 / mm200 (croisement de la moyenne mobile ; valeur : hausse, baisse ou vide)
+RULE_TYPES = ('prix_sup', 'prix_inf', 'variation', 'drawdown', 'mm50', 'mm200')
+_PRIX_SUP, _PRIX_INF, _VARIATION, _DRAWDOWN, _MM50, _MM200 = range(len(RULE_TYPES))
+
+# Sens des croisements de moyenne mobile (valeur de la règle)
+CROSSING_DIRECTIONS = {'': 0, 'hausse': 1, 'baisse': -1}
+
+# Intervalle par défaut entre deux relevés (secondes)
+DEFAULT_INTERVAL = 60
+
+# Symboles par requête de cotations (limite de longueur d'URL de Yahoo)
+QUOTE_BATCH = 500
+
+# Champs des cotations Yahoo utilisés par les règles (colonnes du tableau des relevés)
+QUOTE_FIELDS = ('regularMarketPrice', 'regularMarketPreviousClose', 'fiftyTwoWeekHigh',
+                'fiftyDayAverage', 'twoHundredDayAverage')
+
+# État de chaque règle (condition en cours, position par rapport à la moyenne) : une
+# alerte n'est notifiée qu'au passage de la condition de fausse à vraie, y compris
+# après un redémarrage
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alert_state (
+    rule TEXT PRIMARY KEY,
+    active INTEGER NOT NULL,
+    side INTEGER NOT NULL,
+    fired_at TEXT
+) WITHOUT ROWID;
+"""
+
+
+def _direction(value):
+    text = str(value if value is not None else '').strip().lower()
+    if text not in CROSSING_DIRECTIONS:
+        raise ValueError(f"sens de croisement inconnu '{value}' (attendu : hausse, baisse ou vide)")
+    return CROSSING_DIRECTIONS[text]
+
+
+def _rule(symbol, rule_type, value, path):
+    """(symbole, type, valeur) validés, ou ValueError"""
+    symbol = str(symbol or '').strip().upper()
+    rule_type = str(rule_type or '').strip().lower()
+    if not symbol:
+        raise ValueError(f"{path} : règle sans symbole")
+    if rule_type not in RULE_TYPES:
+        raise ValueError(f"{path} : type de règle inconnu '{rule_type}' pour {symbol} (attendu : {', '.join(RULE_TYPES)})")
+    if rule_type in ('mm50', 'mm200'):
+        return symbol, rule_type, float(_direction(value))
+    try:
+        return symbol, rule_type, float(str(value).replace(',', '.'))
+    except (TypeError, ValueError):
+        raise ValueError(f"{path} : valeur invalide '{value}' pour {symbol} {rule_type}")
+
+
+def load_rules_file(path):
+    """
+    Lit un fichier de règles CSV ou YAML
+
+    CSV : colonnes symbol, type, valeur (une règle par ligne).
+    YAML : {symbole: {type: valeur ou liste de valeurs}}.
+
+    Returns:
+        list de tuples (symbole, type, valeur)
+
+    Raises:
+        ValueError: format non reconnu ou règle invalide
+    """
+    ext = os.path.splitext(path)[1].lower()
+    rules = []
+    if ext in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError("PyYAML n'est pas installé (pip install pyyaml), utilise un fichier CSV")
+        with open(path, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+        if not isinstance(data, dict):
+            raise ValueError("le fichier YAML doit contenir un dictionnaire {symbole: {type: valeur}}")
+        for symbol, items in data.items():
+            if isinstance(items, dict):
+                for rule_type, values in items.items():
+                    # Plusieurs seuils d'un même type : liste de valeurs
+                    for value in values if isinstance(values, list) else [values]:
+                        rules.append(_rule(symbol, rule_type, value, path))
+    elif ext == ".csv":
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            reader = csv.DictReader(f)
+            columns = {c.strip().lower(): c for c in (reader.fieldnames or []) if c}
+            symbol_col = next((columns[c] for c in ("symbol", "symbole", "ticker") if c in columns), None)
+            if symbol_col is None or "type" not in columns:
+                raise ValueError("colonnes 'symbol' et 'type' requises dans le fichier CSV")
+            value_col = columns.get("valeur", columns.get("value"))
+            for row in reader:
+                if (row.get(symbol_col) or "").strip():
+                    rules.append(_rule(row[symbol_col], row[columns["type"]], row.get(value_col) if value_col else None, path))
+    else:
+        raise ValueError(f"format non reconnu '{ext}' (attendu: .csv, .yaml, .yml)")
+    # Règles en double : une seule notification
+    return list(dict.fromkeys(rules))
+
+
+class AlertEngine:
+    """
+    Règles d'alerte rangées en tableaux NumPy (une case par règle)
+
+    Chaque relevé est évalué pour toutes les règles à la fois ; seules les règles dont la
+    condition devient vraie (ou dont le cours franchit la moyenne mobile) sont notifiées.
+
+    Args:
+        rules: list de tuples (symbole, type, valeur) (voir load_rules_file)
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.symbols = sorted({symbol for symbol, _, _ in rules})
+        position = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.symbol_index = np.array([position[symbol] for symbol, _, _ in rules], dtype=np.int32)
+        self.kind = np.array([RULE_TYPES.index(rule_type) for _, rule_type, _ in rules], dtype=np.int8)
+        self.value = np.array([value for _, _, value in rules], dtype=np.float64)
+        self.keys = [f"{symbol}|{rule_type}|{value:g}" for symbol, rule_type, value in rules]
+        self.crossing = np.isin(self.kind, (_MM50, _MM200))
+        self.active = np.zeros(len(rules), dtype=bool)
+        self.side = np.zeros(len(rules), dtype=np.int8)
+
+    def load_state(self, conn):
+        """Reprend l'état enregistré des règles (évite de notifier à nouveau après un redémarrage)"""
+        stored = {}
+        keys = self.keys
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            stored.update((row['rule'], (row['active'], row['side'])) for row in conn.execute(
+                f"SELECT rule, active, side FROM alert_state WHERE rule IN ({', '.join('?' * len(chunk))})", chunk))
+        for i, key in enumerate(keys):
+            if key in stored:
+                self.active[i], self.side[i] = stored[key]
+
+    def save_state(self, conn, changed, fired):
+        """Enregistre l'état des règles modifiées par le dernier relevé"""
+        now = datetime.now().isoformat(timespec='seconds')
+        rows = [(self.keys[i], int(self.active[i]), int(self.side[i]), now if fired[i] else None)
+                for i in np.flatnonzero(changed)]
+        if rows:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO alert_state (rule, active, side, fired_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(rule) DO UPDATE SET active = excluded.active, side = excluded.side, "
+                    "fired_at = COALESCE(excluded.fired_at, fired_at)", rows)
+
+    def evaluate(self, quotes):
+        """
+        Évalue toutes les règles sur un relevé
+
+        Args:
+            quotes: tableau (nombre de symboles x QUOTE_FIELDS), NaN si la cotation manque
+
+        Returns:
+            tuple (règles déclenchées, règles dont l'état a changé) : tableaux booléens
+        """
+        q = quotes[self.symbol_index]
+        price, previous, high, ma50, ma200 = q.T
+        kind, value = self.kind, self.value
+        with np.errstate(divide='ignore', invalid='ignore'):
+            change = (price / previous - 1) * 100
+            drawdown = (price / high - 1) * 100
+            side = np.sign(price - np.where(kind == _MM50, ma50, ma200))
+        side = np.nan_to_num(side).astype(np.int8)
+
+        condition = np.select(
+            [kind == _PRIX_SUP, kind == _PRIX_INF, kind == _VARIATION, kind == _DRAWDOWN],
+            [price >= value, price <= value, np.where(value >= 0, change >= value, change <= value),
+             drawdown <= -np.abs(value)],
+            default=False,
+        )
+        valid = ~np.isnan(price)
+        crossed = (self.crossing & (self.side != 0) & (side != 0) & (side != self.side)
+                   & ((value == 0) | (side == value)))
+        fired = (condition & ~self.active & valid) | crossed
+
+        active = np.where(valid & ~self.crossing, condition, self.active)
+        new_side = np.where(self.crossing & (side != 0), side, self.side)
+        changed = (active != self.active) | (new_side != self.side)
+        self.active, self.side = active, new_side
+        return fired, changed
+
+    def describe(self, i, quotes):
+        """Message d'une alerte déclenchée"""
+        symbol, rule_type, value = self.rules[i]
+        price, previous, high, ma50, ma200 = quotes[self.symbol_index[i]]
+        if rule_type == 'prix_sup':
+            return f"{symbol} : cours {fmt(price)} ≥ {fmt(value)}"
+        if rule_type == 'prix_inf':
+            return f"{symbol} : cours {fmt(price)} ≤ {fmt(value)}"
+        if rule_type == 'variation':
+            return f"{symbol} : {fmt((price / previous - 1) * 100, 'pct_signe')} depuis la clôture ({fmt(price)})"
+        if rule_type == 'drawdown':
+            return f"{symbol} : {fmt((price / high - 1) * 100, 'pct')} sous le plus haut 52 semaines ({fmt(high)})"
+        average = ma50 if rule_type == 'mm50' else ma200
+        sens = "au-dessus" if price > average else "en dessous"
+        return f"{symbol} : cours {fmt(price)} passé {sens} de la {rule_type.upper()} ({fmt(average)})"
+
+
+def fetch_quotes(symbols):
+    """
+    Cotations des symboles, QUOTE_BATCH symboles par requête
+
+    Returns:
+        tableau (len(symbols) x QUOTE_FIELDS), NaN pour les cotations absentes
+    """
+    quotes = np.full((len(symbols), len(QUOTE_FIELDS)), np.nan)
+    for start in range(0, len(symbols), QUOTE_BATCH):
+        chunk = symbols[start:start + QUOTE_BATCH]
+        try:
+            data = get_quotes(yahooquery_ticker(chunk))
+        except Exception as e:
+            record_failure('fetch', chunk[0])
+            log_warning(f"Alertes: cotations de {len(chunk)} symboles indisponibles : {e}")
+            continue
+        if not isinstance(data, dict):
+            log_warning(f"Alertes: réponse inattendue pour {len(chunk)} symboles : {data}")
+            continue
+        for row, symbol in enumerate(chunk, start):
+            quote = data.get(symbol)
+            if isinstance(quote, dict):
+                quotes[row] = [quote.get(field, np.nan) if isinstance(quote.get(field), (int, float)) else np.nan
+                               for field in QUOTE_FIELDS]
+    return quotes
+
+
+def poll(engine, conn=None):
+    """
+    Un relevé : cotations de tous les symboles, évaluation des règles, notifications
+
+    Returns:
+        list des messages des alertes déclenchées
+    """
+    with span("alerts.poll", rules=len(engine.rules)):
+        quotes = fetch_quotes(engine.symbols)
+        start = time.perf_counter()
+        fired, changed = engine.evaluate(quotes)
+        if is_debug_enabled(): log_debug("alerts: %d règles évaluées en %.2f ms, %d déclenchée(s)",
+                                         len(engine.rules), (time.perf_counter() - start) * 1000, int(fired.sum()))
+        messages = []
+        for i in np.flatnonzero(fired):
+            message = engine.describe(i, quotes)
+            messages.append(message)
+            inc('etfinfo_alerts_total', type=engine.rules[i][1])
+            print(f"{Fore.YELLOW}🔔 {datetime.now().strftime('%H:%M:%S')} {message}{Style.RESET_ALL}")
+            log_info(f"Alerte: {message}")
+        if conn is not None:
+            try:
+                engine.save_state(conn, changed, fired)
+            except sqlite3.Error as e:
+                log_warning(f"Alertes: état non enregistré : {e}")
+        missing = int(np.isnan(quotes[:, 0]).sum())
+        if missing:
+            print(f"{Style.DIM}{missing} cotation(s) indisponible(s) sur {len(engine.symbols)}{Style.RESET_ALL}")
+        return messages
+
+
+def run_alerts(path, interval=DEFAULT_INTERVAL, iterations=None):
+    """
+    Boucle de surveillance : un relevé toutes les `interval` secondes
+
+    Args:
+        path: fichier de règles (CSV ou YAML)
+        interval: secondes entre deux relevés
+        iterations: nombre de relevés (défaut : jusqu'à Ctrl+C)
+
+    Returns:
+        int: code de sortie
+    """
+    try:
+        rules = load_rules_file(path)
+    except (OSError, ValueError) as e:
+        print(f"{Fore.RED}✗ Fichier de règles invalide : {e}{Style.RESET_ALL}")
+        return 1
+    if not rules:
+        print(f"{Fore.YELLOW}Aucune règle trouvée dans {path}.{Style.RESET_ALL}")
+        return 0
+
+    engine = AlertEngine(rules)
+    try:
+        conn = connect(SCHEMA)
+        engine.load_state(conn)
+    except sqlite3.Error as e:
+        log_warning(f"Alertes: état des règles indisponible, notifications non dédupliquées entre exécutions : {e}")
+        conn = None
+    print(f"{Fore.CYAN}🔔 Alertes : {len(rules)} règle(s) sur {len(engine.symbols)} ETF, "
+          f"relevé toutes les {interval} s{Style.RESET_ALL}")
+    log_info(f"Alertes démarrées : {len(rules)} règles, {len(engine.symbols)} symboles, intervalle {interval} s")
+
+    count = 0
+    next_poll = time.monotonic()
+    try:
+        while iterations is None or count < iterations:
+            poll(engine, conn)
+            write_metrics()
+            count += 1
+            if iterations is not None and count >= iterations:
+                break
+            # Cadence fixe : la durée du relevé est déduite de l'attente
+            next_poll += interval
+            time.sleep(max(0.0, next_poll - time.monotonic()))
+            if next_poll < time.monotonic():
+                next_poll = time.monotonic()
+    except KeyboardInterrupt:
+        print("\nArrêt des alertes.")
+        log_info("Alertes arrêtées par l'utilisateur")
+    return 0
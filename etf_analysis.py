@@ -5,8 +5,64 @@ import numpy as np
 import yfinance as yf
 from colorama import Fore, Style
 from datetime import datetime
+from etf_logging import traced
+from etf_net import get_history, get_dividends, period_arguments
+from etf_results import Rendement, BenchmarkComparison, to_float
 
-def calculate_rendement(fund, period="1y", include_dividends=True, benchmark_ticker=None):
+def _compare_benchmark(benchmark_ticker, period, returns, rendement_total, include_dividends):
+    """
+    Compare le rendement de l'ETF à celui d'un benchmark sur la même période
+
+    Returns:
+        BenchmarkComparison
+    """
+    comparison = BenchmarkComparison(ticker=benchmark_ticker)
+    try:
+        benchmark = yf.Ticker(benchmark_ticker)
+        
+        bench_hist = get_history(benchmark, **period_arguments(period))
+        
+        if bench_hist.empty:
+            comparison.erreur = "Données du benchmark non disponibles"
+            return comparison
+
+        bench_prix_debut = bench_hist['Close'].iloc[0]
+        bench_prix_fin = bench_hist['Close'].iloc[-1]
+        
+        # Dividendes du benchmark si demandé
+        bench_dividends = 0
+        if include_dividends:
+            bench_divs = get_dividends(benchmark)[bench_hist.index[0]:bench_hist.index[-1]]
+            if not bench_divs.empty:
+                bench_dividends = bench_divs.sum()
+        
+        bench_rendement_total = ((bench_prix_fin + bench_dividends - bench_prix_debut) / bench_prix_debut) * 100
+        comparison.rendement_total = to_float(bench_rendement_total)
+        comparison.difference = to_float(rendement_total - bench_rendement_total)
+        
+        # Alpha et Beta (corrélation)
+        bench_returns = bench_hist['Close'].pct_change().dropna()
+        
+        # Aligner les dates
+        common_dates = returns.index.intersection(bench_returns.index)
+        if len(common_dates) > 2:
+            aligned_returns = returns.loc[common_dates]
+            aligned_bench = bench_returns.loc[common_dates]
+            
+            # Beta (sensibilité au marché)
+            covariance = np.cov(aligned_returns, aligned_bench)[0, 1]
+            benchmark_variance = np.var(aligned_bench)
+            if benchmark_variance > 0:
+                comparison.beta = to_float(covariance / benchmark_variance)
+            
+            # Corrélation
+            comparison.correlation = to_float(np.corrcoef(aligned_returns, aligned_bench)[0, 1])
+    except Exception as e:
+        comparison.erreur = f"Erreur lors de la comparaison: {e}"
+    return comparison
+
+@traced("analysis.compute_rendement")
+def compute_rendement(fund, period="1y", include_dividends=True, benchmark_ticker=None):
     """
     Calcule le rendement d'un ETF sur une période donnée
     
@@ -15,6 +71,218 @@ def calculate_rendement(fund, period="1y", include_dividends=True, benchmark_tic
         period: période (1mo, 3mo, 6mo, 1y, 2y, 5y, max) ou YYYY-MM-DD:YYYY-MM-DD
         include_dividends: inclure les dividendes dans le calcul
         benchmark_ticker: ticker du benchmark pour comparaison (optionnel)
+
+    Returns:
+        Rendement, ou None s'il n'y a pas assez de données sur la période
+    """
+    # Période prédéfinie ou dates personnalisées (YYYY-MM-DD:YYYY-MM-DD)
+    hist = get_history(fund, **period_arguments(period))
+    period_label = period.replace(':', ' → ')
+    
+    if hist.empty or len(hist) < 2:
+        return None
+    
+    # Dates réelles et prix
+    date_debut = hist.index[0]
+    date_fin = hist.index[-1]
+    close = hist['Close']
+    prix_debut = close.iloc[0]
+    prix_fin = close.iloc[-1]
+    
+    # Calcul du nombre d'années pour annualisation
+    nb_annees = (date_fin - date_debut).days / 365.25
+    
+    # Dividendes
+    total_dividends = 0
+    nb_dividends = 0
+    if include_dividends:
+        dividends = get_dividends(fund)[date_debut:date_fin]
+        if not dividends.empty:
+            total_dividends = dividends.sum()
+            nb_dividends = len(dividends)
+    
+    # === RENDEMENTS ===
+    rendement_simple = ((prix_fin - prix_debut) / prix_debut) * 100
+    if include_dividends and total_dividends > 0:
+        rendement_total = ((prix_fin + total_dividends - prix_debut) / prix_debut) * 100
+    else:
+        rendement_total = rendement_simple
+    
+    # Rendement annualisé (si période > 1 an), sinon les ratios utilisent le rendement total
+    rendement_annualise = None
+    rendement_ratio = rendement_total
+    if nb_annees >= 1:
+        rendement_annualise = (((prix_fin + total_dividends) / prix_debut) ** (1/nb_annees) - 1) * 100
+        rendement_ratio = rendement_annualise
+    
+    # === VOLATILITÉ ===
+    returns = close.pct_change().dropna()
+    volatilite_annuelle = returns.std() * np.sqrt(252) * 100  # 252 jours de trading
+    
+    # Drawdown maximum
+    cumulative = (1 + returns).cumprod()
+    running_max = cumulative.expanding().max()
+    drawdown = (cumulative - running_max) / running_max
+    max_drawdown = drawdown.min() * 100
+    max_dd_date = drawdown.idxmin()
+    
+    # === RATIOS ===
+    # Ratio de Sharpe (simplifié, taux sans risque = 0)
+    sharpe_ratio = rendement_ratio / volatilite_annuelle if volatilite_annuelle > 0 else None
+    
+    # Ratio de Sortino (volatilité des rendements négatifs uniquement)
+    sortino_ratio = None
+    negative_returns = returns[returns < 0]
+    if len(negative_returns) > 0:
+        downside_vol = negative_returns.std() * np.sqrt(252) * 100
+        if downside_vol > 0:
+            sortino_ratio = rendement_ratio / downside_vol
+    
+    # Calmar ratio (rendement / max drawdown)
+    calmar_ratio = rendement_ratio / abs(max_drawdown) if abs(max_drawdown) > 0 else None
+    
+    # === STATISTIQUES ===
+    jours_positifs = int((returns > 0).sum())
+    jours_negatifs = int((returns < 0).sum())
+    
+    result = Rendement(
+        periode=period_label,
+        date_debut=date_debut.strftime('%Y-%m-%d'),
+        date_fin=date_fin.strftime('%Y-%m-%d'),
+        nb_jours=len(hist),
+        prix_debut=to_float(prix_debut),
+        prix_fin=to_float(prix_fin),
+        total_dividendes=to_float(total_dividends) or 0.0,
+        nb_dividendes=nb_dividends,
+        rendement_prix=to_float(rendement_simple),
+        rendement_total=to_float(rendement_total),
+        rendement_annualise=to_float(rendement_annualise),
+        volatilite=to_float(volatilite_annuelle),
+        max_drawdown=to_float(max_drawdown),
+        date_max_drawdown=max_dd_date.strftime('%Y-%m-%d') if hasattr(max_dd_date, 'strftime') else None,
+        sharpe=to_float(sharpe_ratio),
+        sortino=to_float(sortino_ratio),
+        calmar=to_float(calmar_ratio),
+        prix_min=to_float(close.min()),
+        prix_max=to_float(close.max()),
+        prix_moyen=to_float(close.mean()),
+        jours_positifs=jours_positifs,
+        jours_negatifs=jours_negatifs,
+        meilleur_jour=to_float(returns.max() * 100),
+        pire_jour=to_float(returns.min() * 100),
+    )
+    
+    # === COMPARAISON AVEC BENCHMARK ===
+    if benchmark_ticker:
+        result.benchmark = _compare_benchmark(benchmark_ticker, period, returns, rendement_total, include_dividends)
+    return result
+
+def _date_fr(iso_date):
+    """YYYY-MM-DD -> DD/MM/YYYY"""
+    return datetime.strptime(iso_date, '%Y-%m-%d').strftime('%d/%m/%Y')
+
+def _num(value, spec, suffix=""):
+    """Valeur formatée selon spec, ou N/A si elle est absente (historique trop court)"""
+    return "N/A" if value is None else format(value, spec) + suffix
+
+def print_rendement(r):
+    """Affiche une analyse de rendement (rendu texte de Rendement)"""
+    print(f"{Fore.YELLOW}PÉRIODE ANALYSÉE:{Style.RESET_ALL}")
+    print(f"  Période demandée : {r.periode}")
+    print(f"  Date début       : {_date_fr(r.date_debut)}")
+    print(f"  Date fin         : {_date_fr(r.date_fin)}")
+    print(f"  Nombre de jours  : {r.nb_jours}")
+    print(f"  Prix début       : {_num(r.prix_debut, '.2f')}")
+    print(f"  Prix fin         : {_num(r.prix_fin, '.2f')}")
+    if r.nb_dividendes:
+        print(f"  Dividendes       : {_num(r.total_dividendes, '.2f')} ({r.nb_dividendes} distributions)")
+    
+    print()
+    
+    # === RENDEMENTS ===
+    print(f"{Fore.YELLOW}RENDEMENTS:{Style.RESET_ALL}")
+    print(f"  Rendement prix   : {_num(r.rendement_prix, '+.2f', '%')}")
+    print(f"  Rendement total  : {Fore.GREEN}{_num(r.rendement_total, '+.2f', '%')}{Style.RESET_ALL}")
+    if (r.total_dividendes or 0) > 0 and None not in (r.rendement_total, r.rendement_prix) \
+            and r.rendement_total != r.rendement_prix:
+        print(f"  Apport dividendes: {r.rendement_total - r.rendement_prix:+.2f}%")
+    if r.rendement_annualise is not None:
+        print(f"  Rendement annualisé: {r.rendement_annualise:+.2f}%")
+    
+    print()
+    
+    # === VOLATILITÉ ===
+    print(f"{Fore.YELLOW}RISQUE:{Style.RESET_ALL}")
+    print(f"  Volatilité annuelle: {_num(r.volatilite, '.2f', '%')}")
+    print(f"  Drawdown maximum   : {_num(r.max_drawdown, '.2f', '%')}")
+    if r.date_max_drawdown:
+        print(f"  Date du max DD     : {_date_fr(r.date_max_drawdown)}")
+    
+    print()
+    
+    # === RATIOS ===
+    print(f"{Fore.YELLOW}RATIOS:{Style.RESET_ALL}")
+    if r.sharpe is not None:
+        print(f"  Ratio de Sharpe    : {r.sharpe:.2f}")
+    if r.sortino is not None:
+        print(f"  Ratio de Sortino   : {r.sortino:.2f}")
+    if r.calmar is not None:
+        print(f"  Ratio de Calmar    : {r.calmar:.2f}")
+    
+    print()
+    
+    # === STATISTIQUES ===
+    print(f"{Fore.YELLOW}STATISTIQUES:{Style.RESET_ALL}")
+    print(f"  Prix minimum       : {_num(r.prix_min, '.2f')}")
+    print(f"  Prix maximum       : {_num(r.prix_max, '.2f')}")
+    print(f"  Prix moyen         : {_num(r.prix_moyen, '.2f')}")
+    if r.prix_min and r.prix_max is not None:
+        print(f"  Amplitude          : {((r.prix_max - r.prix_min) / r.prix_min * 100):.2f}%")
+    
+    # Jours positifs vs négatifs
+    total_jours = r.jours_positifs + r.jours_negatifs
+    taux_reussite = r.jours_positifs / total_jours * 100 if total_jours else 0
+    print(f"  Jours positifs     : {r.jours_positifs} ({taux_reussite:.1f}%)")
+    print(f"  Jours négatifs     : {r.jours_negatifs} ({100-taux_reussite:.1f}%)")
+    
+    # Meilleur et pire jour
+    print(f"  Meilleur jour      : {_num(r.meilleur_jour, '+.2f', '%')}")
+    print(f"  Pire jour          : {_num(r.pire_jour, '+.2f', '%')}")
+    
+    print()
+    
+    # === COMPARAISON AVEC BENCHMARK ===
+    b = r.benchmark
+    if b is not None:
+        print(f"{Fore.YELLOW}COMPARAISON AVEC BENCHMARK ({b.ticker}):{Style.RESET_ALL}")
+        if b.rendement_total is not None and b.difference is not None:
+            print(f"  Rendement benchmark: {b.rendement_total:+.2f}%")
+            print(f"  Différence         : {b.difference:+.2f}%")
+            if b.difference > 0:
+                print(f"  {Fore.GREEN}✓ Surperformance de {b.difference:.2f}%{Style.RESET_ALL}")
+            else:
+                print(f"  {Fore.RED}✗ Sous-performance de {abs(b.difference):.2f}%{Style.RESET_ALL}")
+            if b.beta is not None:
+                print(f"  Beta               : {b.beta:.2f}")
+            if b.correlation is not None:
+                print(f"  Corrélation        : {b.correlation:.2f}")
+        if b.erreur:
+            print(f"  {Fore.RED}{b.erreur}{Style.RESET_ALL}")
+        print()
+
+@traced("analysis.calculate_rendement")
+def calculate_rendement(fund, period="1y", include_dividends=True, benchmark_ticker=None):
+    """
+    Calcule puis affiche le rendement d'un ETF sur une période donnée
+    
+    Args:
+        fund: objet yfinance.Ticker
+        period: période (1mo, 3mo, 6mo, 1y, 2y, 5y, max) ou YYYY-MM-DD:YYYY-MM-DD
+        include_dividends: inclure les dividendes dans le calcul
+        benchmark_ticker: ticker du benchmark pour comparaison (optionnel)
+
+    Returns:
+        Rendement ou None
     """
     
     print(f"\n{Style.BRIGHT}{Fore.CYAN}{'=' * 70}{Style.RESET_ALL}")
@@ -22,221 +290,16 @@ def calculate_rendement(fund, period="1y", include_dividends=True, benchmark_tic
     print(f"{Style.BRIGHT}{Fore.CYAN}{'=' * 70}{Style.RESET_ALL}\n")
     
     try:
-        # Déterminer si c'est une période prédéfinie ou des dates personnalisées
-        if ':' in period:
-            # Dates personnalisées
-            start_date, end_date = period.split(':')
-            hist = fund.history(start=start_date, end=end_date)
-            period_label = f"{start_date} → {end_date}"
-        else:
-            # Période prédéfinie
-            hist = fund.history(period=period)
-            period_label = period
-        
-        if hist.empty or len(hist) < 2:
+        result = compute_rendement(fund, period, include_dividends, benchmark_ticker)
+        if result is None:
             print(f"{Fore.RED}Pas assez de données pour la période demandée{Style.RESET_ALL}")
-            return
-        
-        # Dates réelles
-        date_debut = hist.index[0]
-        date_fin = hist.index[-1]
-        nb_jours = len(hist)
-        
-        # Prix
-        prix_debut = hist['Close'].iloc[0]
-        prix_fin = hist['Close'].iloc[-1]
-        
-        print(f"{Fore.YELLOW}PÉRIODE ANALYSÉE:{Style.RESET_ALL}")
-        print(f"  Période demandée : {period_label}")
-        print(f"  Date début       : {date_debut.strftime('%d/%m/%Y')}")
-        print(f"  Date fin         : {date_fin.strftime('%d/%m/%Y')}")
-        print(f"  Nombre de jours  : {nb_jours}")
-        print(f"  Prix début       : {prix_debut:.2f}")
-        print(f"  Prix fin         : {prix_fin:.2f}")
-        
-        # Calcul du nombre d'années pour annualisation
-        nb_annees = (date_fin - date_debut).days / 365.25
-        
-        # Dividendes
-        total_dividends = 0
-        nb_dividends = 0
-        if include_dividends:
-            dividends = fund.dividends[date_debut:date_fin]
-            if not dividends.empty:
-                total_dividends = dividends.sum()
-                nb_dividends = len(dividends)
-                print(f"  Dividendes       : {total_dividends:.2f} ({nb_dividends} distributions)")
-        
-        print()
-        
-        # === RENDEMENTS ===
-        print(f"{Fore.YELLOW}RENDEMENTS:{Style.RESET_ALL}")
-        
-        # Rendement simple (sans dividendes)
-        rendement_simple = ((prix_fin - prix_debut) / prix_debut) * 100
-        print(f"  Rendement prix   : {rendement_simple:+.2f}%")
-        
-        # Rendement total (avec dividendes)
-        if include_dividends and total_dividends > 0:
-            rendement_total = ((prix_fin + total_dividends - prix_debut) / prix_debut) * 100
-            print(f"  Rendement total  : {Fore.GREEN}{rendement_total:+.2f}%{Style.RESET_ALL}")
-            print(f"  Apport dividendes: {rendement_total - rendement_simple:+.2f}%")
-        else:
-            rendement_total = rendement_simple
-            print(f"  Rendement total  : {Fore.GREEN}{rendement_total:+.2f}%{Style.RESET_ALL}")
-        
-        # Rendement annualisé (si période > 1 an)
-        if nb_annees >= 1:
-            rendement_annualise = (((prix_fin + total_dividends) / prix_debut) ** (1/nb_annees) - 1) * 100
-            print(f"  Rendement annualisé: {rendement_annualise:+.2f}%")
-        
-        print()
-        
-        # === VOLATILITÉ ===
-        print(f"{Fore.YELLOW}RISQUE:{Style.RESET_ALL}")
-        
-        # Calcul des rendements quotidiens
-        returns = hist['Close'].pct_change().dropna()
-        
-        # Volatilité (écart-type des rendements quotidiens, annualisé)
-        volatilite_quotidienne = returns.std()
-        volatilite_annuelle = volatilite_quotidienne * np.sqrt(252) * 100  # 252 jours de trading
-        print(f"  Volatilité annuelle: {volatilite_annuelle:.2f}%")
-        
-        # Drawdown maximum
-        cumulative = (1 + returns).cumprod()
-        running_max = cumulative.expanding().max()
-        drawdown = (cumulative - running_max) / running_max
-        max_drawdown = drawdown.min() * 100
-        print(f"  Drawdown maximum   : {max_drawdown:.2f}%")
-        
-        # Date du drawdown maximum
-        max_dd_date = drawdown.idxmin()
-        print(f"  Date du max DD     : {max_dd_date.strftime('%d/%m/%Y')}")
-        
-        print()
-        
-        # === RATIOS ===
-        print(f"{Fore.YELLOW}RATIOS:{Style.RESET_ALL}")
-        
-        # Ratio de Sharpe (simplifié, taux sans risque = 0)
-        if volatilite_annuelle > 0:
-            if nb_annees >= 1:
-                sharpe_ratio = rendement_annualise / volatilite_annuelle
-            else:
-                sharpe_ratio = rendement_total / volatilite_annuelle
-            print(f"  Ratio de Sharpe    : {sharpe_ratio:.2f}")
-        
-        # Ratio de Sortino (volatilité des rendements négatifs uniquement)
-        negative_returns = returns[returns < 0]
-        if len(negative_returns) > 0:
-            downside_vol = negative_returns.std() * np.sqrt(252) * 100
-            if downside_vol > 0:
-                if nb_annees >= 1:
-                    sortino_ratio = rendement_annualise / downside_vol
-                else:
-                    sortino_ratio = rendement_total / downside_vol
-                print(f"  Ratio de Sortino   : {sortino_ratio:.2f}")
-        
-        # Calmar ratio (rendement / max drawdown)
-        if abs(max_drawdown) > 0:
-            if nb_annees >= 1:
-                calmar_ratio = rendement_annualise / abs(max_drawdown)
-            else:
-                calmar_ratio = rendement_total / abs(max_drawdown)
-            print(f"  Ratio de Calmar    : {calmar_ratio:.2f}")
-        
-        print()
-        
-        # === STATISTIQUES ===
-        print(f"{Fore.YELLOW}STATISTIQUES:{Style.RESET_ALL}")
-        
-        prix_min = hist['Close'].min()
-        prix_max = hist['Close'].max()
-        prix_moyen = hist['Close'].mean()
-        
-        print(f"  Prix minimum       : {prix_min:.2f}")
-        print(f"  Prix maximum       : {prix_max:.2f}")
-        print(f"  Prix moyen         : {prix_moyen:.2f}")
-        print(f"  Amplitude          : {((prix_max - prix_min) / prix_min * 100):.2f}%")
-        
-        # Jours positifs vs négatifs
-        jours_positifs = (returns > 0).sum()
-        jours_negatifs = (returns < 0).sum()
-        taux_reussite = jours_positifs / (jours_positifs + jours_negatifs) * 100
-        print(f"  Jours positifs     : {jours_positifs} ({taux_reussite:.1f}%)")
-        print(f"  Jours négatifs     : {jours_negatifs} ({100-taux_reussite:.1f}%)")
-        
-        # Meilleur et pire jour
-        meilleur_jour = returns.max() * 100
-        pire_jour = returns.min() * 100
-        print(f"  Meilleur jour      : {meilleur_jour:+.2f}%")
-        print(f"  Pire jour          : {pire_jour:+.2f}%")
-        
-        print()
-        
-        # === COMPARAISON AVEC BENCHMARK ===
-        if benchmark_ticker:
-            print(f"{Fore.YELLOW}COMPARAISON AVEC BENCHMARK ({benchmark_ticker}):{Style.RESET_ALL}")
-            try:
-                benchmark = yf.Ticker(benchmark_ticker)
-                
-                if ':' in period:
-                    bench_hist = benchmark.history(start=start_date, end=end_date)
-                else:
-                    bench_hist = benchmark.history(period=period)
-                
-                if not bench_hist.empty:
-                    bench_prix_debut = bench_hist['Close'].iloc[0]
-                    bench_prix_fin = bench_hist['Close'].iloc[-1]
-                    bench_rendement = ((bench_prix_fin - bench_prix_debut) / bench_prix_debut) * 100
-                    
-                    # Dividendes du benchmark si demandé
-                    bench_dividends = 0
-                    if include_dividends:
-                        bench_divs = benchmark.dividends[bench_hist.index[0]:bench_hist.index[-1]]
-                        if not bench_divs.empty:
-                            bench_dividends = bench_divs.sum()
-                    
-                    bench_rendement_total = ((bench_prix_fin + bench_dividends - bench_prix_debut) / bench_prix_debut) * 100
-                    
-                    print(f"  Rendement benchmark: {bench_rendement_total:+.2f}%")
-                    print(f"  Différence         : {rendement_total - bench_rendement_total:+.2f}%")
-                    
-                    if rendement_total > bench_rendement_total:
-                        print(f"  {Fore.GREEN}✓ Surperformance de {rendement_total - bench_rendement_total:.2f}%{Style.RESET_ALL}")
-                    else:
-                        print(f"  {Fore.RED}✗ Sous-performance de {abs(rendement_total - bench_rendement_total):.2f}%{Style.RESET_ALL}")
-                    
-                    # Alpha et Beta (corrélation)
-                    bench_returns = bench_hist['Close'].pct_change().dropna()
-                    
-                    # Aligner les dates
-                    common_dates = returns.index.intersection(bench_returns.index)
-                    if len(common_dates) > 2:
-                        aligned_returns = returns.loc[common_dates]
-                        aligned_bench = bench_returns.loc[common_dates]
-                        
-                        # Beta (sensibilité au marché)
-                        covariance = np.cov(aligned_returns, aligned_bench)[0, 1]
-                        benchmark_variance = np.var(aligned_bench)
-                        if benchmark_variance > 0:
-                            beta = covariance / benchmark_variance
-                            print(f"  Beta               : {beta:.2f}")
-                        
-                        # Corrélation
-                        correlation = np.corrcoef(aligned_returns, aligned_bench)[0, 1]
-                        print(f"  Corrélation        : {correlation:.2f}")
-                else:
-                    print(f"  {Fore.RED}Données du benchmark non disponibles{Style.RESET_ALL}")
-            except Exception as e:
-                print(f"  {Fore.RED}Erreur lors de la comparaison: {e}{Style.RESET_ALL}")
-            
-            print()
-        
+            return None
+        print_rendement(result)
         print(f"{Style.BRIGHT}{Fore.CYAN}{'=' * 70}{Style.RESET_ALL}\n")
+        return result
         
     except Exception as e:
         print(f"{Fore.RED}Erreur lors du calcul de rendement: {e}{Style.RESET_ALL}")
         import traceback
         traceback.print_exc()
+        return None
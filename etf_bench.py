@@ -0,0 +1,487 @@
+#!/usr/bin/python3
+# etf_bench.py - Benchmarks hors ligne des chemins critiques (données enregistrées, sans réseau)
+
+import os
+import io
+import sys
+import json
+import shutil
+import argparse
+import platform
+import tempfile
+import time
+import statistics
+from contextlib import redirect_stdout, ExitStack
+from datetime import datetime
+from unittest import mock
+import numpy as np
+import pandas as pd
+from colorama import Fore, Style, init
+from etf_net import get_rate_limit, set_rate_limit
+
+# Répertoire des jeux de données enregistrés (un sous-répertoire par ticker)
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "fixtures")
+
+# Jeu de données généré à la volée si aucun enregistrement n'est disponible
+SYNTHETIC_FIXTURE = "synthetique"
+
+# Périodes mesurées pour les calculs de performance
+PERIODS = ('1y', '10y', 'max')
+
+# Écart relatif (médiane) au-delà duquel une mesure est signalée comme régression
+DEFAULT_THRESHOLD = 0.10
+
+REPORT_VERSION = 1
+
+# Débit autorisé pendant les mesures (limiteur désactivé en pratique)
+BENCH_RATE_PER_MINUTE = 1_000_000
+
+
+class FixtureFund:
+    """Remplace yfinance.Ticker : historique, dividendes et info lus depuis un enregistrement"""
+
+    def __init__(self, symbol, history, info):
+        self.ticker = symbol
+        self.info = info
+        self._history = history
+
+    @property
+    def dividends(self):
+        dividends = self._history['Dividends']
+        return dividends[dividends > 0]
+
+    def history(self, period='1y', start=None, end=None, **kwargs):
+        hist = self._history
+        tz = hist.index.tz
+        if start or end:
+            if start:
+                hist = hist[hist.index >= pd.Timestamp(start, tz=tz)]
+            if end:
+                hist = hist[hist.index < pd.Timestamp(end, tz=tz)]
+        elif period != 'max':
+            hist = hist[hist.index >= hist.index[-1] - _period_offset(period)]
+        return hist.copy()
+
+
+class FixtureYQ:
+    """Remplace yahooquery.Ticker : répartition sectorielle et principales positions enregistrées"""
+
+    def __init__(self, symbol, sectors, holdings):
+        self.symbols = [symbol]
+        self.fund_sector_weightings = sectors
+        self.fund_top_holdings = holdings
+
+
+def _period_offset(period):
+    """Convertit une période yfinance (1mo, 6mo, 1y, 10y...) en DateOffset"""
+    if period.endswith('mo'):
+        return pd.DateOffset(months=int(period[:-2]))
+    if period.endswith('y'):
+        return pd.DateOffset(years=int(period[:-1]))
+    if period.endswith('d'):
+        return pd.DateOffset(days=int(period[:-1]))
+    raise ValueError(f"période inconnue '{period}'")
+
+
+def synthetic_fixture(years=25, seed=42):
+    """
+    Construit un jeu de données déterministe (marche aléatoire, dividende trimestriel)
+
+    Args:
+        years: profondeur de l'historique
+        seed: graine du générateur
+
+    Returns:
+        (FixtureFund, FixtureYQ)
+    """
+    symbol = "BENCH.DE"
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end="2025-12-31", periods=years * 252, tz="Europe/Berlin", name="Date")
+    close = 50 * np.cumprod(1 + rng.normal(0.0003, 0.011, len(index)))
+    history = pd.DataFrame({
+        'Open': close * (1 + rng.normal(0, 0.002, len(index))),
+        'High': close * 1.005,
+        'Low': close * 0.995,
+        'Close': close,
+        'Volume': rng.integers(10_000, 500_000, len(index)).astype('float64'),
+        'Dividends': 0.0,
+        'Stock Splits': 0.0,
+    }, index=index)
+    history.iloc[40::63, history.columns.get_loc('Dividends')] = 0.35
+
+    info = {
+        'symbol': symbol,
+        'shortName': "Bench FTSE All-World",
+        'longName': "Bench FTSE All-World UCITS ETF (USD) Distributing",
+        'fundFamily': "Vanguard",
+        'category': "Global Large-Cap Blend Equity",
+        'exchange': "GER",
+        'currency': "EUR",
+        'quoteType': "ETF",
+        'isin': "IE00BK5BQT80",
+        'regularMarketPrice': float(close[-1]),
+        'previousClose': float(close[-2]),
+        'fiftyTwoWeekLow': float(close[-252:].min()),
+        'fiftyTwoWeekHigh': float(close[-252:].max()),
+        'fiftyDayAverage': float(close[-50:].mean()),
+        'twoHundredDayAverage': float(close[-200:].mean()),
+        'volume': 152_000,
+        'totalAssets': 1.85e10,
+        'expenseRatio': 0.0022,
+        'yield': 0.017,
+        'firstTradeDateEpochUtc': int(index[0].timestamp()),
+        'longBusinessSummary': "Fonds indiciel répliquant la performance des marchés actions mondiaux. " * 8,
+    }
+    sectors = pd.DataFrame(
+        {symbol: [0.25, 0.16, 0.11, 0.10, 0.09, 0.08, 0.07, 0.05, 0.04, 0.03, 0.02]},
+        index=['technology', 'financial_services', 'healthcare', 'consumer_cyclical', 'industrials',
+               'communication_services', 'consumer_defensive', 'energy', 'basic_materials',
+               'utilities', 'realestate'],
+    )
+    holdings = pd.DataFrame({
+        'symbol': ['AAPL', 'MSFT', 'NVDA', 'AMZN', 'META', 'GOOGL', 'AVGO', 'TSLA', 'GOOG', 'JPM'],
+        'holdingName': ['Apple Inc', 'Microsoft Corp', 'NVIDIA Corp', 'Amazon.com Inc', 'Meta Platforms Inc',
+                        'Alphabet Inc A', 'Broadcom Inc', 'Tesla Inc', 'Alphabet Inc C', 'JPMorgan Chase & Co'],
+        'holdingPercent': [0.045, 0.041, 0.039, 0.024, 0.016, 0.012, 0.011, 0.010, 0.010, 0.008],
+    }, index=[symbol] * 10)
+    return FixtureFund(symbol, history, info), FixtureYQ(symbol, sectors, holdings)
+
+
+def record_fixture(ticker_symbol):
+    """
+    Enregistre les données réelles d'un ticker (nécessite le réseau) pour les benchmarks
+
+    Args:
+        ticker_symbol: symbole du ticker (ex: VWCE.DE)
+
+    Returns:
+        str: répertoire de l'enregistrement
+    """
+    from etf_core import get_ticker_data
+
+    result = get_ticker_data(ticker_symbol)
+    if result is None:
+        raise ValueError(f"données indisponibles pour {ticker_symbol}")
+    fund, yqfund, info = result
+    directory = os.path.join(FIXTURES_DIR, ticker_symbol)
+    os.makedirs(directory, exist_ok=True)
+
+    fund.history(period='max').to_csv(os.path.join(directory, "history.csv"))
+    with open(os.path.join(directory, "info.json"), "w", encoding="utf-8") as f:
+        json.dump(info, f, ensure_ascii=False, indent=2, default=str)
+    for name, attr in (("sectors.json", "fund_sector_weightings"), ("holdings.json", "fund_top_holdings")):
+        try:
+            frame = getattr(yqfund, attr)
+            if isinstance(frame, pd.DataFrame):
+                frame.to_json(os.path.join(directory, name), orient="split")
+        except Exception as e:
+            print(f"{Fore.YELLOW}⚠️ {attr} non enregistré : {e}{Style.RESET_ALL}")
+    return directory
+
+
+def load_fixture(name):
+    """
+    Charge un jeu de données enregistré (ou le jeu synthétique)
+
+    Args:
+        name: nom du sous-répertoire de FIXTURES_DIR, ou SYNTHETIC_FIXTURE
+
+    Returns:
+        (FixtureFund, FixtureYQ)
+    """
+    if name == SYNTHETIC_FIXTURE:
+        return synthetic_fixture()
+
+    directory = os.path.join(FIXTURES_DIR, name)
+    if not os.path.isdir(directory):
+        raise ValueError(f"aucun enregistrement '{name}' dans {FIXTURES_DIR} (utilise --record {name})")
+    history = pd.read_csv(os.path.join(directory, "history.csv"), index_col=0)
+    history.index = pd.to_datetime(history.index, utc=True).tz_convert("Europe/Berlin")
+    with open(os.path.join(directory, "info.json"), "r", encoding="utf-8") as f:
+        info = json.load(f)
+
+    frames = {}
+    for key in ("sectors", "holdings"):
+        path = os.path.join(directory, f"{key}.json")
+        frames[key] = pd.read_json(path, orient="split") if os.path.exists(path) else pd.DataFrame()
+    symbol = info.get('symbol', name)
+    return FixtureFund(symbol, history, info), FixtureYQ(symbol, frames["sectors"], frames["holdings"])
+
+
+def measure(func, repeat=5, warmup=1):
+    """
+    Mesure le temps d'exécution d'une fonction (sortie console supprimée)
+
+    Args:
+        func: fonction sans argument
+        repeat: nombre de mesures
+        warmup: exécutions préalables non mesurées
+
+    Returns:
+        dict: médiane, minimum, moyenne et p95 en secondes
+    """
+    timings = []
+    with redirect_stdout(io.StringIO()):
+        for _ in range(warmup):
+            func()
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        'median_s': statistics.median(timings),
+        'min_s': timings[0],
+        'mean_s': statistics.fmean(timings),
+        'p95_s': timings[min(len(timings) - 1, int(round(0.95 * (len(timings) - 1))))],
+        'repeat': repeat,
+    }
+
+
+def build_vault(directory, size, target_symbol):
+    """
+    Crée un vault synthétique de `size` fiches, la fiche recherchée étant la dernière
+
+    Args:
+        directory: répertoire des fiches
+        size: nombre de fiches
+        target_symbol: symbole présent uniquement dans la dernière fiche
+
+    Returns:
+        str: chemin de la fiche cible
+    """
+    os.makedirs(directory, exist_ok=True)
+    body = (
+        "## Description\n\n" + "Fonds indiciel. " * 60 + "\n\n"
+        "## Performance (1 an)\n\n- **Rendement total** : 12,34%\n- **Volatilité** : 14,56%\n\n"
+        "## Notes personnelles\n\n*Ajoutez ici vos notes, analyses et réflexions sur cet ETF...*\n"
+    )
+    target = None
+    for i in range(size):
+        symbol = target_symbol if i == size - 1 else f"ETF{i:05d}.DE"
+        path = os.path.join(directory, f"ETF synthétique {i:05d}.md")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(
+                f"#ETF #{symbol.replace('.', '_')}\n\n**Dernière mise à jour :** 01/01/2025 à 10:00\n\n"
+                f"## Généralités\n\n- **Symbole** : {symbol}\n- **Exchange** : GER\n\n{body}"
+            )
+        if symbol == target_symbol:
+            target = path
+    return target
+
+
+class _LatencyTicker:
+    """Remplace yfinance.Ticker pour search_ticker_variants : latence simulée par requête"""
+
+    latency = 0.05
+    listed = ('.DE', '.AS', '.MI')
+
+    def __init__(self, ticker):
+        self.ticker = ticker
+
+    @property
+    def info(self):
+        time.sleep(self.latency)
+        suffix = '.' + self.ticker.rsplit('.', 1)[1] if '.' in self.ticker else ''
+        if suffix not in self.listed:
+            raise ValueError("404 Not Found")
+        return {'symbol': self.ticker, 'shortName': 'Bench ETF', 'exchange': 'GER',
+                'currency': 'EUR', 'regularMarketPrice': 101.5}
+
+
+def run_benchmarks(fixture="synthetique", repeat=5, vault_size=10_000, latency=0.05, only=None):
+    """
+    Exécute la suite de benchmarks
+
+    Args:
+        fixture: jeu de données (voir load_fixture)
+        repeat: nombre de mesures par benchmark
+        vault_size: nombre de fiches du vault synthétique
+        latency: latence simulée par requête réseau (secondes)
+        only: sous-chaîne filtrant les benchmarks à exécuter
+
+    Returns:
+        dict: rapport JSON
+    """
+    from etf_data import compute_performance_and_stats
+    from etf_analysis import calculate_rendement
+    from etf_obsidian import write_to_obsidian, append_obsidian_note
+    from etf_charts import wait_for_charts
+    import etf_utils
+
+    # Requêtes simulées : le limiteur de débit vers Yahoo ne doit pas entrer dans les mesures
+    rate = get_rate_limit()
+    set_rate_limit(BENCH_RATE_PER_MINUTE)
+    try:
+        fund, yqfund = load_fixture(fixture)
+        results = {}
+
+        def selected(name):
+            return only is None or only in name
+
+        def record(name, func, **kwargs):
+            if not selected(name):
+                return
+            print(f"{Fore.CYAN}⏱  {name}{Style.RESET_ALL}", end=" ", flush=True)
+            results[name] = measure(func, **kwargs)
+            print(f"{results[name]['median_s'] * 1000:.1f} ms")
+
+        # Calculs de performance sur 1 an / 10 ans / historique complet
+        for period in PERIODS:
+            hist = fund.history(period=period)
+            record(f"compute_performance_and_stats[{period}]",
+                   lambda hist=hist: compute_performance_and_stats(fund, hist), repeat=repeat)
+            record(f"calculate_rendement[{period}]",
+                   lambda period=period: calculate_rendement(fund, period=period), repeat=repeat)
+
+        # Classification indice / émetteur d'un univers de 10 000 fonds (noms tous distincts)
+        from etf_rules import classify_many
+        universe = [dict(fund.info, longName=f"{fund.info.get('longName', '')} {i}") for i in range(10_000)]
+        record("classify_many[10000]", lambda: classify_many(universe), repeat=repeat)
+
+        workdir = tempfile.mkdtemp(prefix="etfinfo-bench-")
+        try:
+            with ExitStack() as stack:
+                # Vault et données locales isolés dans un répertoire temporaire
+                stack.enter_context(mock.patch.dict(os.environ, {
+                    "ETFINFO_DATA_DIR": os.path.join(workdir, "data"),
+                    "ETFINFO_OBSIDIAN_DIR": os.path.join(workdir, "vault"),
+                }))
+
+                # Rendu complet d'une fiche (graphiques déjà en cache après l'échauffement)
+                record("write_to_obsidian",
+                       lambda: write_to_obsidian(fund, yqfund, fund.info, fund.ticker, interactive=False),
+                       repeat=repeat)
+                wait_for_charts()
+
+                # Ajout d'une note dans un vault de vault_size fiches (éditeur non interactif)
+                if selected("append_obsidian_note"):
+                    vault = os.path.join(workdir, "notes")
+                    target = build_vault(vault, vault_size, fund.ticker)
+                    editor = os.path.join(workdir, "editor.sh")
+                    with open(editor, "w") as f:
+                        f.write('#!/bin/sh\necho "Note de benchmark" > "$1"\n')
+                    os.chmod(editor, 0o755)
+                    stack.enter_context(mock.patch.dict(os.environ, {"ETFINFO_OBSIDIAN_DIR": vault, "EDITOR": editor}))
+                    record(f"append_obsidian_note[{vault_size}]", lambda: append_obsidian_note(fund.ticker),
+                           repeat=repeat)
+                    with open(target, "r", encoding="utf-8") as f:
+                        if "Note de benchmark" not in f.read():
+                            print(f"{Fore.YELLOW}⚠️ append_obsidian_note n'a pas modifié la fiche cible{Style.RESET_ALL}")
+
+                # Recherche de variantes : une requête simulée par place boursière
+                _LatencyTicker.latency = latency
+                stack.enter_context(mock.patch.object(etf_utils.yf, "Ticker", _LatencyTicker))
+                record("search_ticker_variants", lambda: etf_utils.search_ticker_variants("BENCH"),
+                       repeat=max(1, repeat // 2), warmup=0)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    finally:
+        set_rate_limit(rate)
+
+    return {
+        'version': REPORT_VERSION,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'fixture': fixture,
+        'parameters': {'repeat': repeat, 'vault_size': vault_size, 'latency_s': latency},
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+        },
+        'benchmarks': results,
+    }
+
+
+def compare_reports(report, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare un rapport à une référence (médianes)
+
+    Args:
+        report: rapport courant
+        baseline: rapport de référence
+        threshold: écart relatif signalé comme régression / amélioration
+
+    Returns:
+        list de dicts {'name', 'baseline_s', 'current_s', 'ratio', 'status'}
+    """
+    rows = []
+    reference = baseline.get('benchmarks', {})
+    for name, current in report.get('benchmarks', {}).items():
+        if name not in reference:
+            rows.append({'name': name, 'baseline_s': None, 'current_s': current['median_s'],
+                         'ratio': None, 'status': 'nouveau'})
+            continue
+        base = reference[name]['median_s']
+        ratio = current['median_s'] / base if base else None
+        if ratio is None:
+            status = 'inchangé'
+        elif ratio > 1 + threshold:
+            status = 'régression'
+        elif ratio < 1 - threshold:
+            status = 'amélioration'
+        else:
+            status = 'inchangé'
+        rows.append({'name': name, 'baseline_s': base, 'current_s': current['median_s'],
+                     'ratio': ratio, 'status': status})
+    return rows
+
+
+def print_comparison(rows):
+    """Affiche le tableau de comparaison avec la référence"""
+    colors = {'régression': Fore.RED, 'amélioration': Fore.GREEN, 'nouveau': Fore.CYAN}
+    print(f"\n{Style.BRIGHT}{'Benchmark':<42} {'Référence':>11} {'Actuel':>11} {'Ratio':>7}  Statut{Style.RESET_ALL}")
+    for row in rows:
+        base = f"{row['baseline_s'] * 1000:.1f} ms" if row['baseline_s'] is not None else "-"
+        ratio = f"{row['ratio']:.2f}x" if row['ratio'] is not None else "-"
+        color = colors.get(row['status'], '')
+        print(f"{row['name']:<42} {base:>11} {row['current_s'] * 1000:>8.1f} ms {ratio:>7}  "
+              f"{color}{row['status']}{Style.RESET_ALL}")
+
+
+def main():
+    """
+    Point d'entrée : python etf_bench.py [--baseline bench-baseline.json]
+
+    Returns:
+        int: 0, ou 1 si une régression dépasse le seuil
+    """
+    init(autoreset=True)
+    parser = argparse.ArgumentParser(description="Benchmarks hors ligne d'etfinfo (données enregistrées)")
+    parser.add_argument("--fixture", default=SYNTHETIC_FIXTURE,
+                        help=f"jeu de données de {FIXTURES_DIR} (défaut : {SYNTHETIC_FIXTURE})")
+    parser.add_argument("--record", metavar="TICKER", help="enregistre les données réelles d'un ticker puis quitte")
+    parser.add_argument("--output", default="bench-report.json", help="rapport JSON à écrire")
+    parser.add_argument("--baseline", help="rapport de référence à comparer")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="écart relatif signalé comme régression (défaut : 0.10)")
+    parser.add_argument("--repeat", type=int, default=5, help="mesures par benchmark")
+    parser.add_argument("--vault-size", type=int, default=10_000, help="fiches du vault synthétique")
+    parser.add_argument("--latency", type=float, default=0.05, help="latence réseau simulée (secondes)")
+    parser.add_argument("--only", help="n'exécute que les benchmarks dont le nom contient ce texte")
+    args = parser.parse_args()
+
+    if args.record:
+        directory = record_fixture(args.record)
+        print(f"{Fore.GREEN}✓ Données enregistrées dans {directory}{Style.RESET_ALL}")
+        return 0
+
+    report = run_benchmarks(args.fixture, repeat=args.repeat, vault_size=args.vault_size,
+                            latency=args.latency, only=args.only)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, sort_keys=True)
+    print(f"{Fore.GREEN}✓ Rapport écrit : {args.output}{Style.RESET_ALL}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare_reports(report, baseline, args.threshold)
+        print_comparison(rows)
+        if any(row['status'] == 'régression' for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
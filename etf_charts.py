@@ -0,0 +1,172 @@
+#!/usr/bin/python3
+# etf_charts.py - Graphiques de performance (matplotlib) rendus en arrière-plan
+
+import os
+import glob
+import hashlib
+import importlib.util
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from etf_logging import log_debug, log_info, log_warning, log_error, is_debug_enabled
+from etf_metrics import record_failure
+
+# Graphiques générés pour chaque ETF
+CHART_KINDS = ('prix', 'drawdown', 'volatilite')
+
+# À incrémenter si le rendu change, pour invalider le cache
+CHART_VERSION = 1
+
+# Fenêtre de la volatilité glissante (jours de bourse)
+ROLLING_WINDOW = 21
+
+_pool = None
+_pending = []
+
+def charts_available():
+    """True si matplotlib est installé"""
+    return importlib.util.find_spec("matplotlib") is not None
+
+def _get_pool():
+    """Pool de processus partagé, créé à la première utilisation"""
+    global _pool
+    if _pool is None:
+        workers = max(1, min(4, (os.cpu_count() or 2) - 1))
+        # spawn : pas de fork d'un processus qui a déjà des threads réseau actifs
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        if is_debug_enabled(): log_debug(f"Pool graphiques démarré ({workers} processus)")
+    return _pool
+
+def series_hash(close):
+    """
+    Empreinte du contenu d'une série de prix (dates + valeurs)
+
+    Args:
+        close: pandas.Series des prix de clôture
+
+    Returns:
+        str: empreinte hexadécimale
+    """
+    digest = hashlib.sha256()
+    digest.update(f"v{CHART_VERSION}".encode())
+    digest.update(np.ascontiguousarray(close.index.asi8).tobytes())
+    digest.update(np.ascontiguousarray(close.to_numpy(dtype='float64')).tobytes())
+    return digest.hexdigest()[:16]
+
+def _render_chart(kind, dates, values, path, title):
+    """
+    Rendu d'un graphique PNG (exécuté dans un processus du pool)
+
+    Args:
+        kind: 'prix', 'drawdown' ou 'volatilite'
+        dates: tableau numpy datetime64
+        values: tableau numpy des prix de clôture
+        path: fichier PNG de destination
+        title: titre du graphique
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(8, 3), dpi=100)
+    if kind == 'prix':
+        ax.plot(dates, values, color="#1f77b4", linewidth=1.2)
+        ax.set_ylabel("Prix")
+    elif kind == 'drawdown':
+        running_max = np.maximum.accumulate(values)
+        drawdown = (values - running_max) / running_max * 100
+        ax.fill_between(dates, drawdown, 0, color="#d62728", alpha=0.4)
+        ax.set_ylabel("Drawdown (%)")
+    elif kind == 'volatilite':
+        returns = np.diff(values) / values[:-1]
+        window = ROLLING_WINDOW
+        if len(returns) >= window:
+            # Écart-type glissant via sommes cumulées (pas de boucle Python)
+            csum = np.cumsum(np.insert(returns, 0, 0.0))
+            csum2 = np.cumsum(np.insert(returns ** 2, 0, 0.0))
+            mean = (csum[window:] - csum[:-window]) / window
+            var = (csum2[window:] - csum2[:-window]) / window - mean ** 2
+            vol = np.sqrt(np.clip(var * window / (window - 1), 0, None)) * np.sqrt(252) * 100
+            ax.plot(dates[window:], vol, color="#ff7f0e", linewidth=1.2)
+        ax.set_ylabel(f"Volatilité {window}j (%)")
+    ax.set_title(title)
+    ax.grid(True, alpha=0.3)
+    fig.autofmt_xdate()
+    fig.tight_layout()
+
+    # Écriture atomique pour ne jamais exposer une image partielle à Obsidian
+    tmp_path = path + ".tmp.png"
+    fig.savefig(tmp_path)
+    plt.close(fig)
+    os.replace(tmp_path, path)
+    return path
+
+def submit_charts(symbol, close, directory):
+    """
+    Lance le rendu des graphiques d'un ETF en arrière-plan
+
+    Les images sont nommées d'après l'empreinte de la série : si elles existent
+    déjà, rien n'est recalculé. Les noms de fichier sont connus immédiatement,
+    la fiche peut donc être écrite sans attendre la fin du rendu.
+
+    Args:
+        symbol: symbole du ticker
+        close: pandas.Series des prix de clôture
+        directory: répertoire de la fiche Obsidian (les images vont dans charts/)
+
+    Returns:
+        list: noms des fichiers PNG à intégrer dans la fiche (vide si indisponible)
+    """
+    if close is None or len(close) < 2 or not charts_available():
+        if is_debug_enabled(): log_info("submit_charts: pas de graphique (données ou matplotlib absents)")
+        return []
+
+    charts_dir = os.path.join(directory, "charts")
+    os.makedirs(charts_dir, exist_ok=True)
+    tag = symbol.replace('.', '_')
+    digest = series_hash(close)
+    dates = close.index.tz_localize(None).to_numpy() if close.index.tz is not None else close.index.to_numpy()
+    values = close.to_numpy(dtype='float64')
+
+    filenames = []
+    for kind in CHART_KINDS:
+        filename = f"{tag}-{kind}-{digest}.png"
+        path = os.path.join(charts_dir, filename)
+        filenames.append(filename)
+        if os.path.exists(path):
+            if is_debug_enabled(): log_debug(f"submit_charts: cache {filename}")
+            continue
+
+        # Supprimer les versions précédentes de ce graphique
+        for old in glob.glob(os.path.join(charts_dir, f"{tag}-{kind}-*.png")):
+            os.remove(old)
+
+        title = f"{symbol} - {kind}"
+        future = _get_pool().submit(_render_chart, kind, dates, values, path, title)
+        _pending.append((filename, future))
+        if is_debug_enabled(): log_debug(f"submit_charts: rendu demandé {filename}")
+    return filenames
+
+def wait_for_charts():
+    """
+    Attend la fin des rendus en cours et arrête le pool
+
+    Returns:
+        int: nombre de graphiques en échec
+    """
+    global _pool
+    failures = 0
+    while _pending:
+        filename, future = _pending.pop(0)
+        try:
+            future.result()
+        except Exception as e:
+            failures += 1
+            record_failure('render', filename.split('-', 1)[0].replace('_', '.'))
+            log_error(f"Rendu du graphique {filename} en échec: {e}")
+    if _pool is not None:
+        _pool.shutdown(wait=True)
+        _pool = None
+    if failures:
+        log_warning(f"{failures} graphique(s) non générés")
+    return failures
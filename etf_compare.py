@@ -0,0 +1,309 @@
+#!/usr/bin/python3
+# etf_compare.py - Comparaison de plusieurs ETF sur une période commune (--compare)
+
+import os
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from colorama import Fore, Style
+from etf_net import get_history, get_info, prefetch, release, period_arguments, daily_series
+from etf_results import Rendement, ComparedFund, ComparisonReport, to_float
+from etf_format import fmt, dataframe_to_markdown
+from etf_metrics import record_failure
+from etf_logging import log_info, log_warning, log_debug, is_debug_enabled, span
+
+# Sous-dossier des notes de comparaison dans le répertoire Obsidian des fiches
+# (hors du niveau des fiches : list_vault_notes ne les prend pas pour des ETF)
+COMPARE_SUBDIR = "Comparaisons"
+
+# Colonnes du tableau de comparaison : (champ de Rendement, en-tête, format etf_format)
+TABLE_COLUMNS = (
+    ('rendement_total', 'Rdt total', 'pct_signe'),
+    ('rendement_annualise', 'Rdt ann.', 'pct_signe'),
+    ('volatilite', 'Vol.', 'pct'),
+    ('max_drawdown', 'Max DD', 'pct'),
+    ('sharpe', 'Sharpe', 'ratio'),
+    ('sortino', 'Sortino', 'ratio'),
+    ('calmar', 'Calmar', 'ratio'),
+    ('total_dividendes', 'Dividendes', 'dividende'),
+)
+
+
+def load_fund(symbol, period):
+    """
+    Récupère l'historique et le nom d'un ETF (exécuté en arrière-plan)
+
+    Le nom vient de la table des instruments si la cotation est connue, sinon de Yahoo.
+
+    Returns:
+        tuple (clôtures, dividendes, nom)
+
+    Raises:
+        ValueError: historique insuffisant sur la période
+    """
+    from etf_instruments import lookup_symbol
+    with span("compare.fetch", ticker=symbol):
+        fund = yf.Ticker(symbol)
+        hist = get_history(fund, **period_arguments(period))
+        if hist is None or len(hist) < 2:
+            raise ValueError("pas assez de données sur la période")
+        closes = daily_series(hist['Close'], unique=True)
+        dividends = daily_series(hist['Dividends'], unique=True) if 'Dividends' in hist else pd.Series(dtype=float)
+        known = lookup_symbol(symbol)
+        name = known['name'] if known and known.get('name') else None
+        if name is None:
+            try:
+                info = get_info(fund) or {}
+                name = info.get('longName', info.get('shortName'))
+            except Exception as e:
+                if is_debug_enabled(): log_debug("compare: nom de %s indisponible : %s", symbol, e)
+        return closes, dividends[dividends != 0], name
+
+
+def align(closes):
+    """
+    Aligne les clôtures sur un index commun, restreint à la période couverte par tous les ETF
+
+    Args:
+        closes: dict {symbole: Series des clôtures}
+
+    Returns:
+        DataFrame (une colonne par ETF, NaN les jours où une place est fermée)
+    """
+    frame = pd.concat(closes, axis=1).sort_index()
+    start = max(frame[column].first_valid_index() for column in frame)
+    end = min(frame[column].last_valid_index() for column in frame)
+    return frame.loc[start:end]
+
+
+def compute_metrics(closes, dividends, period_label, include_dividends=True):
+    """
+    Indicateurs de calculate_rendement pour toutes les colonnes à la fois
+
+    Les rendements journaliers de chaque ETF sont calculés entre ses propres séances
+    (un jour férié sur une place n'introduit pas de rendement nul) : chaque colonne donne
+    les mêmes valeurs que compute_rendement sur la même fenêtre.
+
+    Args:
+        closes: DataFrame aligné (voir align)
+        dividends: DataFrame des dividendes (une colonne par ETF)
+        period_label: période affichée
+        include_dividends: inclure les dividendes
+
+    Returns:
+        tuple (dict {symbole: Rendement}, DataFrame des rendements journaliers)
+    """
+    valid = closes.notna()
+    returns = (closes / closes.ffill().shift(1) - 1).where(valid)
+    first = closes.apply(pd.Series.first_valid_index)
+    last = closes.apply(pd.Series.last_valid_index)
+    prix_debut = closes.bfill().iloc[0]
+    prix_fin = closes.ffill().iloc[-1]
+    nb_annees = (last - first).dt.days / 365.25
+
+    # Dividendes détachés dans la fenêtre de chaque ETF
+    dividends = dividends.reindex(columns=closes.columns)
+    if include_dividends and not dividends.empty:
+        dates = dividends.index.to_numpy()[:, None]
+        window = (dates >= first.to_numpy(dtype='datetime64[ns]')) & (dates <= last.to_numpy(dtype='datetime64[ns]'))
+        dividends = dividends.where(window & dividends.notna().to_numpy())
+        total_dividends = dividends.sum().fillna(0.0)
+        nb_dividends = dividends.count()
+    else:
+        total_dividends = pd.Series(0.0, index=closes.columns)
+        nb_dividends = pd.Series(0, index=closes.columns)
+
+    # Rendements (mêmes formules que compute_rendement)
+    rendement_simple = (prix_fin - prix_debut) / prix_debut * 100
+    rendement_total = ((prix_fin + total_dividends - prix_debut) / prix_debut * 100).where(
+        total_dividends > 0, rendement_simple)
+    annualise = ((((prix_fin + total_dividends) / prix_debut) ** (1 / nb_annees.where(nb_annees > 0)) - 1) * 100).where(
+        nb_annees >= 1)
+    rendement_ratio = annualise.where(nb_annees >= 1, rendement_total)
+
+    # Risque
+    volatilite = returns.std() * np.sqrt(252) * 100
+    cumulative = (1 + returns).cumprod()
+    drawdown = (cumulative - cumulative.cummax()) / cumulative.cummax()
+    max_drawdown = drawdown.min() * 100
+    downside = returns.where(returns < 0).std() * np.sqrt(252) * 100
+
+    # Ratios
+    sharpe = (rendement_ratio / volatilite).where(volatilite > 0)
+    sortino = (rendement_ratio / downside).where(downside > 0)
+    calmar = (rendement_ratio / max_drawdown.abs()).where(max_drawdown.abs() > 0)
+
+    stats = {
+        'jours_positifs': (returns > 0).sum(),
+        'jours_negatifs': (returns < 0).sum(),
+        'meilleur_jour': returns.max() * 100,
+        'pire_jour': returns.min() * 100,
+        'prix_min': closes.min(),
+        'prix_max': closes.max(),
+        'prix_moyen': closes.mean(),
+        'nb_jours': valid.sum(),
+    }
+
+    results = {}
+    for symbol in closes.columns:
+        dd = drawdown[symbol]
+        dd_date = dd.idxmin() if dd.notna().any() else None
+        results[symbol] = Rendement(
+            periode=period_label,
+            date_debut=first[symbol].strftime('%Y-%m-%d'),
+            date_fin=last[symbol].strftime('%Y-%m-%d'),
+            nb_jours=int(stats['nb_jours'][symbol]),
+            prix_debut=to_float(prix_debut[symbol]),
+            prix_fin=to_float(prix_fin[symbol]),
+            total_dividendes=to_float(total_dividends[symbol]) or 0.0,
+            nb_dividendes=int(nb_dividends[symbol]),
+            rendement_prix=to_float(rendement_simple[symbol]),
+            rendement_total=to_float(rendement_total[symbol]),
+            rendement_annualise=to_float(annualise[symbol]),
+            volatilite=to_float(volatilite[symbol]),
+            max_drawdown=to_float(max_drawdown[symbol]),
+            date_max_drawdown=dd_date.strftime('%Y-%m-%d') if dd_date is not None else None,
+            sharpe=to_float(sharpe[symbol]),
+            sortino=to_float(sortino[symbol]),
+            calmar=to_float(calmar[symbol]),
+            prix_min=to_float(stats['prix_min'][symbol]),
+            prix_max=to_float(stats['prix_max'][symbol]),
+            prix_moyen=to_float(stats['prix_moyen'][symbol]),
+            jours_positifs=int(stats['jours_positifs'][symbol]),
+            jours_negatifs=int(stats['jours_negatifs'][symbol]),
+            meilleur_jour=to_float(stats['meilleur_jour'][symbol]),
+            pire_jour=to_float(stats['pire_jour'][symbol]),
+        )
+    return results, returns
+
+
+def compare(symbols, period='1y', include_dividends=True):
+    """
+    Compare plusieurs ETF : historiques récupérés en parallèle, alignés une seule fois,
+    indicateurs calculés colonne par colonne puis classés par ratio de Sharpe
+
+    Args:
+        symbols: tickers à comparer
+        period: période yfinance ou YYYY-MM-DD:YYYY-MM-DD
+        include_dividends: inclure les dividendes dans le rendement total
+
+    Returns:
+        ComparisonReport
+    """
+    start = time.perf_counter()
+    period_label = period.replace(':', ' → ') if ':' in period else period
+    report = ComparisonReport(periode=period_label)
+    pending = prefetch({symbol: (lambda s=symbol: load_fund(s, period)) for symbol in symbols})
+
+    closes, dividends, names, errors = {}, {}, {}, {}
+    for symbol, future in pending.items():
+        try:
+            closes[symbol], dividends[symbol], names[symbol] = future.result()
+        except Exception as e:
+            errors[symbol] = str(e)
+            record_failure('compare', symbol)
+            log_warning(f"Comparaison: {symbol} ignoré : {e}")
+        finally:
+            release(symbol)
+    if errors:
+        report.erreurs = errors
+    if not closes:
+        return report
+
+    with span("compare.metrics", tickers=len(closes)):
+        aligned = align(closes)
+        if len(aligned) < 2:
+            report.erreurs = dict(errors, periode="aucune période commune à tous les ETF")
+            return report
+        metrics, returns = compute_metrics(aligned, pd.concat(dividends, axis=1), period_label, include_dividends)
+
+    ranking = sorted(metrics, key=lambda s: (metrics[s].sharpe is None, -(metrics[s].sharpe or 0)))
+    report.date_debut = aligned.index[0].strftime('%Y-%m-%d')
+    report.date_fin = aligned.index[-1].strftime('%Y-%m-%d')
+    report.fonds = [ComparedFund(ticker=symbol, rang=rank, nom=names.get(symbol), rendement=metrics[symbol])
+                    for rank, symbol in enumerate(ranking, 1)]
+    correlations = returns.corr()
+    report.correlations = {a: {b: to_float(correlations.loc[a, b]) for b in ranking} for a in ranking}
+    if is_debug_enabled(): log_debug("compare: %d ETF, %d séances alignées en %.1f ms", len(ranking), len(aligned),
+                                     (time.perf_counter() - start) * 1000)
+    log_info(f"Comparaison: {len(ranking)} ETF sur {period_label}, {len(errors)} échec(s)")
+    return report
+
+
+def _table(report):
+    """DataFrame du classement (une ligne par ETF, index = symbole)"""
+    return pd.DataFrame(
+        {header: [getattr(f.rendement, field) for f in report.fonds] for field, header, _ in TABLE_COLUMNS},
+        index=[f.ticker for f in report.fonds],
+    )
+
+
+def print_comparison(report):
+    """Affiche le tableau de comparaison"""
+    for symbol, error in (report.erreurs or {}).items():
+        print(f"{Fore.RED}✗ {symbol} : {error}{Style.RESET_ALL}")
+    if not report.fonds:
+        print(f"{Fore.YELLOW}Aucun ETF à comparer sur la période {report.periode}.{Style.RESET_ALL}")
+        return
+
+    print(f"\n{Style.BRIGHT}{Fore.CYAN}⚖️  Comparaison de {len(report.fonds)} ETF - {report.periode} "
+          f"(période commune : {report.date_debut} → {report.date_fin}){Style.RESET_ALL}")
+    print(f"{Style.BRIGHT}{'#':>2} {'Symbole':<10} {'Nom':<32} "
+          + " ".join(f"{header:>10}" for _, header, _ in TABLE_COLUMNS) + Style.RESET_ALL)
+    for f in report.fonds:
+        r = f.rendement
+        values = " ".join(f"{fmt(getattr(r, field), kind):>10}" for field, _, kind in TABLE_COLUMNS)
+        print(f"{f.rang:>2} {f.ticker:<10} {(f.nom or '')[:32]:<32} {values}")
+
+    if report.correlations and len(report.fonds) > 1:
+        symbols = [f.ticker for f in report.fonds]
+        print(f"\n{Fore.YELLOW}CORRÉLATION DES RENDEMENTS JOURNALIERS:{Style.RESET_ALL}")
+        print(f"{'':<10} " + " ".join(f"{s[:8]:>8}" for s in symbols))
+        for a in symbols:
+            print(f"{a:<10} " + " ".join(f"{fmt(report.correlations[a][b], 'ratio'):>8}" for b in symbols))
+    print()
+
+
+def write_comparison_note(report):
+    """
+    Écrit la note Obsidian de comparaison (sous-dossier Comparaisons du répertoire des fiches)
+
+    Les ETF dont la fiche existe sont liés à celle-ci.
+
+    Returns:
+        str: chemin de la note
+    """
+    from etf_obsidian import get_obsidian_directory
+    directory = get_obsidian_directory()
+    target = os.path.join(directory, COMPARE_SUBDIR)
+    os.makedirs(target, exist_ok=True)
+    symbols = [f.ticker for f in report.fonds]
+    path = os.path.join(target, f"Comparaison {' vs '.join(symbols)} ({report.periode.replace(' → ', ' - ')}).md")
+
+    def label(f):
+        if f.nom and os.path.exists(os.path.join(directory, f"{f.nom}.md")):
+            return f"[[{f.nom}|{f.ticker}]]"
+        return f.ticker
+
+    table = _table(report)
+    table.index = [label(f) for f in report.fonds]
+    lines = [
+        f"# Comparaison {' / '.join(symbols)}",
+        "",
+        f"- **Période** : {report.periode} ({report.date_debut} → {report.date_fin})",
+        f"- **Mise à jour** : {datetime.now().strftime('%d/%m/%Y %H:%M')}",
+        "",
+        "## Classement (ratio de Sharpe)",
+        "",
+        dataframe_to_markdown(table, {header: kind for _, header, kind in TABLE_COLUMNS}, index_label='ETF'),
+        "",
+    ]
+    if report.correlations and len(symbols) > 1:
+        correlations = pd.DataFrame(report.correlations).loc[symbols, symbols]
+        lines += ["## Corrélations", "", dataframe_to_markdown(correlations, default_kind='ratio'), ""]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+    log_info(f"Comparaison: note écrite dans {path}")
+    return path
@@ -2,15 +2,57 @@
 # etf_core.py - Fonctions de récupération et affichage des données ETF
 
 import sys
+import copy
+import time
+import threading
 import yfinance as yf
 from yahooquery import Ticker
 from colorama import Fore, Style
 import warnings
-from etf_logging import log_debug, log_info, log_warning, log_error, log_exception
+from etf_logging import log_debug, log_info, log_warning, log_error, log_exception, span
+from etf_format import fmt
+from etf_net import get_info, get_history as fetch_history, get_fund_module, open_session, is_retryable, YahooUnavailable
+from etf_results import BasicInfo, Financials, Weight, PricePoint, to_float
+from etf_instruments import record_instrument
 
 # Supprimer les warnings de yfinance
 warnings.filterwarnings('ignore')
 
+# Durée de réutilisation de la session yahooquery (cookie + crumb) avant une nouvelle poignée de main
+YQ_SESSION_MAX_AGE = 3600
+
+_yq_lock = threading.Lock()
+_yq_template = None
+_yq_created = 0.0
+
+def yahooquery_ticker(ticker_symbol):
+    """
+    Crée un yahooquery.Ticker en réutilisant la session et le crumb du précédent
+
+    Chaque Ticker() yahooquery ouvre une session et redemande un crumb (deux requêtes) :
+    les tickers suivants sont des copies du premier, seul le symbole change.
+
+    Args:
+        ticker_symbol: Symbole du ticker (ex: VWCE.DE), ou liste de symboles (cotations groupées)
+
+    Returns:
+        yahooquery.Ticker
+    """
+    global _yq_template, _yq_created
+    if isinstance(ticker_symbol, (list, tuple)):
+        ticker_symbol = list(ticker_symbol)
+        first = ticker_symbol[0] if ticker_symbol else '?'
+    else:
+        first = ticker_symbol
+    with _yq_lock:
+        if _yq_template is None or time.monotonic() - _yq_created > YQ_SESSION_MAX_AGE:
+            _yq_template = open_session(first, lambda: Ticker(ticker_symbol))
+            _yq_created = time.monotonic()
+            return _yq_template
+        yqfund = copy.copy(_yq_template)
+    yqfund.symbols = ticker_symbol
+    return yqfund
+
 def get_ticker_data(ticker_symbol):
     """
     Récupère les données d'un ticker depuis Yahoo Finance
@@ -23,7 +65,7 @@ def get_ticker_data(ticker_symbol):
     """
     try:
         fund = yf.Ticker(ticker_symbol)
-        yqfund = Ticker(ticker_symbol)
+        yqfund = yahooquery_ticker(ticker_symbol)
 
         # Lire les infos générales - utiliser fast_info comme fallback
         try:
@@ -31,15 +73,26 @@ def get_ticker_data(ticker_symbol):
             import os
             from contextlib import redirect_stderr
             
-            with open(os.devnull, 'w') as devnull:
-                with redirect_stderr(devnull):
-                    info = fund.info
+            with span("fetch.info", ticker=ticker_symbol) as sp:
+                with open(os.devnull, 'w') as devnull:
+                    with redirect_stderr(devnull):
+                        info = get_info(fund)
+                sp.set(fields=len(info) if info else 0)
             
             # Vérifier que le ticker existe vraiment (a des données valides)
             if not info or 'symbol' not in info or not info.get('regularMarketPrice'):
                 return None
+
+            # Table locale des cotations (recherche par ISIN sans réseau)
+            record_instrument(info)
                 
-        except Exception:
+        except Exception as e:
+            # Yahoo limite les requêtes : le ticker existe peut-être, ne pas le déclarer introuvable
+            if isinstance(e, YahooUnavailable) or is_retryable(e):
+                log_warning(f"Yahoo indisponible pour {ticker_symbol}: {e}")
+                print(f"{Fore.RED}Yahoo limite ou refuse les requêtes ({e}) : réessaie plus tard.{Style.RESET_ALL}")
+                return None
+
             # Fallback sur fast_info si info échoue
             try:
                 info = fund.fast_info.__dict__ if hasattr(fund, 'fast_info') else {}
@@ -65,36 +118,41 @@ def get_raw_info(info):
         print(f"{key}: {value}")
     return
 
-def get_basic_info(info, ticker_symbol):
+def build_basic_info(info, ticker_symbol):
     """
-    Affiche les informations de base de l'ETF
-    
+    Construit l'identification de l'ETF
+
     Args:
         info: Dictionnaire des informations du ticker
         ticker_symbol: Symbole du ticker
+
+    Returns:
+        BasicInfo
     """
+    short_name = info.get('shortName', 'N/A')
+    return BasicInfo(
+        symbol=info.get('symbol', ticker_symbol),
+        short_name=short_name,
+        long_name=info.get('longName', short_name),
+        fund_family=info.get('fundFamily', info.get('family')),
+        exchange=info.get('exchange'),
+        quote_type=info.get('quoteType'),
+        currency=info.get('currency'),
+    )
+
+def print_basic_info(basic):
+    """Affiche l'identification de l'ETF (rendu texte de BasicInfo)"""
     print()
-    # Identification avec gestion des clés manquantes
-    symbol = info.get('symbol', ticker_symbol)
-    shortName = info.get('shortName', 'N/A')
-    longName = info.get('longName', shortName)
-    name = f"{symbol} / {shortName} / {longName}"
+    name = f"{basic.symbol} / {basic.short_name} / {basic.long_name}"
     
     print(f"{Style.BRIGHT}{Fore.LIGHTCYAN_EX}{'-' * len(name)}\n{name}\n{'-' * len(name)}{Style.RESET_ALL}")
     print()
 
-    # Lecture sur clef dans les données JSON
-    fundFamily = info.get('fundFamily', info.get('family', '<non présent>'))
-    print(f"fundFamily : {fundFamily}")
-
-    # Marché
-    exchange = info.get('exchange', '<non présent>')
-    print(f"exchange : {exchange}")
+    print(f"fundFamily : {basic.fund_family or '<non présent>'}")
+    print(f"exchange : {basic.exchange or '<non présent>'}")
+    print(f"quoteType : {basic.quote_type or '<non présent>'}")
 
-    quoteType = info.get('quoteType', '<non présent>')
-    print(f"quoteType : {quoteType}")
-
-    currency = str(info.get('currency', "<absent>"))
+    currency = str(basic.currency) if basic.currency is not None else "<absent>"
     if currency == 'EUR':
         currency = f"{Fore.GREEN}{currency}{Style.RESET_ALL}"
     else:
@@ -102,92 +160,196 @@ def get_basic_info(info, ticker_symbol):
     print(f"currency : {currency}")
     print()
 
+def get_basic_info(info, ticker_symbol):
+    """
+    Affiche les informations de base de l'ETF
+    
+    Args:
+        info: Dictionnaire des informations du ticker
+        ticker_symbol: Symbole du ticker
+    """
+    print_basic_info(build_basic_info(info, ticker_symbol))
     return
 
-def get_financials(info):
-    """Affiche les données financières de l'ETF"""
+def build_financials(info):
+    """
+    Construit les données financières de l'ETF
+
+    Returns:
+        Financials
+    """
+    return Financials(
+        current_price=to_float(info.get('currentPrice', info.get('regularMarketPrice'))),
+        previous_close=to_float(info.get('previousClose', info.get('regularMarketPreviousClose'))),
+        fifty_two_week_low=to_float(info.get('fiftyTwoWeekLow')),
+        fifty_two_week_high=to_float(info.get('fiftyTwoWeekHigh')),
+        fifty_day_average=to_float(info.get('fiftyDayAverage')),
+        two_hundred_day_average=to_float(info.get('twoHundredDayAverage')),
+        volume=to_float(info.get('volume', info.get('regularMarketVolume'))),
+        total_assets=to_float(info.get('totalAssets')),
+        expense_ratio=to_float(info.get('annualReportExpenseRatio', info.get('expenseRatio'))),
+    )
+
+def print_financials(financials):
+    """Affiche les données financières (rendu texte de Financials)"""
+    def show(value):
+        return str(value) if value is not None else '<absent>'
+
     print(f"{Fore.YELLOW}FINANCIALS:{Style.RESET_ALL}")
     
     # Prix actuel et précédent
-    currentPrice = str(info.get('currentPrice', info.get('regularMarketPrice', '<absent>')))
-    print(f"currentPrice: {currentPrice}")
-    
-    previousClose = str(info.get('previousClose', info.get('regularMarketPreviousClose', '<absent>')))
-    print(f"previousClose: {previousClose}")
+    print(f"currentPrice: {show(financials.current_price)}")
+    print(f"previousClose: {show(financials.previous_close)}")
     
     # Range 52 semaines
-    fiftyTwoWeekLow = str(info.get('fiftyTwoWeekLow', '<absent>'))
-    fiftyTwoWeekHigh = str(info.get('fiftyTwoWeekHigh', '<absent>'))
-    print(f"52 Week range: {fiftyTwoWeekLow} - {fiftyTwoWeekHigh}\n")
+    print(f"52 Week range: {show(financials.fifty_two_week_low)} - {show(financials.fifty_two_week_high)}\n")
     
     # Moyennes mobiles
-    fiftyDayAverage = str(info.get('fiftyDayAverage', '<absent>'))
-    print(f"50 days average: {fiftyDayAverage}")
-    
-    twoHundredDayAverage = str(info.get('twoHundredDayAverage', '<absent>'))
-    print(f"200 days average: {twoHundredDayAverage}\n")
+    print(f"50 days average: {show(financials.fifty_day_average)}")
+    print(f"200 days average: {show(financials.two_hundred_day_average)}\n")
     
     # Volume
-    volume = str(info.get('volume', info.get('regularMarketVolume', '<absent>')))
-    print(f"Volume: {volume}")
+    print(f"Volume: {show(financials.volume)}")
     
     # Total des actifs (pour les ETF)
-    totalAssets = info.get('totalAssets', '<absent>')
-    if totalAssets != '<absent>':
-        print(f"Total Assets: {totalAssets:,.0f}")
+    if financials.total_assets is not None:
+        print(f"Total Assets: {fmt(financials.total_assets, 'entier')}")
     
     # Frais de gestion
-    expenseRatio = info.get('annualReportExpenseRatio', info.get('expenseRatio', '<absent>'))
-    if expenseRatio != '<absent>' and expenseRatio is not None:
-        print(f"Expense Ratio: {expenseRatio:.2%}")
+    if financials.expense_ratio is not None:
+        print(f"Expense Ratio: {fmt(financials.expense_ratio, 'taux')}")
     
     print()
+
+def get_financials(info):
+    """Affiche les données financières de l'ETF"""
+    print_financials(build_financials(info))
     return
 
+def build_summary(info):
+    """Résumé business de l'ETF (str)"""
+    return str(info.get('longBusinessSummary', info.get('description', '<Business summary non présent>')))
+
 def get_business_summary(info):
     """Affiche le résumé business de l'ETF"""
     print(f"{Fore.YELLOW}BUSINESS SUMMARY:{Style.RESET_ALL}")
-    summary = str(info.get('longBusinessSummary', info.get('description', '<Business summary non présent>')))
-    print(summary)
+    print(build_summary(info))
     print()
     return
 
-def get_history(fund):
-    """Affiche l'historique sur 1 mois"""
+def build_history(fund, period="1mo"):
+    """
+    Construit l'historique des cours
+
+    Returns:
+        list de PricePoint
+    """
+    history = fetch_history(fund, full=True, period=period)
+    columns = {name: history[name].to_numpy() if name in history else [None] * len(history)
+               for name in ('Open', 'High', 'Low', 'Close', 'Volume')}
+    return [
+        PricePoint(
+            date=date.strftime('%Y-%m-%d'),
+            open=to_float(columns['Open'][i]),
+            high=to_float(columns['High'][i]),
+            low=to_float(columns['Low'][i]),
+            close=to_float(columns['Close'][i]),
+            volume=to_float(columns['Volume'][i]),
+        )
+        for i, date in enumerate(history.index)
+    ]
+
+def print_history(points):
+    """Affiche l'historique des cours (rendu texte d'une liste de PricePoint)"""
+    print(f"{Style.DIM}{'Date':<12} {'Open':>10} {'High':>10} {'Low':>10} {'Close':>10} {'Volume':>12}{Style.RESET_ALL}")
+    for p in points:
+        print(f"{p.date:<12} {fmt(p.open, 'nombre'):>10} {fmt(p.high, 'nombre'):>10} "
+              f"{fmt(p.low, 'nombre'):>10} {fmt(p.close, 'nombre'):>10} {fmt(p.volume, 'entier'):>12}")
+
+def get_history(fund, pending=None):
+    """
+    Affiche l'historique sur 1 mois
+
+    Args:
+        fund: objet yfinance.Ticker
+        pending: Future de build_history déjà lancé (etf_net.prefetch), optionnel
+    """
     print(f"{Fore.YELLOW}HISTORY (1 month):{Style.RESET_ALL}")
     try:
-        history = fund.history(period="1mo")
-        print(history)
+        print_history(pending.result() if pending else build_history(fund))
     except Exception as e:
         print(f"{Fore.RED}Erreur lors de la récupération de l'historique: {e}{Style.RESET_ALL}")
     print()
     return
 
-def get_repartition(yqfund, ticker_symbol):
-    """Affiche la répartition sectorielle de l'ETF"""
+def _fund_module_frame(yqfund, name, ticker_symbol):
+    """Module fonds yahooquery pour un ticker (ValueError si Yahoo renvoie un message d'erreur)"""
+    data = get_fund_module(yqfund, name)
+    if isinstance(data, dict):
+        data = data.get(ticker_symbol, data)
+    if isinstance(data, str):
+        raise ValueError(data)
+    return data
+
+def build_repartition(yqfund, ticker_symbol):
+    """
+    Construit la répartition sectorielle (poids en %)
+
+    Returns:
+        list de Weight
+    """
+    data = _fund_module_frame(yqfund, 'fund_sector_weightings', ticker_symbol)
+    if hasattr(data, 'columns'):
+        column = ticker_symbol if ticker_symbol in data.columns else data.columns[0]
+        data = data[column]
+    if isinstance(data, dict):
+        items = data.items()
+    else:
+        items = zip(data.index, data.to_numpy())
+    return [Weight(name=str(name), weight=to_float(value) * 100 if to_float(value) is not None else None)
+            for name, value in items]
+
+def print_weights(weights):
+    """Affiche une répartition (rendu texte d'une liste de Weight)"""
+    for w in weights:
+        label = f"{w.symbol} - {w.name}" if w.symbol else w.name
+        print(f"  {label[:45]:<45} {fmt(w.weight, 'pct'):>8}")
+
+def get_repartition(yqfund, ticker_symbol, pending=None):
+    """Affiche la répartition sectorielle de l'ETF (pending: Future de build_repartition déjà lancé)"""
     print(f"{Fore.YELLOW}REPARTITION ETF:{Style.RESET_ALL}")
     try:
-        repartition = yqfund.fund_sector_weightings
-        if isinstance(repartition, dict) and ticker_symbol in repartition:
-            print(repartition[ticker_symbol])
-        else:
-            print(repartition)
+        print_weights(pending.result() if pending else build_repartition(yqfund, ticker_symbol))
     except Exception as e:
         print(f"{Fore.RED}Erreur: {e}{Style.RESET_ALL}")
         print("La répartition sectorielle n'est pas disponible pour ce ticker.")
     print()
     return
 
-def get_top_holdings(yqfund, ticker_symbol):
-    """Affiche les principales positions de l'ETF"""
+def build_top_holdings(yqfund, ticker_symbol):
+    """
+    Construit la liste des principales positions (poids en %)
+
+    Returns:
+        list de Weight
+    """
+    data = _fund_module_frame(yqfund, 'fund_top_holdings', ticker_symbol)
+    records = data.to_dict('records') if hasattr(data, 'to_dict') else list(data)
+    return [
+        Weight(
+            name=str(row.get('holdingName', row.get('symbol', 'N/A'))),
+            weight=to_float(row.get('holdingPercent')) * 100 if to_float(row.get('holdingPercent')) is not None else None,
+            symbol=row.get('symbol'),
+        )
+        for row in records
+    ]
+
+def get_top_holdings(yqfund, ticker_symbol, pending=None):
+    """Affiche les principales positions de l'ETF (pending: Future de build_top_holdings déjà lancé)"""
     print(f"{Fore.YELLOW}TOP HOLDINGS ETF:{Style.RESET_ALL}")
     print(f"{Style.DIM}Retrieves Top 10 holdings for a given symbol(s){Style.RESET_ALL}")
     try:
-        holdings = yqfund.fund_top_holdings
-        if isinstance(holdings, dict) and ticker_symbol in holdings:
-            print(holdings[ticker_symbol])
-        else:
-            print(holdings)
+        print_weights(pending.result() if pending else build_top_holdings(yqfund, ticker_symbol))
     except Exception as e:
         print(f"{Fore.RED}Erreur: {e}{Style.RESET_ALL}")
         print("Les holdings ne sont pas disponibles pour ce ticker.")
@@ -0,0 +1,185 @@
+#!/usr/bin/python3
+# etf_daemon.py - Mise à jour automatique des fiches Obsidian après la clôture de chaque place
+
+import heapq
+import random
+import time
+from datetime import datetime, timedelta, timezone, time as dtime
+from zoneinfo import ZoneInfo
+from colorama import Fore, Style
+from etf_core import get_ticker_data
+from etf_obsidian import write_to_obsidian, list_vault_notes
+from etf_charts import wait_for_charts
+from etf_utils import EXCHANGE_SUFFIXES
+from etf_net import release, RateLimiter
+from etf_metrics import record_failure, write_metrics
+from etf_logging import log_debug, log_info, log_warning, log_exception, is_debug_enabled
+
+# Fuseau horaire et heure de clôture par suffixe de place (voir EXCHANGE_SUFFIXES)
+EXCHANGE_SCHEDULES = {
+    '.DE': ('Europe/Berlin', dtime(17, 30)),
+    '.F': ('Europe/Berlin', dtime(20, 0)),
+    '.L': ('Europe/London', dtime(16, 30)),
+    '.AS': ('Europe/Amsterdam', dtime(17, 30)),
+    '.PA': ('Europe/Paris', dtime(17, 30)),
+    '.MI': ('Europe/Rome', dtime(17, 30)),
+    '.SW': ('Europe/Zurich', dtime(17, 30)),
+    '': ('America/New_York', dtime(16, 0)),
+}
+
+# Codes 'exchange' renvoyés par Yahoo (info['exchange']) -> suffixe de place
+YAHOO_EXCHANGE_CODES = {
+    'GER': '.DE',
+    'FRA': '.F',
+    'LSE': '.L',
+    'IOB': '.L',
+    'AMS': '.AS',
+    'PAR': '.PA',
+    'MIL': '.MI',
+    'EBS': '.SW',
+    'NYQ': '',
+    'NMS': '',
+    'NGM': '',
+    'NCM': '',
+    'PCX': '',
+    'ASE': '',
+    'BTS': '',
+}
+
+# Délai après la clôture avant la première mise à jour (publication des cours de clôture)
+SETTLE_DELAY = timedelta(minutes=20)
+
+def exchange_suffix(symbol, exchange_code=None):
+    """
+    Détermine la place de cotation d'un ticker
+
+    Args:
+        symbol: symbole du ticker (ex: VWCE.DE)
+        exchange_code: code Yahoo de la place (info['exchange'], ex: GER)
+
+    Returns:
+        str: suffixe de place présent dans EXCHANGE_SCHEDULES
+    """
+    if exchange_code in YAHOO_EXCHANGE_CODES:
+        return YAHOO_EXCHANGE_CODES[exchange_code]
+    if '.' in symbol:
+        suffix = '.' + symbol.rsplit('.', 1)[1]
+        if suffix in EXCHANGE_SCHEDULES:
+            return suffix
+    return ''
+
+def next_close(suffix, after):
+    """
+    Prochaine clôture (jour ouvré) d'une place strictement après `after`
+
+    Args:
+        suffix: suffixe de place
+        after: datetime avec fuseau horaire
+
+    Returns:
+        datetime UTC de la clôture
+    """
+    tz_name, close_time = EXCHANGE_SCHEDULES[suffix]
+    tz = ZoneInfo(tz_name)
+    local = after.astimezone(tz)
+    day = local.date()
+    while True:
+        candidate = datetime.combine(day, close_time, tzinfo=tz)
+        if candidate > local and candidate.weekday() < 5:
+            return candidate.astimezone(timezone.utc)
+        day += timedelta(days=1)
+
+def refresh_ticker(symbol):
+    """
+    Met à jour la fiche Obsidian d'un ticker sans interaction
+
+    Returns:
+        bool: True si la fiche a été mise à jour
+    """
+    try:
+        result = get_ticker_data(symbol)
+        if result is None:
+            record_failure('fetch', symbol)
+            log_warning(f"Daemon: données indisponibles pour {symbol}")
+            print(f"{Fore.YELLOW}⚠️ {symbol} : données indisponibles{Style.RESET_ALL}")
+            return False
+        fund, yqfund, info = result
+        write_to_obsidian(fund, yqfund, info, symbol, interactive=False)
+        return True
+    finally:
+        # Données fraîches au prochain passage, mémoire libérée entre deux tickers
+        release(symbol)
+
+def _schedule(queue, symbol, suffix, after, spread):
+    """Planifie la prochaine mise à jour d'un ticker (clôture + délai + décalage aléatoire)"""
+    due = next_close(suffix, after) + SETTLE_DELAY + timedelta(seconds=random.uniform(0, spread.total_seconds()))
+    heapq.heappush(queue, (due, symbol, suffix))
+    if is_debug_enabled(): log_debug(f"Daemon: {symbol} planifié le {due.isoformat()}")
+
+def run_daemon(spread_minutes=30, rate_per_minute=6, symbols=None):
+    """
+    Boucle principale du daemon : rafraîchit chaque fiche après la clôture de sa place.
+
+    Les mises à jour d'une même place sont étalées aléatoirement sur `spread_minutes`
+    et l'ensemble est limité à `rate_per_minute` fiches par minute.
+
+    Args:
+        spread_minutes: fenêtre d'étalement après chaque clôture
+        rate_per_minute: limite globale de mises à jour par minute
+        symbols: tickers à suivre (défaut : toutes les fiches du vault)
+
+    Returns:
+        int: code de sortie
+    """
+    notes = list_vault_notes()
+    exchanges = {note['symbol']: note['exchange'] for note in notes}
+    if symbols:
+        exchanges = {symbol: exchanges.get(symbol) for symbol in symbols}
+    if not exchanges:
+        print(f"{Fore.RED}Aucune fiche ETF trouvée dans le vault, rien à surveiller.{Style.RESET_ALL}")
+        return 1
+
+    spread = timedelta(minutes=spread_minutes)
+    limiter = RateLimiter(rate_per_minute)
+    queue = []
+    now = datetime.now(timezone.utc)
+    for symbol, exchange_code in exchanges.items():
+        _schedule(queue, symbol, exchange_suffix(symbol, exchange_code), now, spread)
+
+    groups = {}
+    for _, symbol, suffix in queue:
+        groups.setdefault(EXCHANGE_SUFFIXES.get(suffix, suffix), []).append(symbol)
+    print(f"{Fore.CYAN}🕒 Daemon démarré : {len(queue)} ETF suivis{Style.RESET_ALL}")
+    for place, symbols_on_place in sorted(groups.items()):
+        print(f"   {place} : {', '.join(sorted(symbols_on_place))}")
+    log_info(f"Daemon démarré avec {len(queue)} tickers")
+
+    try:
+        while queue:
+            due, symbol, suffix = queue[0]
+            wait = (due - datetime.now(timezone.utc)).total_seconds()
+            if wait > 0:
+                # Pas de travail imminent : terminer les graphiques en cours avant de dormir
+                if wait > 60:
+                    wait_for_charts()
+                print(f"{Style.DIM}Prochaine mise à jour : {symbol} à {due.astimezone().strftime('%d/%m %H:%M')}{Style.RESET_ALL}")
+                time.sleep(min(wait, 3600))
+                continue
+
+            heapq.heappop(queue)
+            limiter.acquire()
+            started = datetime.now(timezone.utc)
+            print(f"{Fore.CYAN}↻ {started.astimezone().strftime('%H:%M:%S')} mise à jour de {symbol}{Style.RESET_ALL}")
+            try:
+                refresh_ticker(symbol)
+            except Exception as e:
+                log_exception(f"Daemon: échec de la mise à jour de {symbol}")
+                print(f"{Fore.RED}✗ {symbol} : {e}{Style.RESET_ALL}")
+            _schedule(queue, symbol, suffix, started, spread)
+            write_metrics()
+    except KeyboardInterrupt:
+        print("\nArrêt du daemon.")
+        log_info("Daemon arrêté par l'utilisateur")
+    finally:
+        wait_for_charts()
+    return 0
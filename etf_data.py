@@ -3,9 +3,12 @@ from datetime import datetime
 import numpy as np
 from datetime import datetime
 from etf_utils import get_ratio_emoji
-import time
-from etf_logging import log_debug, log_info, log_warning, log_error, is_debug_enabled
+from etf_net import get_history, get_dividends, get_fund_module
+from etf_dividends import analyze_dividends
+from etf_metrics import record_failure
+from etf_logging import log_debug, log_info, log_warning, log_error, is_debug_enabled, span, traced
 
+@traced("fetch.ytd")
 def compute_ytd_return(fund):
     """
     Calcule le rendement depuis le début de l'année (YTD)
@@ -18,7 +21,7 @@ def compute_ytd_return(fund):
         log_info("compute_ytd_return: start")
     try:
         start_of_year = datetime(datetime.now().year, 1, 1).strftime('%Y-%m-%d')
-        hist_ytd = fund.history(start=start_of_year)
+        hist_ytd = get_history(fund, start=start_of_year)
         if len(hist_ytd) > 1:
             prix_debut_ytd = hist_ytd['Close'].iloc[0]
             prix_fin_ytd = hist_ytd['Close'].iloc[-1]
@@ -32,32 +35,41 @@ def compute_ytd_return(fund):
         log_info("compute_ytd_return: no data or error, returning None")
     return None
 
-def build_dividend_info(fund, dividendYield):
+@traced("fetch.dividendes")
+def build_dividend_info(fund, dividendYield, purchase_date=None):
     """
     Construit les informations de dividendes pour l'ETF
 
     Args:
         fund: objet yfinance.Ticker
         dividendYield: rendement du dividende (float ou None)
+        purchase_date: date d'achat pour le yield on cost (YYYY-MM-DD, optionnel)
 
     Returns:
         dict contenant yield, dernier montant, date dernier dividende, nb distributions
+        et l'analyse de etf_dividends (totaux annuels, croissance, rendement glissant, calendrier)
     """
     if is_debug_enabled():
         log_info("build_dividend_info: start")
     try:
-        dividends = fund.dividends
+        dividends = get_dividends(fund)
         if hasattr(dividends, 'empty') and not dividends.empty and len(dividends) > 0:
             dernier_dividende = dividends.iloc[-1]
             date_dernier_div = dividends.index[-1].strftime('%d/%m/%Y')
             if is_debug_enabled():
                 log_info(f"build_dividend_info: last dividend {dernier_dividende} on {date_dernier_div}")
-            return {
+            dividend_info = {
                 'yield': dividendYield,
                 'dernier_montant': dernier_dividende,
                 'date_dernier': date_dernier_div,
                 'nb_distributions': len(dividends)
             }
+            try:
+                dividend_info.update(analyze_dividends(fund, purchase_date))
+            except Exception as e:
+                if is_debug_enabled():
+                    log_warning(f"build_dividend_info: analyse des distributions impossible {e}")
+            return dividend_info
     except Exception as e:
         if is_debug_enabled():
             log_warning(f"build_dividend_info: error {e}")
@@ -66,101 +78,90 @@ def build_dividend_info(fund, dividendYield):
         log_info("build_dividend_info: no dividend data, returning empty dict")
     return {}
 
-def compute_performance_and_stats(fund):
+def compute_performance_and_stats(fund, hist_1y=None, period='1y'):
     """
-    Calcule les performances sur 1 an + stats prix et drawdown
+    Calcule les performances sur 1 an (ou une autre période) + stats prix et drawdown
     Args:
         fund: objet yfinance.Ticker
+        hist_1y: historique de la période déjà récupéré (optionnel, sinon téléchargé)
+        period: période yfinance (1y par défaut) ; au-delà d'un an, les ratios
+            sont calculés sur le rendement annualisé
     Returns:
         rendement_data (dict), stats_data (dict)
     """
-    t0 = time.time()
-    if is_debug_enabled():
-        log_debug("Début compute_performance_and_stats")
     rendement_data = {}
     stats_data = {}
     try:
-        # --- Étape 1 : Récupération historique ---
-        t_hist = time.time()
-        hist_1y = fund.history(period='1y')
-        if len(hist_1y) <= 1:
-            if is_debug_enabled():
-                log_warning("compute_performance_and_stats: insufficient price history")
-            return {}, {}
-        if is_debug_enabled(): log_debug(f"Durée récupération historique: {time.time() - t_hist:.2f}s")
+        with span("perf.compute_performance_and_stats", ticker=getattr(fund, 'ticker', None)):
+            # --- Étape 1 : Récupération historique ---
+            with span("perf.historique") as sp:
+                if hist_1y is None:
+                    hist_1y = get_history(fund, period=period)
+                sp.set(rows=len(hist_1y))
+            if len(hist_1y) <= 1:
+                if is_debug_enabled():
+                    log_warning("compute_performance_and_stats: insufficient price history")
+                return {}, {}
 
-        # --- Étape 2 : Calculs de rendement simples ---
-        t_rend = time.time()
-        prix_debut = hist_1y['Close'].iloc[0]
-        prix_fin = hist_1y['Close'].iloc[-1]
-        rendement_simple = ((prix_fin - prix_debut) / prix_debut) * 100
-        if is_debug_enabled(): log_debug(f"Durée calcul rendement simple: {time.time() - t_rend:.2f}s")
+            # --- Étape 2 : Calculs de rendement simples ---
+            prix_debut = hist_1y['Close'].iloc[0]
+            prix_fin = hist_1y['Close'].iloc[-1]
+            rendement_simple = ((prix_fin - prix_debut) / prix_debut) * 100
 
-        # --- Étape 3 : Calculs de rendement total et volatilité ---
-        t_vol = time.time()
-        dividends_1y = fund.dividends[hist_1y.index[0]:hist_1y.index[-1]]
-        total_dividends = dividends_1y.sum() if hasattr(dividends_1y, 'empty') and not dividends_1y.empty else 0
-        rendement_total = ((prix_fin + total_dividends - prix_debut) / prix_debut) * 100
+            # --- Étape 3 : Calculs de rendement total et volatilité ---
+            with span("perf.volatilite"):
+                dividends_1y = get_dividends(fund)[hist_1y.index[0]:hist_1y.index[-1]]
+                total_dividends = dividends_1y.sum() if hasattr(dividends_1y, 'empty') and not dividends_1y.empty else 0
+                rendement_total = ((prix_fin + total_dividends - prix_debut) / prix_debut) * 100
+                nb_annees = (hist_1y.index[-1] - hist_1y.index[0]).days / 365.25
+                rendement_annualise = ((1 + rendement_total / 100) ** (1 / nb_annees) - 1) * 100 if nb_annees > 0 else rendement_total
 
-        returns = hist_1y['Close'].pct_change().dropna()
-        volatilite = returns.std() * np.sqrt(252) * 100
-        
-        if is_debug_enabled():
-            log_debug(f"Durée volatilité: {time.time() - t_vol:.2f}s")
+                returns = hist_1y['Close'].pct_change().dropna()
+                volatilite = returns.std() * np.sqrt(252) * 100
 
-        # --- Étape 4 : Drawdown ---
-        t_dd = time.time()
-        cumulative = (1 + returns).cumprod()
-        running_max = cumulative.expanding().max()
-        drawdown = (cumulative - running_max) / running_max
-        max_drawdown = drawdown.min() * 100
-        max_dd_date = drawdown.idxmin().strftime('%d/%m/%Y')
-        if is_debug_enabled():
-            log_debug(f"Durée drawdown: {time.time() - t_dd:.2f}s")
+            # --- Étape 4 : Drawdown ---
+            with span("perf.drawdown"):
+                cumulative = (1 + returns).cumprod()
+                running_max = cumulative.expanding().max()
+                drawdown = (cumulative - running_max) / running_max
+                max_drawdown = drawdown.min() * 100
+                max_dd_date = drawdown.idxmin().strftime('%d/%m/%Y')
 
-        # --- Étape 5 : Statistiques descriptives ---
-        t_stats = time.time()
-        prix_min = hist_1y['Close'].min()
-        prix_max = hist_1y['Close'].max()
-        prix_moyen = hist_1y['Close'].mean()
+            # --- Étape 5 : Statistiques descriptives ---
+            with span("perf.statistiques"):
+                prix_min = hist_1y['Close'].min()
+                prix_max = hist_1y['Close'].max()
+                prix_moyen = hist_1y['Close'].mean()
 
-        jours_positifs = (returns > 0).sum()
-        jours_negatifs = (returns < 0).sum()
-        taux_reussite = jours_positifs / (jours_positifs + jours_negatifs) * 100 if (jours_positifs + jours_negatifs) > 0 else 0
+                jours_positifs = (returns > 0).sum()
+                jours_negatifs = (returns < 0).sum()
+                taux_reussite = jours_positifs / (jours_positifs + jours_negatifs) * 100 if (jours_positifs + jours_negatifs) > 0 else 0
 
-        meilleur_jour = returns.max() * 100
-        pire_jour = returns.min() * 100
-        if is_debug_enabled():
-            log_debug(f"Durée statistiques descriptives: {time.time() - t_stats:.2f}s")
+                meilleur_jour = returns.max() * 100
+                pire_jour = returns.min() * 100
 
-        # --- Étape 6 : Ratios de performance ---
-        sharpe_ratio = rendement_total / volatilite if volatilite > 0 else 0
+            # --- Étape 6 : Ratios de performance ---
+            with span("perf.ratios"):
+                rendement_ratios = rendement_total if period == '1y' else rendement_annualise
+                sharpe_ratio = rendement_ratios / volatilite if volatilite > 0 else 0
 
-        negative_returns = returns[returns < 0]
-        sortino_ratio = 0
-        if len(negative_returns) > 0:
-            downside_vol = negative_returns.std() * np.sqrt(252) * 100
-            if downside_vol > 0:
-                sortino_ratio = rendement_total / downside_vol
+                negative_returns = returns[returns < 0]
+                sortino_ratio = 0
+                if len(negative_returns) > 0:
+                    downside_vol = negative_returns.std() * np.sqrt(252) * 100
+                    if downside_vol > 0:
+                        sortino_ratio = rendement_ratios / downside_vol
 
-        calmar_ratio = rendement_total / abs(max_drawdown) if abs(max_drawdown) > 0 else 0
-        if is_debug_enabled():
-            log_debug(f"Durée calcul ratios: {time.time() - t_ratio:.2f}s")
-
-        # --- Étape 7 : Emojis et alertes ---
-        t_emoji = time.time()
-        sharpe_emoji, sharpe_alert = get_ratio_emoji(sharpe_ratio, 'sharpe')
-        sortino_emoji, sortino_alert = get_ratio_emoji(sortino_ratio, 'sortino')
-        if is_debug_enabled():
-            log_debug(f"Durée génération emojis: {time.time() - t_emoji:.2f}s")
+                calmar_ratio = rendement_ratios / abs(max_drawdown) if abs(max_drawdown) > 0 else 0
 
-        total_time = time.time() - t0
-        if is_debug_enabled():
-            log_debug(f"Durée totale interne compute_performance_and_stats: {total_time:.2f}s")
+            # --- Étape 7 : Emojis et alertes ---
+            sharpe_emoji, sharpe_alert = get_ratio_emoji(sharpe_ratio, 'sharpe')
+            sortino_emoji, sortino_alert = get_ratio_emoji(sortino_ratio, 'sortino')
 
         rendement_data = {
             'rendement_simple': rendement_simple,
             'rendement_total': rendement_total,
+            'rendement_annualise': rendement_annualise,
             'volatilite': volatilite,
             'max_drawdown': max_drawdown,
             'max_dd_date': max_dd_date,
@@ -192,10 +193,12 @@ def compute_performance_and_stats(fund):
             log_info("compute_performance_and_stats: metrics computed successfully")
         return rendement_data, stats_data
     except Exception as e:
+        record_failure('compute', getattr(fund, 'ticker', None))
         if is_debug_enabled():
             log_error(f"compute_performance_and_stats: error {e}")
         return {}, {}
 
+@traced("fetch.sector_weights")
 def get_sector_weights(yqfund, ticker_symbol):
     """
     Récupère la répartition sectorielle d'un ETF
@@ -209,7 +212,7 @@ def get_sector_weights(yqfund, ticker_symbol):
     if is_debug_enabled():
         log_info("get_sector_weights: start")
     try:
-        repartition = yqfund.fund_sector_weightings
+        repartition = get_fund_module(yqfund, 'fund_sector_weightings')
         if isinstance(repartition, dict) and ticker_symbol in repartition:
             repartition = repartition[ticker_symbol]
         if hasattr(repartition, 'map'):
@@ -226,6 +229,7 @@ def get_sector_weights(yqfund, ticker_symbol):
             log_warning(f"get_sector_weights: error {e}")
         return "Non disponible", str(e)
 
+@traced("fetch.top_holdings")
 def get_top_holdings(yqfund, ticker_symbol):
     """
     Récupère les principales positions d'un ETF
@@ -239,7 +243,7 @@ def get_top_holdings(yqfund, ticker_symbol):
     if is_debug_enabled():
         log_info("get_top_holdings: start")
     try:
-        top_holdings = yqfund.fund_top_holdings
+        top_holdings = get_fund_module(yqfund, 'fund_top_holdings')
         if isinstance(top_holdings, dict) and ticker_symbol in top_holdings:
             top_holdings = top_holdings[ticker_symbol]
         if hasattr(top_holdings, 'map'):
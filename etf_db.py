@@ -0,0 +1,45 @@
+#!/usr/bin/python3
+# etf_db.py - Base SQLite locale d'etfinfo (screener, instruments), dans le répertoire de données
+
+import os
+import sqlite3
+import threading
+from etf_utils import get_data_dir
+from etf_logging import log_debug, is_debug_enabled
+
+# Fichier de la base dans le répertoire de données (~/.etfinfo)
+DB_NAME = "etfinfo.db"
+
+_local = threading.local()
+
+
+def get_db_path():
+    """Chemin de la base SQLite"""
+    return os.path.join(get_data_dir(), DB_NAME)
+
+
+def connect(schema=None):
+    """
+    Connexion SQLite du thread courant (ouverte à la demande, puis réutilisée)
+
+    Args:
+        schema: script SQL idempotent (CREATE ... IF NOT EXISTS) du module appelant,
+            exécuté une seule fois par connexion
+
+    Returns:
+        sqlite3.Connection (lignes accessibles par nom de colonne)
+    """
+    path = get_db_path()
+    state = getattr(_local, 'state', None)
+    if state is None or state['path'] != path:
+        conn = sqlite3.connect(path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        # WAL : lectures (screener, recherche) possibles pendant un refresh
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        state = _local.state = {'path': path, 'conn': conn, 'schemas': set()}
+        if is_debug_enabled(): log_debug("db: connexion à %s", path)
+    if schema and schema not in state['schemas']:
+        state['conn'].executescript(schema)
+        state['schemas'].add(schema)
+    return state['conn']
@@ -0,0 +1,347 @@
+#!/usr/bin/python3
+# etf_dividends.py - Analyse des distributions : totaux annuels, croissance, rendement glissant, calendrier (--dividends)
+
+import io
+import re
+import time
+from concurrent.futures import as_completed
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from colorama import Fore, Style
+from etf_net import get_history, get_dividends, get_quotes, prefetch, release, daily_series
+from etf_format import fmt
+from etf_metrics import record_failure, inc
+from etf_logging import log_info, log_warning, log_debug, is_debug_enabled, span
+
+# Années complètes retenues pour la croissance des distributions et le rendement moyen
+CAGR_YEARS = 5
+
+# Années affichées dans le tableau des totaux annuels de la fiche
+ANNUAL_ROWS = 10
+
+# Fréquences de distribution : intervalle typique entre deux détachements (jours)
+FREQUENCIES = {
+    'Mensuel': 365.25 / 12,
+    'Trimestriel': 365.25 / 4,
+    'Semestriel': 365.25 / 2,
+    'Annuel': 365.25,
+}
+
+MONTHS = ('janv.', 'févr.', 'mars', 'avr.', 'mai', 'juin', 'juil.', 'août', 'sept.', 'oct.', 'nov.', 'déc.')
+
+# Symboles par requête de cotations (rendement Yahoo de chaque ETF du lot)
+QUOTE_BATCH = 500
+
+
+def annual_totals(dividends):
+    """Total distribué par année civile (Series indexée par année)"""
+    return dividends.groupby(dividends.index.year).sum()
+
+
+def distribution_cagr(dividends, today=None, years=CAGR_YEARS):
+    """
+    Croissance annuelle moyenne des distributions sur les dernières années complètes
+
+    L'année en cours et une première année incomplète (ETF lancé en cours d'année) sont écartées.
+
+    Returns:
+        float en % ou None (moins de deux années complètes)
+    """
+    today = today or pd.Timestamp.now()
+    totals = annual_totals(dividends)
+    counts = dividends.groupby(dividends.index.year).size()
+    complete = totals[(totals.index < today.year) & (totals > 0)]
+    if len(complete) and counts[complete.index[0]] < counts[complete.index[1:]].median():
+        complete = complete.iloc[1:]
+    complete = complete.iloc[-(years + 1):]
+    if len(complete) < 2:
+        return None
+    span_years = complete.index[-1] - complete.index[0]
+    return ((complete.iloc[-1] / complete.iloc[0]) ** (1 / span_years) - 1) * 100
+
+
+def ttm_yield_series(dividends, close):
+    """
+    Rendement sur 12 mois glissants à chaque séance : dividendes des 365 derniers jours / cours
+
+    Chaque dividende est rattaché à la première séance à partir de sa date de détachement,
+    puis une somme glissante sur 365 jours est calculée sur tout l'index des cours.
+
+    Args:
+        dividends: Series des dividendes (index sans fuseau)
+        close: Series des clôtures non ajustées (index sans fuseau)
+
+    Returns:
+        Series en % (NaN pendant la première année de cotation)
+    """
+    index = close.index
+    position = index.searchsorted(dividends.index)
+    inside = position < len(index)
+    paid = np.bincount(position[inside], weights=dividends.to_numpy()[inside], minlength=len(index))
+    ttm = pd.Series(paid, index=index).rolling('365D').sum()
+    return (ttm / close * 100).where(index >= index[0] + pd.Timedelta(days=365))
+
+
+def payout_calendar(dividends, today=None):
+    """
+    Fréquence et mois de distribution, prochain détachement estimé
+
+    Returns:
+        dict {'frequence', 'mois', 'prochain'} (valeurs None si moins de deux distributions)
+    """
+    today = today or pd.Timestamp.now()
+    recent = dividends[dividends.index >= today - pd.DateOffset(years=3)]
+    if len(recent) < 2:
+        recent = dividends.iloc[-4:]
+    if len(recent) < 2:
+        return {'frequence': None, 'mois': None, 'prochain': None}
+    gap = float(np.median(np.diff(recent.index.to_numpy()).astype('timedelta64[D]').astype(float)))
+    frequence = min(FREQUENCIES, key=lambda name: abs(np.log(gap / FREQUENCIES[name])))
+    per_year = max(1, round(365.25 / FREQUENCIES[frequence]))
+    months = sorted(set(recent.index[-per_year:].month))
+    prochain = recent.index[-1] + pd.Timedelta(days=round(FREQUENCIES[frequence]))
+    return {
+        'frequence': frequence,
+        'mois': [MONTHS[m - 1] for m in months],
+        'prochain': prochain.strftime('%d/%m/%Y') if prochain >= today.normalize() else None,
+    }
+
+
+def yield_on_cost(dividends, close, purchase_date):
+    """
+    Rendement des 12 derniers mois rapporté au prix d'achat
+
+    Args:
+        purchase_date: date d'achat (YYYY-MM-DD) ; prix d'achat = clôture de la première séance à partir de cette date
+
+    Returns:
+        dict {'date_achat', 'prix_achat', 'yield_on_cost', 'dividendes_percus'} ou {} si la date est hors historique
+    """
+    start = pd.Timestamp(purchase_date)
+    bought = close[close.index >= start]
+    if bought.empty:
+        return {}
+    prix_achat = float(bought.iloc[0])
+    last_year = dividends[dividends.index > close.index[-1] - pd.Timedelta(days=365)]
+    return {
+        'date_achat': bought.index[0].strftime('%d/%m/%Y'),
+        'prix_achat': prix_achat,
+        'yield_on_cost': float(last_year.sum()) / prix_achat * 100,
+        'dividendes_percus': float(dividends[dividends.index >= bought.index[0]].sum()),
+    }
+
+
+def dividend_analysis(dividends, close, purchase_date=None, today=None):
+    """
+    Analyse complète des distributions d'un ETF
+
+    Args:
+        dividends: Series des dividendes yfinance
+        close: Series des clôtures non ajustées (auto_adjust=False)
+        purchase_date: date d'achat pour le yield on cost (optionnel)
+        today: date de référence (défaut : aujourd'hui)
+
+    Returns:
+        dict {'annuel', 'cagr', 'ttm_yield', 'ttm_yield_moyen', 'frequence', 'mois', 'prochain', ...},
+        vide si l'ETF ne distribue pas
+    """
+    dividends = daily_series(dividends)
+    dividends = dividends[dividends > 0]
+    if dividends.empty:
+        return {}
+    today = today or pd.Timestamp.now()
+    analysis = {
+        'annuel': {int(year): float(total) for year, total in annual_totals(dividends).items()},
+        'annee_en_cours': today.year,
+        'cagr': distribution_cagr(dividends, today),
+    }
+    analysis.update(payout_calendar(dividends, today))
+
+    close = daily_series(close).dropna() if close is not None else pd.Series(dtype=float)
+    if len(close) > 1:
+        ttm = ttm_yield_series(dividends, close)
+        analysis['ttm_yield'] = float(ttm.iloc[-1]) if pd.notna(ttm.iloc[-1]) else None
+        recent = ttm[ttm.index >= close.index[-1] - pd.DateOffset(years=CAGR_YEARS)].dropna()
+        analysis['ttm_yield_moyen'] = float(recent.mean()) if len(recent) else None
+        if purchase_date:
+            analysis.update(yield_on_cost(dividends, close, purchase_date))
+    return analysis
+
+
+def analyze_dividends(fund, purchase_date=None):
+    """
+    Analyse des distributions d'un ticker (dividendes en cache et cours non ajustés sur tout l'historique)
+
+    Returns:
+        dict (voir dividend_analysis)
+    """
+    with span("dividends.analyse", ticker=getattr(fund, 'ticker', '?')):
+        dividends = get_dividends(fund)
+        if dividends is None or dividends.empty:
+            return {}
+        hist = get_history(fund, period='max', auto_adjust=False)
+        close = hist['Close'] if hist is not None and not hist.empty else None
+        return dividend_analysis(dividends, close, purchase_date)
+
+
+def dividend_info_from_series(dividends, dividend_yield=None):
+    """Champs de base de la section Dividendes (voir etf_data.build_dividend_info)"""
+    return {
+        'yield': dividend_yield,
+        'dernier_montant': dividends.iloc[-1],
+        'date_dernier': dividends.index[-1].strftime('%d/%m/%Y'),
+        'nb_distributions': len(dividends),
+    }
+
+
+def _load(symbol, purchase_date):
+    """Analyse d'un ticker du lot (exécuté en arrière-plan, données libérées ensuite)"""
+    fund = yf.Ticker(symbol)
+    try:
+        dividends = get_dividends(fund)
+        if dividends is None or dividends.empty:
+            return {}
+        info = dividend_info_from_series(dividends)
+        info.update(analyze_dividends(fund, purchase_date))
+        return info
+    finally:
+        release(symbol)
+
+
+def _quote_yields(symbols):
+    """Rendement Yahoo (trailingAnnualDividendYield) des symboles, en une requête par lot"""
+    from etf_core import yahooquery_ticker
+    yields = {}
+    for start in range(0, len(symbols), QUOTE_BATCH):
+        chunk = symbols[start:start + QUOTE_BATCH]
+        try:
+            data = get_quotes(yahooquery_ticker(chunk))
+        except Exception as e:
+            log_warning(f"Dividendes: rendements Yahoo indisponibles ({len(chunk)} symboles) : {e}")
+            continue
+        if isinstance(data, dict):
+            yields.update((symbol, quote.get('trailingAnnualDividendYield'))
+                          for symbol, quote in data.items() if isinstance(quote, dict))
+    return yields
+
+
+def analyze_watchlist(symbols, purchase_date=None):
+    """
+    Analyse des distributions d'une liste d'ETF (plusieurs tickers traités en parallèle)
+
+    Returns:
+        tuple (dict {symbole: dividend_info}, dict {symbole: erreur})
+    """
+    start = time.perf_counter()
+    yields = _quote_yields(symbols)
+    pending = prefetch({symbol: (lambda s=symbol: _load(s, purchase_date)) for symbol in symbols})
+    symbols_by_future = {future: symbol for symbol, future in pending.items()}
+    results, errors = {}, {}
+    for future in as_completed(symbols_by_future):
+        symbol = symbols_by_future[future]
+        try:
+            info = future.result()
+        except Exception as e:
+            errors[symbol] = str(e)
+            record_failure('compute', symbol)
+            log_warning(f"Dividendes: {symbol} ignoré : {e}")
+            continue
+        if info:
+            info['yield'] = yields.get(symbol)
+        results[symbol] = info
+    if is_debug_enabled(): log_debug("dividends: %d ETF analysés en %.1f s", len(symbols), time.perf_counter() - start)
+    return {symbol: results[symbol] for symbol in symbols if symbol in results}, errors
+
+
+def print_watchlist(results, errors):
+    """Affiche le tableau des distributions du lot"""
+    for symbol, error in errors.items():
+        print(f"{Fore.RED}✗ {symbol} : {error}{Style.RESET_ALL}")
+    print(f"\n{Style.BRIGHT}{Fore.CYAN}💶 Distributions de {len(results)} ETF{Style.RESET_ALL}")
+    print(f"{Style.BRIGHT}{'Symbole':<10} {'Fréquence':<12} {'Dernier':>10} {'Rdt 12 m':>9} "
+          f"{f'Moy. {CAGR_YEARS} a':>9} {f'Croiss. {CAGR_YEARS} a':>11} {'YoC':>8}{Style.RESET_ALL}")
+    for symbol, info in results.items():
+        if not info:
+            print(f"{symbol:<10} {Style.DIM}capitalisant ou sans distribution{Style.RESET_ALL}")
+            continue
+        print(f"{symbol:<10} {info.get('frequence') or 'N/A':<12} {fmt(info.get('dernier_montant'), 'dividende'):>10} "
+              f"{fmt(info.get('ttm_yield'), 'pct'):>9} {fmt(info.get('ttm_yield_moyen'), 'pct'):>9} "
+              f"{fmt(info.get('cagr'), 'pct_signe'):>11} {fmt(info.get('yield_on_cost'), 'pct'):>8}")
+    print()
+
+
+_SECTION = re.compile(r"## Dividendes\n[\s\S]*?(?=\n## |\Z)")
+_YIELD_LINE = re.compile(r"^- \*\*Yield actuel\*\* : .*$", re.M)
+
+
+def replace_dividends_section(content, dividend_info):
+    """
+    Remplace (ou ajoute avant la répartition sectorielle) la section Dividendes d'une fiche
+
+    Returns:
+        str: contenu mis à jour (inchangé si la fiche n'a pas d'emplacement reconnu)
+    """
+    from etf_markdown import write_dividends_section
+    buffer = io.StringIO()
+    write_dividends_section(buffer, dividend_info)
+    section = buffer.getvalue().rstrip("\n") + "\n"
+    match = _SECTION.search(content)
+    if match:
+        known = _YIELD_LINE.search(match.group(0))
+        if known and not dividend_info.get('yield'):
+            # Rendement Yahoo indisponible à ce relevé : la valeur de la fiche est conservée
+            section = section.replace("## Dividendes\n\n", f"## Dividendes\n\n{known.group(0)}\n", 1)
+        return _SECTION.sub(lambda m: section, content, count=1)
+    marker = content.find("## Répartition sectorielle")
+    if marker < 0:
+        return content
+    return content[:marker] + section + "\n" + content[marker:]
+
+
+def update_vault_notes(results):
+    """
+    Écrit la section Dividendes des fiches du vault (sans autre accès réseau)
+
+    Returns:
+        int: nombre de fiches mises à jour
+    """
+    from etf_obsidian import list_vault_notes, touch_last_update
+    notes = {note['symbol']: note['path'] for note in list_vault_notes()}
+    updated = 0
+    for symbol, info in results.items():
+        path = notes.get(symbol)
+        if not path or not info:
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            content = f.read()
+        new_content = replace_dividends_section(content, info)
+        if new_content != content:
+            new_content = touch_last_update(new_content)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(new_content)
+            updated += 1
+            inc('etfinfo_notes_written_total')
+    log_info(f"Dividendes: {updated} fiche(s) mise(s) à jour")
+    return updated
+
+
+def run_dividends(symbols=None, purchase_date=None):
+    """
+    Option --dividends : analyse des distributions des tickers donnés, sinon de toutes les fiches du vault
+
+    Args:
+        symbols: tickers (défaut : fiches du vault)
+        purchase_date: date d'achat pour le yield on cost (YYYY-MM-DD)
+
+    Returns:
+        tuple (code de sortie, résultats, erreurs)
+    """
+    from etf_obsidian import list_vault_notes
+    if not symbols:
+        symbols = sorted({note['symbol'] for note in list_vault_notes() if note['symbol']})
+    if not symbols:
+        print(f"{Fore.RED}Aucun ETF à analyser : indiquez des tickers ou créez des fiches dans le vault.{Style.RESET_ALL}")
+        return 1, {}, {}
+    results, errors = analyze_watchlist(symbols, purchase_date)
+    return (1 if errors else 0), results, errors
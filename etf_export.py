@@ -0,0 +1,288 @@
+#!/usr/bin/python3
+# etf_export.py - Export CSV / Parquet des historiques et indicateurs, ticker par ticker (--export)
+
+import os
+import sys
+import time
+from collections import deque
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from colorama import Fore, Style
+from etf_net import get_history, prefetch, release, period_arguments
+from etf_data import compute_performance_and_stats
+from etf_metrics import record_failure
+from etf_logging import log_info, log_warning, log_debug, is_debug_enabled, span
+
+EXPORT_FORMATS = ('csv', 'parquet')
+
+# Lignes gardées en mémoire avant écriture (un groupe de lignes Parquet) : la mémoire
+# ne dépend pas du nombre de tickers exportés
+BUFFER_ROWS = 50_000
+
+# Tickers récupérés en avance pendant l'écriture du précédent
+LOOKAHEAD = 4
+
+# Colonnes de l'historique exporté (une ligne par ticker et par séance)
+HISTORY_COLUMNS = {
+    'ticker': 'string',
+    'date': 'datetime64[ns]',
+    'open': 'float64',
+    'high': 'float64',
+    'low': 'float64',
+    'close': 'float64',
+    'adj_close': 'float64',
+    'volume': 'float64',
+    'dividend': 'float64',
+    'total_return_index': 'float64',
+}
+
+# Colonnes des indicateurs exportés (une ligne par ticker)
+METRIC_COLUMNS = {
+    'ticker': 'string',
+    'period': 'string',
+    'date_debut': 'string',
+    'date_fin': 'string',
+    'nb_seances': 'int64',
+    'rendement_simple': 'float64',
+    'rendement_total': 'float64',
+    'rendement_annualise': 'float64',
+    'volatilite': 'float64',
+    'max_drawdown': 'float64',
+    'sharpe': 'float64',
+    'sortino': 'float64',
+    'calmar': 'float64',
+    'total_dividendes': 'float64',
+}
+
+
+def export_format(path, requested=None):
+    """Format d'export : demandé, sinon déduit de l'extension (csv par défaut, et sur stdout)"""
+    if requested:
+        return requested
+    return 'parquet' if os.path.splitext(path)[1].lower() in ('.parquet', '.pq') else 'csv'
+
+
+class _Sink:
+    """
+    Écriture au fil de l'eau d'une table (CSV ou Parquet) avec un tampon borné
+
+    Args:
+        path: fichier de sortie, ou '-' pour la sortie standard
+        output_format: 'csv' ou 'parquet'
+        columns: {colonne: dtype pandas} (schéma fixe, identique pour tous les tickers)
+    """
+
+    def __init__(self, path, output_format, columns):
+        self.path = path
+        self.format = output_format
+        self.columns = columns
+        self.buffer = []
+        self.buffered = 0
+        self.rows = 0
+        self.header = True
+        self.writer = None
+        self.owned = path != '-'
+        if output_format == 'parquet':
+            self.stream = open(path, 'wb') if self.owned else sys.stdout.buffer
+        else:
+            self.stream = open(path, 'w', encoding='utf-8', newline='') if self.owned else sys.stdout
+
+    def write(self, frame):
+        if frame is None or frame.empty:
+            return
+        self.buffer.append(frame)
+        self.buffered += len(frame)
+        if self.buffered >= BUFFER_ROWS:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        frame = pd.concat(self.buffer, ignore_index=True) if len(self.buffer) > 1 else self.buffer[0]
+        frame = frame.reindex(columns=list(self.columns)).astype(self.columns)
+        self.buffer = []
+        self.buffered = 0
+        if self.format == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self.writer is None:
+                self.writer = pq.ParquetWriter(self.stream, table.schema, compression='zstd')
+            self.writer.write_table(table)
+        else:
+            frame.to_csv(self.stream, header=self.header, index=False, date_format='%Y-%m-%d')
+            self.stream.flush()
+        self.header = False
+        self.rows += len(frame)
+
+    def close(self):
+        self.flush()
+        if self.writer is not None:
+            self.writer.close()
+        elif self.format == 'csv' and self.header:
+            # Aucun ticker exporté : fichier avec l'en-tête seul
+            pd.DataFrame(columns=list(self.columns)).to_csv(self.stream, index=False)
+        if self.owned:
+            self.stream.close()
+        else:
+            self.stream.flush()
+
+
+def history_frame(symbol, hist):
+    """
+    Historique exporté d'un ticker
+
+    Le cours de clôture brut et les dividendes donnent l'indice de rendement total
+    (dividendes réinvestis à la clôture du jour de détachement, base 100).
+
+    Args:
+        symbol: symbole du ticker
+        hist: historique yfinance (auto_adjust=False)
+
+    Returns:
+        DataFrame aux colonnes HISTORY_COLUMNS
+    """
+    close = hist['Close'].to_numpy(dtype=float)
+    dividends = hist['Dividends'].to_numpy(dtype=float) if 'Dividends' in hist else np.zeros(len(hist))
+    growth = np.ones(len(hist))
+    growth[1:] = (close[1:] + dividends[1:]) / close[:-1]
+    dates = hist.index.tz_localize(None) if getattr(hist.index, 'tz', None) is not None else hist.index
+
+    def column(name):
+        return hist[name].to_numpy(dtype=float) if name in hist else np.full(len(hist), np.nan)
+
+    return pd.DataFrame({
+        'ticker': symbol,
+        'date': dates,
+        'open': column('Open'),
+        'high': column('High'),
+        'low': column('Low'),
+        'close': close,
+        'adj_close': column('Adj Close') if 'Adj Close' in hist else close,
+        'volume': column('Volume'),
+        'dividend': dividends,
+        'total_return_index': 100 * np.cumprod(np.nan_to_num(growth, nan=1.0)),
+    })
+
+
+def _iso_date(date_fr):
+    """dd/mm/YYYY (fiches, --rendement) -> YYYY-MM-DD, comme l'historique exporté"""
+    if not date_fr:
+        return None
+    return datetime.strptime(date_fr, '%d/%m/%Y').strftime('%Y-%m-%d')
+
+
+def metrics_frame(symbol, fund, hist, period):
+    """
+    Indicateurs exportés d'un ticker (mêmes calculs que --rendement et les fiches Obsidian)
+
+    Returns:
+        DataFrame d'une ligne aux colonnes METRIC_COLUMNS, ou None si l'historique est insuffisant
+    """
+    # Clôtures ajustées, comme l'historique utilisé par le reste de l'outil
+    adjusted = hist[['Adj Close']].rename(columns={'Adj Close': 'Close'}) if 'Adj Close' in hist else hist[['Close']]
+    rendement_data, _ = compute_performance_and_stats(fund, adjusted, period=period if ':' not in period else 'max')
+    if not rendement_data:
+        return None
+    row = {column: rendement_data.get(column) for column in METRIC_COLUMNS}
+    row.update({
+        'ticker': symbol,
+        'period': period,
+        'date_debut': _iso_date(rendement_data.get('periode_debut')),
+        'date_fin': _iso_date(rendement_data.get('periode_fin')),
+        'nb_seances': len(hist),
+        'total_dividendes': float(hist['Dividends'].sum()) if 'Dividends' in hist else 0.0,
+    })
+    return pd.DataFrame([row])
+
+
+def load_ticker(symbol, period, with_history=True, with_metrics=True):
+    """
+    Récupère et met en forme les données exportées d'un ticker (exécuté en arrière-plan)
+
+    Returns:
+        tuple (historique, indicateurs) : DataFrames ou None
+
+    Raises:
+        ValueError: aucun historique sur la période
+    """
+    with span("export.ticker", ticker=symbol):
+        fund = yf.Ticker(symbol)
+        try:
+            hist = get_history(fund, full=True, auto_adjust=False, actions=True, **period_arguments(period))
+            if hist is None or hist.empty:
+                raise ValueError("aucun historique sur la période")
+            history = history_frame(symbol, hist) if with_history else None
+            metrics = metrics_frame(symbol, fund, hist, period) if with_metrics else None
+            return history, metrics
+        finally:
+            release(symbol)
+
+
+def run_export(symbols, period='max', history_path=None, metrics_path=None, output_format=None):
+    """
+    Exporte historiques et/ou indicateurs d'une liste de tickers
+
+    Les tickers sont récupérés LOOKAHEAD à la fois et écrits dans l'ordre, puis libérés :
+    la mémoire utilisée ne dépend pas du nombre de tickers.
+
+    Args:
+        symbols: tickers à exporter
+        period: période yfinance ou YYYY-MM-DD:YYYY-MM-DD
+        history_path: fichier de l'historique ('-' : sortie standard), None pour ne pas l'exporter
+        metrics_path: fichier des indicateurs ('-' : sortie standard), None pour ne pas les exporter
+        output_format: 'csv' ou 'parquet' (défaut : d'après l'extension)
+
+    Returns:
+        int: 0 si tous les tickers ont été exportés, 1 sinon
+    """
+    start = time.perf_counter()
+    sinks = {}
+    if history_path:
+        sinks['history'] = _Sink(history_path, export_format(history_path, output_format), HISTORY_COLUMNS)
+    if metrics_path:
+        sinks['metrics'] = _Sink(metrics_path, export_format(metrics_path, output_format), METRIC_COLUMNS)
+
+    # Progression sur stderr quand une table est écrite sur la sortie standard
+    console = sys.stderr if '-' in (history_path, metrics_path) else sys.stdout
+    failures = 0
+    pending = deque()
+    queue = deque(symbols)
+    try:
+        while queue or pending:
+            while queue and len(pending) < LOOKAHEAD:
+                symbol = queue.popleft()
+                task = lambda s=symbol: load_ticker(s, period, 'history' in sinks, 'metrics' in sinks)
+                pending.append((symbol, prefetch({symbol: task})[symbol]))
+            symbol, future = pending.popleft()
+            done = len(symbols) - len(queue) - len(pending)
+            try:
+                history, metrics = future.result()
+            except Exception as e:
+                failures += 1
+                record_failure('export', symbol)
+                print(f"  {Fore.RED}✗{Style.RESET_ALL} [{done}/{len(symbols)}] {symbol} : {e}", file=console)
+                log_warning(f"Export: {symbol} ignoré : {e}")
+                continue
+            if 'history' in sinks:
+                sinks['history'].write(history)
+            if 'metrics' in sinks:
+                sinks['metrics'].write(metrics)
+            print(f"  {Fore.GREEN}✓{Style.RESET_ALL} [{done}/{len(symbols)}] {symbol}"
+                  + (f" ({len(history)} séances)" if history is not None else ""), file=console)
+            if is_debug_enabled(): log_debug("export: %s écrit", symbol)
+    finally:
+        for future in (f for _, f in pending):
+            future.cancel()
+        for sink in sinks.values():
+            sink.close()
+
+    elapsed = time.perf_counter() - start
+    summary = ", ".join(f"{name} : {sink.rows} lignes → {sink.path if sink.path != '-' else 'stdout'}"
+                        for name, sink in sinks.items())
+    print(f"{Fore.WHITE}✓ Export terminé en {elapsed:.1f} s - {summary}"
+          + (f", {failures} échec(s)" if failures else "") + Style.RESET_ALL, file=console)
+    log_info(f"Export: {len(symbols)} tickers, {failures} échecs, {elapsed:.1f} s ({summary})")
+    return 1 if failures else 0
@@ -0,0 +1,145 @@
+#!/usr/bin/python3
+# etf_format.py - Formatage des nombres au format français (CLI et Markdown)
+
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+
+# Spécification d'un format : motif (sans groupement), groupement des milliers, suffixe, facteur
+FormatSpec = namedtuple('FormatSpec', ['pattern', 'grouping', 'suffix', 'scale'])
+
+# Formats disponibles (compilés une seule fois au chargement du module)
+FORMATS = {
+    'nombre': FormatSpec('.2f', True, '', 1),       # 1 234,56
+    'entier': FormatSpec('.0f', True, '', 1),       # 1 234 567
+    'ratio': FormatSpec('.2f', False, '', 1),       # 1,23
+    'dividende': FormatSpec('.4f', False, '', 1),   # 0,1234
+    'pct': FormatSpec('.2f', False, '%', 1),        # 12,34%
+    'pct1': FormatSpec('.1f', False, '%', 1),       # 12,3%
+    'pct_signe': FormatSpec('+.2f', False, '%', 1), # +12,34%
+    'taux': FormatSpec('.2f', False, '%', 100),     # 0.0022 -> 0,22%
+}
+
+# Conversion en une passe : séparateur de milliers -> espace, point décimal -> virgule
+_FR_TABLE = str.maketrans({',': ' ', '.': ','})
+
+# Insertion des séparateurs de milliers dans la partie entière
+_GROUPING_REGEX = r'(?<=\d)(?=(?:\d{3})+(?!\d))'
+
+def _compile(spec):
+    """Construit la fonction de formatage scalaire associée à une spécification"""
+    pattern = spec.pattern.replace('.', ',.', 1) if spec.grouping else spec.pattern
+    python_format = '{:' + pattern + '}' + spec.suffix
+    scale = spec.scale
+
+    def formatter(value):
+        return python_format.format(value * scale).translate(_FR_TABLE)
+    return formatter
+
+_COMPILED = {kind: _compile(spec) for kind, spec in FORMATS.items()}
+
+def to_fr(text):
+    """Convertit un nombre déjà formaté à l'anglo-saxonne ('1,234.56') au format français"""
+    return text.translate(_FR_TABLE)
+
+def _is_missing(value):
+    """True si la valeur est absente (None, 'N/A', NaN ou non numérique)"""
+    if value is None or isinstance(value, str):
+        return True
+    try:
+        return bool(np.isnan(value))
+    except TypeError:
+        return True
+
+def fmt(value, kind='nombre', na='N/A'):
+    """
+    Formate une valeur scalaire au format français
+
+    Args:
+        value: nombre à formater
+        kind: nom du format (voir FORMATS)
+        na: texte retourné si la valeur est absente
+
+    Returns:
+        str: valeur formatée
+    """
+    if _is_missing(value):
+        return na
+    return _COMPILED[kind](value)
+
+def fmt_column(values, kind='nombre', na='N/A'):
+    """
+    Formate une colonne entière en une seule passe vectorisée
+
+    Args:
+        values: pandas.Series (ou séquence) de nombres
+        kind: nom du format (voir FORMATS)
+        na: texte utilisé pour les valeurs absentes
+
+    Returns:
+        pandas.Series de chaînes, même index que l'entrée
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    spec = FORMATS[kind]
+    numeric = pd.to_numeric(series, errors='coerce').astype('float64')
+    mask = numeric.notna().to_numpy()
+
+    result = np.full(len(numeric), na, dtype=object)
+    if mask.any():
+        formatted = np.char.mod('%' + spec.pattern, numeric.to_numpy()[mask] * spec.scale)
+        if spec.grouping:
+            formatted = pd.Series(formatted).str.replace(_GROUPING_REGEX, ',', regex=True).to_numpy(dtype=str)
+        formatted = np.char.translate(formatted, _FR_TABLE)
+        if spec.suffix:
+            formatted = np.char.add(formatted, spec.suffix)
+        result[mask] = formatted
+    return pd.Series(result, index=series.index)
+
+def _escape_cell(text):
+    """Échappe les caractères qui casseraient une cellule de tableau Markdown"""
+    return str(text).replace('|', '\\|').replace('\n', ' ')
+
+def dataframe_to_markdown(df, formats=None, default_kind='pct', index=True, index_label=''):
+    """
+    Convertit un DataFrame en tableau Markdown avec colonnes numériques formatées
+
+    Args:
+        df: pandas.DataFrame à convertir
+        formats: dict {colonne: format} (optionnel)
+        default_kind: format appliqué aux autres colonnes numériques
+        index: inclure l'index comme première colonne
+        index_label: en-tête de la colonne d'index
+
+    Returns:
+        str: tableau Markdown (une ligne par ligne du DataFrame)
+    """
+    formats = formats or {}
+    columns = []
+    headers = []
+    aligns = []
+
+    if index:
+        columns.append(pd.Series(df.index.map(_escape_cell), index=df.index))
+        headers.append(index_label)
+        aligns.append(':---')
+
+    for col in df.columns:
+        series = df[col]
+        kind = formats.get(col)
+        if kind is None and pd.api.types.is_numeric_dtype(series):
+            kind = default_kind
+        if kind is not None:
+            columns.append(fmt_column(series, kind))
+            aligns.append('---:')
+        else:
+            columns.append(series.map(_escape_cell))
+            aligns.append(':---')
+        headers.append(_escape_cell(col))
+
+    lines = ['| ' + ' | '.join(headers) + ' |', '| ' + ' | '.join(aligns) + ' |']
+    if len(df):
+        body = columns[0].astype(str)
+        for column in columns[1:]:
+            body = body + ' | ' + column.astype(str)
+        lines.extend(('| ' + body + ' |').tolist())
+    return '\n'.join(lines)
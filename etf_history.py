@@ -0,0 +1,153 @@
+#!/usr/bin/python3
+# etf_history.py - Historique des indicateurs par ETF (stockage Parquet en ajout seul)
+
+import os
+import glob
+import time
+from datetime import datetime
+from etf_utils import get_data_dir
+from etf_logging import log_debug, log_info, log_warning, is_debug_enabled
+
+# Colonnes numériques enregistrées à chaque exécution (schéma fixe)
+HISTORY_FIELDS = [
+    # rendement_data
+    'rendement_simple', 'rendement_total', 'volatilite', 'max_drawdown',
+    'sharpe', 'sortino', 'calmar', 'ytd',
+    # stats_data
+    'prix_min', 'prix_max', 'prix_moyen', 'amplitude', 'taux_reussite',
+    'meilleur_jour', 'pire_jour',
+    # info
+    'prix', 'aum', 'ter', 'yield', 'volume',
+]
+
+# Nombre de fichiers d'ajout au-delà duquel ils sont fusionnés en un seul
+COMPACT_THRESHOLD = 64
+
+def _schema():
+    """Schéma Arrow de l'historique (timestamp + colonnes float64)"""
+    import pyarrow as pa
+    return pa.schema(
+        [('timestamp', pa.timestamp('s'))] + [(name, pa.float64()) for name in HISTORY_FIELDS]
+    )
+
+def _to_float(value):
+    """Convertit une valeur en float, None si absente ou non numérique"""
+    if value is None or isinstance(value, str):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def build_snapshot(rendement_data, stats_data, info, ytd_rendement=None):
+    """
+    Construit une ligne d'historique à partir des données calculées
+
+    Args:
+        rendement_data: dict de compute_performance_and_stats
+        stats_data: dict de compute_performance_and_stats
+        info: dictionnaire des informations du ticker
+        ytd_rendement: rendement YTD (optionnel)
+
+    Returns:
+        dict {colonne: valeur}
+    """
+    rendement_data = rendement_data or {}
+    stats_data = stats_data or {}
+    row = {'timestamp': datetime.now().replace(microsecond=0)}
+    for name in HISTORY_FIELDS:
+        row[name] = _to_float(rendement_data.get(name, stats_data.get(name)))
+    row['ytd'] = _to_float(ytd_rendement)
+    row['prix'] = _to_float(info.get('currentPrice', info.get('regularMarketPrice')))
+    row['aum'] = _to_float(info.get('totalAssets'))
+    row['ter'] = _to_float(info.get('annualReportExpenseRatio', info.get('expenseRatio')))
+    row['yield'] = _to_float(info.get('yield', info.get('trailingAnnualDividendYield')))
+    row['volume'] = _to_float(info.get('volume', info.get('regularMarketVolume')))
+    return row
+
+def _history_dir(symbol):
+    """Répertoire de l'historique d'un ETF"""
+    return get_data_dir("history", symbol)
+
+def append_snapshot(symbol, row):
+    """
+    Ajoute une ligne à l'historique de l'ETF (un petit fichier Parquet par ajout)
+
+    L'ajout ne relit ni ne réécrit les données existantes. Les fichiers sont
+    fusionnés de temps en temps (COMPACT_THRESHOLD) pour garder des lectures rapides.
+
+    Args:
+        symbol: symbole du ticker
+        row: dict produit par build_snapshot
+
+    Returns:
+        bool: True si la ligne a été enregistrée
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        log_warning("append_snapshot: pyarrow absent, historique non enregistré")
+        return False
+
+    directory = _history_dir(symbol)
+    table = pa.Table.from_pylist([row], schema=_schema())
+    part_path = os.path.join(directory, f"part-{time.time_ns()}.parquet")
+    pq.write_table(table, part_path)
+    if is_debug_enabled(): log_debug(f"append_snapshot: {symbol} -> {part_path}")
+
+    parts = glob.glob(os.path.join(directory, "part-*.parquet"))
+    if len(parts) >= COMPACT_THRESHOLD:
+        compact_history(symbol)
+    return True
+
+def compact_history(symbol):
+    """
+    Fusionne tous les fichiers de l'historique d'un ETF en un seul fichier Parquet
+
+    Args:
+        symbol: symbole du ticker
+    """
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    directory = _history_dir(symbol)
+    files = sorted(glob.glob(os.path.join(directory, "*.parquet")))
+    if len(files) <= 1:
+        return
+    table = ds.dataset(files, schema=_schema(), format="parquet").to_table().sort_by('timestamp')
+
+    # Écriture atomique : fichier temporaire puis renommage, avant suppression des anciens fichiers
+    compacted = os.path.join(directory, f"base-{time.time_ns()}.parquet")
+    tmp_path = compacted + ".tmp"
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, compacted)
+    for path in files:
+        os.remove(path)
+    if is_debug_enabled(): log_info(f"compact_history: {symbol}, {len(files)} fichiers fusionnés ({table.num_rows} lignes)")
+
+def load_history(symbol, columns=None):
+    """
+    Lit l'historique d'un ETF en ne chargeant que les colonnes demandées
+
+    Args:
+        symbol: symbole du ticker
+        columns: liste de colonnes (timestamp toujours inclus), None = toutes
+
+    Returns:
+        pandas.DataFrame indexé par timestamp (vide si aucun historique)
+    """
+    import pandas as pd
+    try:
+        import pyarrow.dataset as ds
+    except ImportError:
+        return pd.DataFrame()
+
+    # base-* (fusionné) avant part-* (ajouts), eux-mêmes dans l'ordre chronologique
+    files = sorted(glob.glob(os.path.join(_history_dir(symbol), "*.parquet")))
+    if not files:
+        return pd.DataFrame()
+    if columns is not None:
+        columns = ['timestamp'] + [c for c in columns if c != 'timestamp']
+    table = ds.dataset(files, schema=_schema(), format="parquet").to_table(columns=columns)
+    return table.to_pandas().sort_values('timestamp', kind='stable').set_index('timestamp')
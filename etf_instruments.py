@@ -0,0 +1,202 @@
+#!/usr/bin/python3
+# etf_instruments.py - Table locale des cotations : ISIN <-> symbole Yahoo <-> place <-> devise
+
+import re
+import csv
+import sqlite3
+from datetime import datetime
+from colorama import Fore, Style
+from etf_db import connect
+from etf_search import SCHEMA as SEARCH_SCHEMA, index_symbols
+from etf_logging import log_info, log_warning, log_debug, is_debug_enabled
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS instruments (
+    symbol TEXT PRIMARY KEY,
+    isin TEXT,
+    name TEXT,
+    exchange TEXT,
+    currency TEXT,
+    quote_type TEXT,
+    source TEXT,
+    updated_at TEXT
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_instruments_isin ON instruments(isin);
+""" + SEARCH_SCHEMA
+
+ISIN_PATTERN = re.compile(r'^[A-Z]{2}[A-Z0-9]{9}\d$')
+
+# Colonnes acceptées dans les fichiers CSV importés (en minuscules)
+_CSV_COLUMNS = {
+    "isin": "isin",
+    "symbol": "symbol", "symbole": "symbol", "ticker": "symbol",
+    "name": "name", "nom": "name",
+    "exchange": "exchange", "place": "exchange",
+    "currency": "currency", "devise": "currency",
+}
+
+# Un champ vide ne remplace pas une valeur connue (ex: ISIN saisi dans une fiche puis info Yahoo sans ISIN)
+_UPSERT = """
+INSERT INTO instruments (symbol, isin, name, exchange, currency, quote_type, source, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(symbol) DO UPDATE SET
+    isin = COALESCE(excluded.isin, isin),
+    name = COALESCE(excluded.name, name),
+    exchange = COALESCE(excluded.exchange, exchange),
+    currency = COALESCE(excluded.currency, currency),
+    quote_type = COALESCE(excluded.quote_type, quote_type),
+    source = excluded.source,
+    updated_at = excluded.updated_at
+"""
+
+
+def is_isin(text):
+    """
+    Vérifie qu'un texte est un ISIN (format et clé de contrôle)
+
+    Args:
+        text: texte saisi (ex: IE00BK5BQT80)
+
+    Returns:
+        bool
+    """
+    if not text or not ISIN_PATTERN.match(text):
+        return False
+    # Clé de Luhn sur les chiffres obtenus en remplaçant chaque lettre par son rang (A=10 ... Z=35)
+    digits = "".join(str(int(c, 36)) for c in text)
+    total = 0
+    for i, d in enumerate(reversed(digits)):
+        n = int(d) * (2 if i % 2 else 1)
+        total += n - 9 if n > 9 else n
+    return total % 10 == 0
+
+
+def _clean(value):
+    value = (value or "").strip() if isinstance(value, str) else value
+    return value or None
+
+
+def _row(symbol, isin=None, name=None, exchange=None, currency=None, quote_type=None, source="yahoo"):
+    isin = _clean(isin)
+    isin = isin.upper() if isin else None
+    if isin and not is_isin(isin):
+        if is_debug_enabled(): log_debug("instruments: ISIN ignoré pour %s : %s", symbol, isin)
+        isin = None
+    return (symbol.strip().upper(), isin, _clean(name), _clean(exchange), _clean(currency),
+            _clean(quote_type), source, datetime.now().isoformat(timespec='seconds'))
+
+
+def record_instrument(info, isin=None, source="yahoo"):
+    """
+    Enregistre la cotation décrite par un info Yahoo (appelé à chaque info récupéré)
+
+    N'interrompt jamais l'appelant : une base indisponible est seulement journalisée.
+
+    Args:
+        info: dictionnaire des informations du ticker
+        isin: ISIN connu par ailleurs (fiche Obsidian, surcharge), prioritaire sur info
+        source: origine de l'enregistrement (yahoo, obsidian, csv)
+    """
+    symbol = (info or {}).get('symbol')
+    if not symbol:
+        return
+    try:
+        row = _row(symbol, isin or info.get('isin'), info.get('longName', info.get('shortName')),
+                   info.get('exchange'), info.get('currency'), info.get('quoteType'), source)
+        with connect(SCHEMA) as conn:
+            conn.execute(_UPSERT, row)
+            index_symbols(conn, [row[0]])
+    except sqlite3.Error as e:
+        log_warning(f"Instruments: enregistrement de {symbol} impossible : {e}")
+
+
+def listings(isin):
+    """
+    Cotations connues d'un ISIN (recherche indexée, sans réseau)
+
+    Returns:
+        list de dicts {symbol, isin, name, exchange, currency, quote_type, source, updated_at}
+    """
+    rows = connect(SCHEMA).execute(
+        "SELECT * FROM instruments WHERE isin = ? ORDER BY currency, symbol", (isin.upper(),)
+    )
+    return [dict(row) for row in rows]
+
+
+def lookup_symbol(symbol):
+    """Cotation enregistrée pour un symbole Yahoo (None si inconnue)"""
+    row = connect(SCHEMA).execute("SELECT * FROM instruments WHERE symbol = ?", (symbol.upper(),)).fetchone()
+    return dict(row) if row else None
+
+
+def import_csv(path):
+    """
+    Importe des cotations depuis un fichier CSV (une ligne par cotation)
+
+    Colonnes reconnues : isin, symbol (ou ticker), name, exchange, currency ;
+    séparateur virgule ou point-virgule. Les lignes sans symbole sont ignorées.
+
+    Args:
+        path: chemin du fichier CSV
+
+    Returns:
+        int: nombre de cotations importées
+
+    Raises:
+        ValueError: colonne 'symbol' absente
+    """
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        sample = f.read(4096)
+        f.seek(0)
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t") if sample else csv.excel
+        reader = csv.DictReader(f, dialect=dialect)
+        columns = {c: _CSV_COLUMNS[c.strip().lower()] for c in (reader.fieldnames or []) if c and c.strip().lower() in _CSV_COLUMNS}
+        if "symbol" not in columns.values():
+            raise ValueError("colonne 'symbol' absente du fichier CSV")
+        rows = []
+        invalid = 0
+        for record in reader:
+            fields = {key: record.get(column) for column, key in columns.items()}
+            symbol = _clean(fields.pop("symbol"))
+            if not symbol:
+                continue
+            row = _row(symbol, source="csv", **fields)
+            if fields.get("isin") and row[1] is None:
+                invalid += 1
+            rows.append(row)
+
+    with connect(SCHEMA) as conn:
+        conn.executemany(_UPSERT, rows)
+        index_symbols(conn, {row[0] for row in rows})
+    if invalid:
+        print(f"{Fore.YELLOW}Attention: {invalid} ISIN invalide(s) ignoré(s) dans {path}{Style.RESET_ALL}")
+    log_info(f"Instruments: {len(rows)} cotations importées depuis {path}")
+    return len(rows)
+
+
+def import_file(path):
+    """
+    Option --import-instruments
+
+    Returns:
+        int: code de sortie
+    """
+    try:
+        count = import_csv(path)
+    except (OSError, ValueError, csv.Error, sqlite3.Error) as e:
+        print(f"{Fore.RED}Import impossible : {e}{Style.RESET_ALL}")
+        log_warning(f"Instruments: import de {path} impossible : {e}")
+        return 1
+    print(f"{Fore.GREEN}✓ {count} cotation(s) importée(s) dans la table des instruments{Style.RESET_ALL}")
+    return 0
+
+
+def print_listings(isin, rows):
+    """Affiche les cotations d'un ISIN"""
+    if not rows:
+        print(f"{Fore.YELLOW}ISIN {isin} inconnu de la base locale "
+              f"(consulter une cotation de cet ETF ou --import-instruments FICHIER.csv).{Style.RESET_ALL}")
+        return
+    print(f"\n{Style.BRIGHT}{Fore.CYAN}{isin} - {rows[0]['name'] or ''}{Style.RESET_ALL}")
+    for row in rows:
+        print(f"  {row['symbol']:<12} {row['exchange'] or 'N/A':<8} {row['currency'] or 'N/A':<5} {row['name'] or ''}")
@@ -0,0 +1,333 @@
+#!/usr/bin/python3
+# etf_live.py - Cours en temps réel (flux websocket Yahoo) et indicateurs intrajournaliers (--live)
+
+import os
+import sys
+import json
+import time
+import base64
+from datetime import datetime
+import numpy as np
+from colorama import Fore, Style
+from websockets.sync.client import connect
+from websockets.exceptions import WebSocketException
+from yfinance.pricing_pb2 import PricingData
+from etf_results import LiveQuote, to_float
+from etf_format import fmt
+from etf_metrics import record_failure
+from etf_logging import log_info, log_warning, log_debug, is_debug_enabled
+
+# Flux Yahoo ; la variable d'environnement ETFINFO_LIVE_URL permet de le remplacer
+# (ex: serveur local rejouant des ticks enregistrés)
+LIVE_URL = "wss://streamer.finance.yahoo.com/?version=2"
+
+# Ticks conservés par ticker (tampon circulaire : mémoire fixe quelle que soit la durée)
+RING_SIZE = 4096
+
+# Ticks de la fenêtre glissante de volatilité
+VOL_WINDOW = 256
+
+# Intervalle minimum entre deux affichages (secondes)
+REFRESH_SECONDS = 2.0
+
+# Réabonnement périodique (le serveur oublie les abonnements inactifs)
+HEARTBEAT_SECONDS = 15.0
+
+# Attente maximale avant une nouvelle connexion après une coupure (secondes)
+RECONNECT_MAX = 30.0
+
+
+def live_url():
+    """URL du flux (ETFINFO_LIVE_URL, sinon Yahoo)"""
+    return os.environ.get("ETFINFO_LIVE_URL") or LIVE_URL
+
+
+class TickRing:
+    """
+    Derniers ticks d'un ticker dans des tableaux NumPy de taille fixe
+
+    Args:
+        capacity: nombre de ticks conservés
+    """
+
+    def __init__(self, capacity=RING_SIZE):
+        self.capacity = capacity
+        self.times = np.zeros(capacity, dtype=np.int64)
+        self.prices = np.zeros(capacity)
+        self.volumes = np.zeros(capacity)
+        # Carré du rendement logarithmique depuis le tick précédent
+        self.squared = np.zeros(capacity)
+        self.head = 0
+        self.count = 0
+
+    def append(self, timestamp, price, volume, squared):
+        """Ajoute un tick (écrase le plus ancien quand le tampon est plein)"""
+        i = self.head
+        self.times[i] = timestamp
+        self.prices[i] = price
+        self.volumes[i] = volume
+        self.squared[i] = squared
+        self.head = (i + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def last(self, n=None):
+        """Indices des n derniers ticks, du plus ancien au plus récent"""
+        n = self.count if n is None else min(n, self.count)
+        return (np.arange(self.head - n, self.head)) % self.capacity
+
+
+class LiveSeries:
+    """
+    Indicateurs intrajournaliers d'un ticker, mis à jour à chaque tick en temps constant
+
+    Variation du jour (par rapport à la clôture précédente), VWAP de la séance,
+    volatilité réalisée de la séance (annualisée, comme --rendement) et sur les
+    VOL_WINDOW derniers ticks.
+    """
+
+    def __init__(self, symbol, capacity=RING_SIZE, window=VOL_WINDOW):
+        self.symbol = symbol
+        self.ring = TickRing(capacity)
+        self.window = min(window, capacity)
+        self.last_time = None
+        self.window_squared = 0.0
+        self.ticks = 0
+        self.previous_close = None
+        self.new_session()
+
+    def new_session(self):
+        """Remet à zéro les cumuls de la séance (VWAP, variation, volatilité réalisée)"""
+        self.reference = None
+        self.last_price = None
+        self.day_volume = None
+        self.price_volume = 0.0
+        self.volume = 0.0
+        self.session_squared = 0.0
+        self.session_ticks = 0
+
+    def update(self, timestamp, price, day_volume=None, last_size=None, previous_close=None):
+        """
+        Ajoute un tick
+
+        Args:
+            timestamp: horodatage (ms)
+            price: cours
+            day_volume: volume cumulé de la séance (si fourni par la place)
+            last_size: volume de la dernière transaction
+            previous_close: clôture précédente
+        """
+        if not price or price <= 0:
+            return
+        # Nouvelle séance : la clôture précédente change, ou le volume cumulé de la séance
+        # repart de zéro (le flux ne donne pas le fuseau de la place, la date locale ne suffit pas)
+        if ((previous_close and self.previous_close and previous_close != self.previous_close)
+                or (day_volume and self.day_volume is not None and day_volume < self.day_volume)):
+            self.new_session()
+            # Volume cumulé depuis l'ouverture : entièrement échangé pendant cette séance
+            self.day_volume = 0
+        if previous_close:
+            self.previous_close = previous_close
+            self.reference = previous_close
+        elif self.reference is None:
+            self.reference = price
+
+        # Volume du tick : écart du volume cumulé de la séance, sinon taille de la transaction
+        volume = 0.0
+        if day_volume:
+            if self.day_volume is not None:
+                volume = day_volume - self.day_volume
+            self.day_volume = day_volume
+        elif last_size:
+            volume = float(last_size)
+        self.price_volume += price * volume
+        self.volume += volume
+
+        # Premier tick de la séance : l'écart avec la veille n'entre pas dans la volatilité
+        squared = 0.0
+        if self.last_price is not None:
+            r = np.log(price / self.last_price)
+            squared = r * r
+        self.session_squared += squared
+        ring = self.ring
+        if ring.count >= self.window:
+            # Le plus ancien tick de la fenêtre en sort
+            self.window_squared -= ring.squared[(ring.head - self.window) % ring.capacity]
+        ring.append(timestamp, price, volume, squared)
+        self.window_squared += squared
+        if (self.ticks + 1) % self.window == 0:
+            # Somme recalculée une fois par fenêtre : pas de dérive des arrondis
+            self.window_squared = float(ring.squared[ring.last(self.window)].sum())
+        self.last_price = price
+        self.last_time = timestamp
+        self.ticks += 1
+        self.session_ticks += 1
+
+    def snapshot(self):
+        """Indicateurs courants (LiveQuote)"""
+        return LiveQuote(
+            ticker=self.symbol,
+            heure=datetime.fromtimestamp(self.last_time / 1000).strftime('%H:%M:%S') if self.last_time else '',
+            cours=to_float(self.last_price),
+            nb_ticks=self.ticks,
+            variation_jour=to_float((self.last_price / self.reference - 1) * 100) if self.reference else None,
+            vwap=to_float(self.price_volume / self.volume) if self.volume > 0 else None,
+            volume=to_float(self.volume) if self.volume > 0 else None,
+            volatilite_realisee=to_float(np.sqrt(self.session_squared * 252) * 100) if self.session_ticks > 1 else None,
+            volatilite_fenetre=to_float(np.sqrt(max(self.window_squared, 0.0)) * 100) if self.ticks > 1 else None,
+        )
+
+
+def decode(raw):
+    """
+    Décode un message du flux ({"message": base64 protobuf})
+
+    Returns:
+        PricingData, ou None si le message n'est pas une cotation
+    """
+    try:
+        encoded = json.loads(raw).get("message")
+        if not encoded:
+            return None
+        data = PricingData()
+        data.ParseFromString(base64.b64decode(encoded))
+        return data
+    except Exception as e:
+        if is_debug_enabled(): log_debug("live: message ignoré : %s", e)
+        return None
+
+
+class LiveBoard:
+    """Affichage périodique des indicateurs (texte, ou une ligne NDJSON par ticker)"""
+
+    def __init__(self, series, writer=None):
+        self.series = series
+        self.writer = writer
+        self.lines = 0
+        self.last_refresh = 0.0
+        self.dirty = False
+        self.tty = writer is None and sys.stdout.isatty()
+
+    def refresh(self, force=False):
+        now = time.monotonic()
+        if not self.dirty or (not force and now - self.last_refresh < REFRESH_SECONDS):
+            return
+        self.last_refresh = now
+        self.dirty = False
+        snapshots = [s.snapshot() for s in self.series.values() if s.ticks]
+        if self.writer is not None:
+            for quote in snapshots:
+                self.writer.write(quote)
+            return
+
+        lines = [
+            f"{Style.BRIGHT}{Fore.CYAN}⚡ {datetime.now().strftime('%H:%M:%S')} - "
+            f"{sum(s.ticks for s in self.series.values())} ticks{Style.RESET_ALL}",
+            f"{Style.BRIGHT}{'Symbole':<10} {'Heure':>8} {'Cours':>10} {'Var. jour':>10} {'VWAP':>10} "
+            f"{'Vol. réal.':>10} {f'Vol. {VOL_WINDOW}t':>10} {'Ticks':>7}{Style.RESET_ALL}",
+        ]
+        for q in snapshots:
+            color = Fore.GREEN if (q.variation_jour or 0) >= 0 else Fore.RED
+            lines.append(f"{q.ticker:<10} {q.heure:>8} {fmt(q.cours):>10} "
+                         f"{color}{fmt(q.variation_jour, 'pct_signe'):>10}{Style.RESET_ALL} {fmt(q.vwap):>10} "
+                         f"{fmt(q.volatilite_realisee, 'pct'):>10} {fmt(q.volatilite_fenetre, 'pct'):>10} {q.nb_ticks:>7}")
+        # Terminal : le tableau précédent est remplacé plutôt que répété
+        if self.tty and self.lines:
+            sys.stdout.write(f"\033[{self.lines}F\033[J")
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
+        self.lines = len(lines)
+
+
+def stream(symbols, on_tick, should_stop, url=None):
+    """
+    Une connexion au flux : abonnement puis réception des ticks jusqu'à should_stop()
+
+    Args:
+        symbols: tickers suivis
+        on_tick: fonction appelée avec chaque PricingData reçu
+        should_stop: fonction sans argument, True pour terminer
+        url: URL du flux (défaut : live_url())
+
+    Raises:
+        OSError, WebSocketException: connexion impossible ou interrompue
+    """
+    subscribe = json.dumps({"subscribe": list(symbols)})
+    with connect(url or live_url(), open_timeout=10, close_timeout=2, max_size=2 ** 20) as ws:
+        ws.send(subscribe)
+        heartbeat = time.monotonic() + HEARTBEAT_SECONDS
+        while not should_stop():
+            try:
+                raw = ws.recv(timeout=0.5)
+            except TimeoutError:
+                raw = None
+            if time.monotonic() >= heartbeat:
+                ws.send(subscribe)
+                heartbeat = time.monotonic() + HEARTBEAT_SECONDS
+            if raw is not None:
+                data = decode(raw)
+                if data is not None:
+                    on_tick(data)
+
+
+def run_live(symbols, output_format="text", duration=None, max_ticks=None, url=None):
+    """
+    Suit les cours en temps réel jusqu'à Ctrl+C (reconnexion automatique après une coupure)
+
+    Args:
+        symbols: tickers suivis
+        output_format: 'text' (tableau rafraîchi) ou 'ndjson' (une ligne par ticker et par rafraîchissement)
+        duration: durée maximale (secondes)
+        max_ticks: nombre maximum de ticks reçus
+        url: URL du flux (défaut : live_url())
+
+    Returns:
+        dict {symbole: LiveSeries}
+    """
+    from etf_results import ResultWriter
+    symbols = [s.upper() for s in symbols]
+    series = {symbol: LiveSeries(symbol) for symbol in symbols}
+    board = LiveBoard(series, ResultWriter(sys.stdout, 'ndjson') if output_format == 'ndjson' else None)
+    deadline = time.monotonic() + duration if duration else None
+    received = 0
+
+    def on_tick(data):
+        nonlocal received
+        target = series.get(data.id.upper())
+        if target is None:
+            return
+        target.update(data.time, data.price, data.day_volume or None, data.last_size or None,
+                      data.previous_close or None)
+        received += 1
+        board.dirty = True
+        board.refresh()
+
+    def should_stop():
+        board.refresh()
+        return ((deadline is not None and time.monotonic() >= deadline)
+                or (max_ticks is not None and received >= max_ticks))
+
+    url = url or live_url()
+    if output_format == 'text':
+        print(f"{Fore.CYAN}📡 Cours en temps réel : {', '.join(symbols)} (Ctrl+C pour arrêter){Style.RESET_ALL}")
+    log_info(f"Live: {len(symbols)} tickers sur {url}")
+    delay = 1.0
+    try:
+        while not should_stop():
+            before = received
+            try:
+                stream(symbols, on_tick, should_stop, url)
+            except (OSError, WebSocketException) as e:
+                record_failure('fetch', symbols[0])
+                if received > before:
+                    delay = 1.0
+                log_warning(f"Live: connexion interrompue ({e}), nouvelle tentative dans {delay:.0f} s")
+                print(f"{Fore.YELLOW}⚠️ Connexion au flux interrompue : {e} - reconnexion dans {delay:.0f} s{Style.RESET_ALL}",
+                      file=sys.stderr)
+                time.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX)
+    except KeyboardInterrupt:
+        if output_format == 'text':
+            print("\nArrêt du suivi en temps réel.")
+    board.refresh(force=True)
+    log_info(f"Live: {received} ticks reçus")
+    return series
@@ -2,21 +2,62 @@
 # etf_logging.py - Système de logging pour etfinfo
 
 import logging
+import logging.handlers
 import os
-import inspect
+import sys
+import queue
+import atexit
+import json
+import threading
+import time
+import functools
+import tracemalloc
 from datetime import datetime
 
 # Variable globale pour savoir si le debug est activé
 _debug_enabled = False
 _logger = None
+_listener = None
+
+# Traçage : activé par --trace (export) ou --debug (durées dans le log)
+_trace_enabled = False
+_trace_events = []
+_trace_lock = threading.Lock()
+_trace_local = threading.local()
+_trace_origin = time.perf_counter()
+
+# Mémoire : pic tracemalloc par span (--memprofile)
+_memory_enabled = False
+_memory_peaks = []
 
 def _origin():
     """
     Retourne le nom du module appelant pour enrichir les logs.
+    Lecture directe de la frame appelante (pas d'inspect.stack(), qui
+    reconstruit toute la pile avec le code source à chaque appel).
+    """
+    return sys._getframe(2).f_globals.get('__name__', 'unknown')
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
     """
-    frame = inspect.stack()[2]
-    module = inspect.getmodule(frame.frame)
-    return module.__name__ if module else "unknown"
+    QueueHandler qui transmet l'enregistrement tel quel : le formatage du message
+    (message % args) et l'écriture disque se font dans le thread du QueueListener.
+    """
+
+    def prepare(self, record):
+        return record
+
+def _stop_listener():
+    """Vide la file, arrête le thread d'écriture des logs et ferme le fichier"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+# Un seul arrêt à la sortie, même si setup_logging est appelé à chaque commande (mode serveur)
+atexit.register(_stop_listener)
 
 def setup_logging(debug=False):
     """
@@ -25,17 +66,20 @@ def setup_logging(debug=False):
     Args:
         debug: Si True, active le mode debug avec logs dans fichier
     """
-    global _debug_enabled, _logger
+    global _debug_enabled, _logger, _listener
     _debug_enabled = debug
     
     if not debug:
-        # Mode normal : pas de logs
+        # Mode normal : pas de logs (fichier d'une commande précédente du serveur fermé)
         logging.disable(logging.CRITICAL)
+        _stop_listener()
         return
     
-    # Mode debug : créer le logger
+    # Mode debug : créer le logger (réactiver si un appel précédent l'avait désactivé)
+    logging.disable(logging.NOTSET)
     _logger = logging.getLogger('etfinfo')
     _logger.setLevel(logging.DEBUG)
+    _logger.propagate = False
     
     # Nom du fichier de log avec date
     log_filename = f"etfinfo-{datetime.now().strftime('%Y%m%d')}.log"
@@ -53,49 +97,243 @@ def setup_logging(debug=False):
         logging.disable(logging.CRITICAL)
         return
     
-    # Format des logs
+    # Format des logs (le module appelant est passé via 'extra')
     formatter = logging.Formatter(
-        "%(asctime)s [%(levelname)s] %(message)s",
+        "%(asctime)s [%(levelname)s] [%(origin)s] %(message)s",
         datefmt="%Y-%m-%d %H:%M:%S"
     )
     file_handler.setFormatter(formatter)
     
+    # Écriture dans un thread dédié : l'appelant ne fait qu'empiler l'enregistrement
+    _stop_listener()
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, file_handler)
+    _listener.start()
+
     # Éviter les doublons de handlers
     _logger.handlers.clear()
-    _logger.addHandler(file_handler)
+    _logger.addHandler(_DeferredQueueHandler(log_queue))
     
     # Message d'initialisation
-    _logger.info("=" * 80)
-    _logger.info("Démarrage d'une nouvelle session etfinfo")
-    _logger.info("=" * 80)
+    session = {'origin': 'etf_logging'}
+    _logger.info("=" * 80, extra=session)
+    _logger.info("Démarrage d'une nouvelle session etfinfo", extra=session)
+    _logger.info("=" * 80, extra=session)
     
     print(f"📝 Mode debug activé - Logs dans : {log_path}")
 
-def log_debug(message):
-    """Log un message de niveau DEBUG"""
+def log_debug(message, *args):
+    """Log un message de niveau DEBUG (args optionnels, formatés à l'écriture : log_debug("x=%s", x))"""
     if _debug_enabled and _logger:
-        _logger.debug(f"[{_origin()}] {message}")
+        _logger.debug(message, *args, extra={'origin': _origin()})
 
-def log_info(message):
+def log_info(message, *args):
     """Log un message de niveau INFO"""
     if _debug_enabled and _logger:
-        _logger.info(f"[{_origin()}] {message}")
+        _logger.info(message, *args, extra={'origin': _origin()})
 
-def log_warning(message):
+def log_warning(message, *args):
     """Log un message de niveau WARNING"""
     if _debug_enabled and _logger:
-        _logger.warning(f"[{_origin()}] {message}")
+        _logger.warning(message, *args, extra={'origin': _origin()})
 
-def log_error(message):
+def log_error(message, *args):
     """Log un message de niveau ERROR"""
     if _debug_enabled and _logger:
-        _logger.error(f"[{_origin()}] {message}")
+        _logger.error(message, *args, extra={'origin': _origin()})
 
-def log_exception(message):
+def log_exception(message, *args):
     """Log une exception avec traceback complet"""
     if _debug_enabled and _logger:
-        _logger.exception(f"[{_origin()}] {message}")
+        _logger.exception(message, *args, extra={'origin': _origin()})
 
 def is_debug_enabled():
     """Retourne True si le mode debug est activé"""
     return _debug_enabled
+
+# --- Traçage par spans ---
+
+class _NullSpan:
+    """Span inactif : aucune mesure, coût quasi nul quand le traçage est désactivé"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        return self
+
+_NULL_SPAN = _NullSpan()
+
+class _SpanAttrs:
+    """Attributs d'un span, convertis en texte seulement à l'écriture du log"""
+
+    __slots__ = ('attrs',)
+
+    def __init__(self, attrs):
+        self.attrs = attrs
+
+    def __str__(self):
+        return ''.join(f" {k}={v}" for k, v in self.attrs.items())
+
+class _Span:
+    """Span actif : mesure la durée d'un bloc et ses attributs (ticker, octets, ...)"""
+
+    __slots__ = ('name', 'attrs', 'start', 'depth', 'ticker', 'mem_start', 'mem_peak')
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        stack = getattr(_trace_local, 'stack', None)
+        if stack is None:
+            stack = _trace_local.stack = []
+        parent = stack[-1] if stack else None
+        self.depth = len(stack)
+        self.ticker = self.attrs.get('ticker') or (parent.ticker if parent else None)
+        stack.append(self)
+        if _memory_enabled and tracemalloc.is_tracing():
+            # Le pic global est remis à zéro à chaque span : le pic atteint jusqu'ici
+            # est d'abord reporté sur le span parent (spans d'un seul thread, voir etf_net.prefetch)
+            current, peak = tracemalloc.get_traced_memory()
+            if parent is not None:
+                parent.mem_peak = max(parent.mem_peak, peak)
+            tracemalloc.reset_peak()
+            self.mem_start = self.mem_peak = current
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        _trace_local.stack.pop()
+        if exc_type is not None:
+            self.attrs['error'] = f"{exc_type.__name__}: {exc}"
+        duration = end - self.start
+        if _memory_enabled and tracemalloc.is_tracing():
+            self.mem_peak = max(self.mem_peak, tracemalloc.get_traced_memory()[1])
+            stack = _trace_local.stack
+            if stack:
+                stack[-1].mem_peak = max(stack[-1].mem_peak, self.mem_peak)
+            tracemalloc.reset_peak()
+            self.attrs['mem_peak_kb'] = (self.mem_peak - self.mem_start) // 1024
+            with _trace_lock:
+                _memory_peaks.append((self.name, self.ticker, self.mem_peak - self.mem_start))
+        if _trace_enabled:
+            event = {
+                'name': self.name,
+                'cat': self.name.split('.', 1)[0],
+                'ph': 'X',
+                'ts': (self.start - _trace_origin) * 1e6,
+                'dur': duration * 1e6,
+                'pid': os.getpid(),
+                'tid': threading.get_ident(),
+                'args': {k: v if isinstance(v, (int, float, str, bool)) or v is None else str(v)
+                         for k, v in self.attrs.items()},
+            }
+            with _trace_lock:
+                _trace_events.append(event)
+        if _debug_enabled and _logger:
+            _logger.debug("%s%s: %.3fs%s", '  ' * self.depth, self.name, duration,
+                          _SpanAttrs(self.attrs), extra={'origin': 'trace'})
+        return False
+
+    def set(self, **attrs):
+        """Ajoute des attributs au span (ex: sp.set(rows=250, bytes=12000))"""
+        self.attrs.update(attrs)
+        return self
+
+def span(name, **attrs):
+    """
+    Mesure un bloc de code (context manager), imbricable
+
+    Exemple :
+        with span("fetch.history", ticker="VWCE.DE") as sp:
+            hist = fund.history(period="1y")
+            sp.set(rows=len(hist))
+
+    Args:
+        name: nom du span ("catégorie.étape")
+        **attrs: attributs associés au span
+
+    Returns:
+        context manager (inactif sans --trace, --debug ni --memprofile)
+    """
+    if not (_trace_enabled or _debug_enabled or _memory_enabled):
+        return _NULL_SPAN
+    return _Span(name, attrs)
+
+def traced(name=None):
+    """
+    Décorateur : mesure chaque appel de la fonction dans un span
+
+    Args:
+        name: nom du span (défaut : module.fonction)
+    """
+    def decorator(func):
+        span_name = name or f"{func.__module__}.{func.__name__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not (_trace_enabled or _debug_enabled or _memory_enabled):
+                return func(*args, **kwargs)
+            with _Span(span_name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def enable_tracing():
+    """Active l'enregistrement des spans pour un export ultérieur"""
+    global _trace_enabled
+    _trace_enabled = True
+
+def reset_tracing():
+    """Désactive et vide les spans enregistrés (trace et mémoire), entre deux commandes d'un même processus"""
+    global _trace_enabled, _memory_enabled
+    with _trace_lock:
+        _trace_enabled = False
+        _memory_enabled = False
+        _trace_events.clear()
+        _memory_peaks.clear()
+
+def enable_memory_tracking():
+    """Active la mesure du pic mémoire de chaque span (tracemalloc doit être démarré)"""
+    global _memory_enabled
+    _memory_enabled = True
+
+def is_memory_tracking_enabled():
+    """Retourne True si --memprofile mesure les spans"""
+    return _memory_enabled
+
+def get_memory_peaks():
+    """
+    Pics mémoire mesurés par span
+
+    Returns:
+        list de tuples (nom du span, ticker ou None, octets au-dessus du niveau d'entrée)
+    """
+    with _trace_lock:
+        return list(_memory_peaks)
+
+def is_tracing_enabled():
+    """Retourne True si l'enregistrement des spans est activé"""
+    return _trace_enabled
+
+def export_trace(path):
+    """
+    Écrit les spans enregistrés au format Chrome trace-event (chrome://tracing, Perfetto)
+
+    Args:
+        path: fichier JSON de destination
+
+    Returns:
+        int: nombre d'événements exportés
+    """
+    with _trace_lock:
+        events = list(_trace_events)
+    events.sort(key=lambda e: e['ts'])
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+    return len(events)
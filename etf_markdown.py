@@ -1,5 +1,9 @@
 # etf_markdown.py — génération du contenu Markdown pour les fiches Obsidian
 
+import pandas as pd
+from etf_format import fmt, dataframe_to_markdown
+from etf_dividends import ANNUAL_ROWS, CAGR_YEARS
+
 def write_header(file, symbol_as_tag, original_creation_date, date_creation):
     """
     Écrit l'en-tête Markdown d'une fiche ETF dans Obsidian.
@@ -36,21 +40,21 @@ def write_financial_section(file, data):
     """
     file.write("## Données financières\n\n")
     if data['currentPrice'] != 'N/A':
-        file.write(f"- **Prix actuel** : {data['currentPrice']:.2f} {data['currency']}\n".replace('.', ','))
+        file.write(f"- **Prix actuel** : {fmt(data['currentPrice'])} {data['currency']}\n")
     if data['previousClose'] != 'N/A':
-        file.write(f"- **Clôture précédente** : {data['previousClose']:.2f} {data['currency']}\n".replace('.', ','))
+        file.write(f"- **Clôture précédente** : {fmt(data['previousClose'])} {data['currency']}\n")
     if data['fiftyTwoWeekLow'] != 'N/A' and data['fiftyTwoWeekHigh'] != 'N/A':
-        file.write(f"- **Range 52 semaines** : {data['fiftyTwoWeekLow']:.2f} - {data['fiftyTwoWeekHigh']:.2f}\n".replace('.', ','))
+        file.write(f"- **Range 52 semaines** : {fmt(data['fiftyTwoWeekLow'])} - {fmt(data['fiftyTwoWeekHigh'])}\n")
     if data['fiftyDayAverage'] != 'N/A':
-        file.write(f"- **Moyenne mobile 50j** : {data['fiftyDayAverage']:.2f}\n".replace('.', ','))
+        file.write(f"- **Moyenne mobile 50j** : {fmt(data['fiftyDayAverage'])}\n")
     if data['twoHundredDayAverage'] != 'N/A':
-        file.write(f"- **Moyenne mobile 200j** : {data['twoHundredDayAverage']:.2f}\n".replace('.', ','))
+        file.write(f"- **Moyenne mobile 200j** : {fmt(data['twoHundredDayAverage'])}\n")
     if data['volume'] != 'N/A':
-        file.write(f"- **Volume** : {data['volume']:,}\n".replace(',', ' '))
+        file.write(f"- **Volume** : {fmt(data['volume'], 'entier')}\n")
     if data['totalAssets'] != 'N/A':
-        file.write(f"- **Actifs sous gestion** : {data['totalAssets']:,.0f} {data['currency']}\n".replace(',', ' '))
+        file.write(f"- **Actifs sous gestion** : {fmt(data['totalAssets'], 'entier')} {data['currency']}\n")
     if data['expenseRatio'] is not None:
-        file.write(f"- **Frais de gestion (TER)** : {data['expenseRatio']:.2%}\n".replace('.', ','))
+        file.write(f"- **Frais de gestion (TER)** : {fmt(data['expenseRatio'], 'taux')}\n")
     file.write("\n")
     
 def write_description_section(file, businessSummary):
@@ -70,48 +74,114 @@ def write_performance_section(file, rendement_data, stats_data, ytd_rendement, c
     if rendement_data:
         file.write(f"**Période analysée :** {rendement_data['periode_debut']} → {rendement_data['periode_fin']}\n\n")
         file.write("### Rendements\n\n")
-        file.write(f"- **Rendement prix** : {rendement_data['rendement_simple']:+.2f}%\n".replace('.', ','))
-        file.write(f"- **Rendement total (avec dividendes)** : {rendement_data['rendement_total']:+.2f}%\n".replace('.', ','))
+        file.write(f"- **Rendement prix** : {fmt(rendement_data['rendement_simple'], 'pct_signe')}\n")
+        file.write(f"- **Rendement total (avec dividendes)** : {fmt(rendement_data['rendement_total'], 'pct_signe')}\n")
         if ytd_rendement is not None:
-            file.write(f"- **YTD (année en cours)** : {ytd_rendement:+.2f}%\n".replace('.', ','))
+            file.write(f"- **YTD (année en cours)** : {fmt(ytd_rendement, 'pct_signe')}\n")
 
         file.write("\n### Risque\n\n")
-        file.write(f"- **Volatilité annuelle** : {rendement_data['volatilite']:.2f}%\n".replace('.', ','))
-        file.write(f"- **Drawdown maximum** : {rendement_data['max_drawdown']:.2f}% (le {rendement_data['max_dd_date']})\n".replace('.', ','))
+        file.write(f"- **Volatilité annuelle** : {fmt(rendement_data['volatilite'], 'pct')}\n")
+        file.write(f"- **Drawdown maximum** : {fmt(rendement_data['max_drawdown'], 'pct')} (le {rendement_data['max_dd_date']})\n")
 
         file.write("\n### Ratios (calculés sur 1 an)\n\n")
 
-        sharpe_line = f"- **Ratio de Sharpe** : {rendement_data['sharpe']:.2f}".replace('.', ',')
+        sharpe_line = f"- **Ratio de Sharpe** : {fmt(rendement_data['sharpe'], 'ratio')}"
         sharpe_line += f" {rendement_data['sharpe_emoji']}"
         if rendement_data['sharpe_alert']:
             sharpe_line += f" *{rendement_data['sharpe_alert']}*"
         file.write(sharpe_line + "\n")
 
-        sortino_line = f"- **Ratio de Sortino** : {rendement_data['sortino']:.2f}".replace('.', ',')
+        sortino_line = f"- **Ratio de Sortino** : {fmt(rendement_data['sortino'], 'ratio')}"
         sortino_line += f" {rendement_data['sortino_emoji']}"
         if rendement_data['sortino_alert']:
             sortino_line += f" *{rendement_data['sortino_alert']}*"
         file.write(sortino_line + "\n")
 
-        file.write(f"- **Ratio de Calmar** : {rendement_data['calmar']:.2f}\n".replace('.', ','))
+        file.write(f"- **Ratio de Calmar** : {fmt(rendement_data['calmar'], 'ratio')}\n")
 
         if stats_data:
             file.write("\n### Statistiques de prix\n\n")
-            file.write(f"- **Prix minimum** : {stats_data['prix_min']:.2f} {currency}\n".replace('.', ','))
-            file.write(f"- **Prix maximum** : {stats_data['prix_max']:.2f} {currency}\n".replace('.', ','))
-            file.write(f"- **Prix moyen** : {stats_data['prix_moyen']:.2f} {currency}\n".replace('.', ','))
-            file.write(f"- **Amplitude** : {stats_data['amplitude']:.2f}%\n".replace('.', ','))
+            file.write(f"- **Prix minimum** : {fmt(stats_data['prix_min'])} {currency}\n")
+            file.write(f"- **Prix maximum** : {fmt(stats_data['prix_max'])} {currency}\n")
+            file.write(f"- **Prix moyen** : {fmt(stats_data['prix_moyen'])} {currency}\n")
+            file.write(f"- **Amplitude** : {fmt(stats_data['amplitude'], 'pct')}\n")
 
             file.write("\n### Analyse des mouvements\n\n")
-            file.write(f"- **Jours positifs** : {stats_data['jours_positifs']} ({stats_data['taux_reussite']:.1f}%)\n".replace('.', ','))
-            file.write(f"- **Jours négatifs** : {stats_data['jours_negatifs']} ({100-stats_data['taux_reussite']:.1f}%)\n".replace('.', ','))
-            file.write(f"- **Meilleur jour** : {stats_data['meilleur_jour']:+.2f}%\n".replace('.', ','))
-            file.write(f"- **Pire jour** : {stats_data['pire_jour']:+.2f}%\n".replace('.', ','))
+            file.write(f"- **Jours positifs** : {stats_data['jours_positifs']} ({fmt(stats_data['taux_reussite'], 'pct1')})\n")
+            file.write(f"- **Jours négatifs** : {stats_data['jours_negatifs']} ({fmt(100 - stats_data['taux_reussite'], 'pct1')})\n")
+            file.write(f"- **Meilleur jour** : {fmt(stats_data['meilleur_jour'], 'pct_signe')}\n")
+            file.write(f"- **Pire jour** : {fmt(stats_data['pire_jour'], 'pct_signe')}\n")
 
         file.write(f"\n*Calcul effectué le {rendement_data['date_calcul']}*\n\n")
     else:
         file.write("Données de performance non disponibles.\n\n")
         
+def write_charts_section(file, chart_files):
+    """
+    Écrit la section 'Graphiques' (images intégrées) dans la fiche Obsidian.
+
+    Args:
+        file: fichier ouvert en écriture
+        chart_files: noms des images générées par etf_charts.submit_charts
+    """
+    if not chart_files:
+        return
+    file.write("## Graphiques\n\n")
+    for chart in chart_files:
+        file.write(f"![[{chart}]]\n\n")
+
+def _trend_arrow(first, last):
+    """Flèche de tendance entre deux valeurs"""
+    if first != first or last != last:  # NaN
+        return ""
+    if last > first:
+        return "↗"
+    if last < first:
+        return "↘"
+    return "→"
+
+def write_history_section(file, history, max_rows=10):
+    """
+    Écrit la section 'Historique des indicateurs' à partir de l'historique local.
+
+    Args:
+        file: fichier ouvert en écriture
+        history: DataFrame de etf_history.load_history (indexé par timestamp)
+        max_rows: nombre de dates affichées (une ligne par jour, la plus récente)
+    """
+    if history is None or history.empty:
+        return
+    file.write("## Historique des indicateurs\n\n")
+
+    daily = history.groupby(history.index.normalize()).last()
+    recent = daily.tail(max_rows)
+    recent = recent.set_axis(recent.index.strftime('%d/%m/%Y'))
+    columns = {
+        'prix': ("Prix", 'nombre'),
+        'rendement_total': ("Rendement 1 an", 'pct_signe'),
+        'volatilite': ("Volatilité", 'pct'),
+        'sharpe': ("Sharpe", 'ratio'),
+        'aum': ("Actifs", 'entier'),
+        'ter': ("TER", 'taux'),
+    }
+    available = [c for c in columns if c in recent.columns]
+    table = recent[available].rename(columns={c: columns[c][0] for c in available})
+    formats = {columns[c][0]: columns[c][1] for c in available}
+    file.write(dataframe_to_markdown(table, formats=formats, index_label="Date"))
+    file.write("\n\n")
+
+    if len(daily) > 1:
+        debut = daily.index[0].strftime('%d/%m/%Y')
+        file.write(f"**Évolution depuis le {debut}** ({len(daily)} relevés)\n\n")
+        for col in available:
+            label, kind = columns[col]
+            serie = daily[col].dropna()
+            if len(serie) < 2:
+                continue
+            first, last = serie.iloc[0], serie.iloc[-1]
+            file.write(f"- **{label}** : {fmt(first, kind)} → {fmt(last, kind)} {_trend_arrow(first, last)}\n")
+        file.write("\n")
+
 def write_dividends_section(file, dividend_info):
     """
     Écrit la section 'Dividendes' dans la fiche Obsidian.
@@ -119,10 +189,37 @@ def write_dividends_section(file, dividend_info):
     """
     file.write("## Dividendes\n\n")
     if dividend_info.get('yield'):
-        file.write(f"- **Yield actuel** : {dividend_info['yield']:.2%}\n".replace('.', ','))
-    file.write(f"- **Dernier dividende** : {dividend_info['dernier_montant']:.4f} le {dividend_info['date_dernier']}\n".replace('.', ','))
+        file.write(f"- **Yield actuel** : {fmt(dividend_info['yield'], 'taux')}\n")
+    if dividend_info.get('ttm_yield') is not None:
+        moyen = dividend_info.get('ttm_yield_moyen')
+        file.write(f"- **Rendement 12 mois glissants** : {fmt(dividend_info['ttm_yield'], 'pct')}"
+                   + (f" (moyenne {CAGR_YEARS} ans : {fmt(moyen, 'pct')})" if moyen is not None else "") + "\n")
+    file.write(f"- **Dernier dividende** : {fmt(dividend_info['dernier_montant'], 'dividende')} le {dividend_info['date_dernier']}\n")
+    if dividend_info.get('frequence'):
+        file.write(f"- **Fréquence** : {dividend_info['frequence']} ({', '.join(dividend_info['mois'])})\n")
+    if dividend_info.get('prochain'):
+        file.write(f"- **Prochain détachement estimé** : {dividend_info['prochain']}\n")
+    if dividend_info.get('cagr') is not None:
+        file.write(f"- **Croissance annuelle des distributions ({CAGR_YEARS} ans)** : {fmt(dividend_info['cagr'], 'pct_signe')}\n")
+    if dividend_info.get('yield_on_cost') is not None:
+        file.write(f"- **Yield on cost** : {fmt(dividend_info['yield_on_cost'], 'pct')} "
+                   f"(achat le {dividend_info['date_achat']} à {fmt(dividend_info['prix_achat'])}, "
+                   f"{fmt(dividend_info['dividendes_percus'], 'dividende')} perçus depuis)\n")
     file.write(f"- **Nombre de distributions** : {dividend_info['nb_distributions']}\n\n")
 
+    annuel = dividend_info.get('annuel')
+    if annuel:
+        # Dernières années, la plus récente en premier ; année en cours incomplète signalée
+        years = sorted(annuel, reverse=True)[:ANNUAL_ROWS]
+        totals = pd.Series([annuel[y] for y in years], index=years)
+        table = pd.DataFrame({
+            'Total': totals,
+            'Variation': (totals / totals.shift(-1) - 1) * 100,
+        })
+        table.index = [f"{y} (en cours)" if y == dividend_info.get('annee_en_cours') else str(y) for y in years]
+        file.write(dataframe_to_markdown(table, {'Total': 'dividende', 'Variation': 'pct_signe'}, index_label="Année"))
+        file.write("\n\n")
+
 def write_sector_allocation_section(file, repartition_fmt):
     """
     Écrit la section 'Répartition sectorielle' dans la fiche Obsidian.
@@ -130,9 +227,12 @@ def write_sector_allocation_section(file, repartition_fmt):
     """
     file.write("## Répartition sectorielle\n\n")
     if hasattr(repartition_fmt, 'to_string'):
-        file.write("```\n")
-        file.write(repartition_fmt.to_string(index=True))
-        file.write("\n```\n\n")
+        # Une colonne de poids (en %) par symbole, index = secteurs
+        sectors = repartition_fmt.to_frame() if hasattr(repartition_fmt, 'to_frame') else repartition_fmt
+        if len(sectors.columns) == 1:
+            sectors = sectors.set_axis(["Poids"], axis=1)
+        file.write(dataframe_to_markdown(sectors, default_kind='pct', index_label="Secteur"))
+        file.write("\n\n")
     elif repartition_fmt != "Non disponible":
         file.write(f"{repartition_fmt}\n\n")
     else:
@@ -144,7 +244,16 @@ def write_holdings_section(file, top_holdings_fmt):
     Déplacé depuis etf_obsidian.py dans le cadre du refactoring.
     """
     file.write("## Principales positions\n\n")
-    if hasattr(top_holdings_fmt, 'to_string'):
+    if hasattr(top_holdings_fmt, 'columns'):
+        # L'index contient le symbole de l'ETF, répété sur chaque ligne : on l'ignore
+        holdings = top_holdings_fmt.rename(columns={
+            "symbol": "Symbole",
+            "holdingName": "Nom",
+            "holdingPercent": "Poids"
+        })
+        file.write(dataframe_to_markdown(holdings, default_kind='pct', index=False))
+        file.write("\n\n")
+    elif hasattr(top_holdings_fmt, 'to_string'):
         file.write("```\n")
         file.write(top_holdings_fmt.to_string(index=True))
         file.write("\n```\n\n")
@@ -153,10 +262,14 @@ def write_holdings_section(file, top_holdings_fmt):
     else:
         file.write(f"{top_holdings_fmt}\n\n")
         
-def write_notes_section(file):
+def write_notes_section(file, existing_notes=None):
     """
     Écrit la section 'Notes personnelles' dans la fiche Obsidian.
     Déplacé depuis etf_obsidian.py dans le cadre du refactoring.
+    Les notes déjà saisies (existing_notes) sont reprises telles quelles.
     """
     file.write("## Notes personnelles\n\n")
-    file.write("*Ajoutez ici vos notes, analyses et réflexions sur cet ETF...*\n\n")
\ No newline at end of file
+    if existing_notes:
+        file.write(f"{existing_notes}\n\n")
+    else:
+        file.write("*Ajoutez ici vos notes, analyses et réflexions sur cet ETF...*\n\n")
\ No newline at end of file
@@ -0,0 +1,176 @@
+#!/usr/bin/python3
+# etf_metrics.py - Métriques d'exécution au format texte Prometheus/OpenMetrics (--metrics-file)
+
+import os
+import time
+import bisect
+import threading
+from etf_logging import log_debug, log_warning, is_debug_enabled
+
+# Étapes utilisées pour le comptage des échecs
+STAGES = ('resolve', 'fetch', 'compute', 'render', 'write')
+
+# Bornes des histogrammes de latence réseau (secondes)
+FETCH_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Métriques exposées : nom -> (type, description, bornes éventuelles)
+METRICS = {
+    'etfinfo_fetch_duration_seconds': ('histogram', "Durée des requêtes Yahoo par ticker et type de données", FETCH_BUCKETS),
+    'etfinfo_cache_requests_total': ('counter', "Appels réseau servis par le cache (hit) ou par Yahoo (miss)", None),
+    'etfinfo_cache_hit_ratio': ('gauge', "Part des appels servis par le cache de l'exécution", None),
+    'etfinfo_retries_total': ('counter', "Nouvelles tentatives après limitation (429), erreur 5xx ou coupure réseau", None),
+    'etfinfo_circuit_open': ('gauge', "Disjoncteur Yahoo ouvert (1) ou fermé (0)", None),
+    'etfinfo_failures_total': ('counter', "Échecs par étape (resolve, fetch, compute, render, write)", None),
+    'etfinfo_notes_written_total': ('counter', "Fiches Obsidian écrites", None),
+    'etfinfo_alerts_total': ('counter', "Alertes de prix déclenchées par type de règle (--alerts)", None),
+    'etfinfo_run_duration_seconds': ('gauge', "Durée de l'exécution", None),
+    'etfinfo_last_run_timestamp_seconds': ('gauge', "Horodatage de la dernière écriture des métriques", None),
+}
+
+_enabled = False
+_path = None
+_lock = threading.Lock()
+_values = {}
+_started = time.time()
+
+
+def enable_metrics(path):
+    """
+    Active la collecte des métriques
+
+    Args:
+        path: fichier texte à écrire (ex: /var/lib/node_exporter/textfile/etfinfo.prom)
+    """
+    global _enabled, _path
+    _enabled = True
+    _path = path
+
+
+def is_metrics_enabled():
+    """Retourne True si --metrics-file est actif"""
+    return _enabled
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+def inc(name, amount=1, **labels):
+    """Incrémente un compteur"""
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _values[key] = _values.get(key, 0) + amount
+
+
+def set_gauge(name, value, **labels):
+    """Fixe la valeur d'une jauge"""
+    if not _enabled:
+        return
+    with _lock:
+        _values[_key(name, labels)] = value
+
+
+def observe(name, value, **labels):
+    """Ajoute une observation à un histogramme"""
+    if not _enabled:
+        return
+    buckets = METRICS[name][2]
+    key = _key(name, labels)
+    with _lock:
+        histogram = _values.get(key)
+        if histogram is None:
+            histogram = _values[key] = {'buckets': [0] * (len(buckets) + 1), 'sum': 0.0, 'count': 0}
+        histogram['buckets'][bisect.bisect_left(buckets, value)] += 1
+        histogram['sum'] += value
+        histogram['count'] += 1
+
+
+def record_failure(stage, ticker=None):
+    """
+    Compte un échec
+
+    Args:
+        stage: étape ('resolve', 'fetch', 'compute', 'render', 'write')
+        ticker: symbole concerné (optionnel)
+    """
+    inc('etfinfo_failures_total', stage=stage, ticker=ticker)
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(pairs, extra=()):
+    pairs = list(pairs) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_metrics():
+    """
+    Construit le texte des métriques (format d'exposition Prometheus)
+
+    Returns:
+        str: contenu du fichier
+    """
+    with _lock:
+        hits, misses = {}, {}
+        for (name, labels), value in _values.items():
+            if name == 'etfinfo_cache_requests_total':
+                label_map = dict(labels)
+                target = hits if label_map.get('result') == 'hit' else misses
+                target[label_map.get('kind')] = target.get(label_map.get('kind'), 0) + value
+        for kind in set(hits) | set(misses):
+            total = hits.get(kind, 0) + misses.get(kind, 0)
+            _values[_key('etfinfo_cache_hit_ratio', {'kind': kind})] = hits.get(kind, 0) / total if total else 0.0
+        _values[_key('etfinfo_run_duration_seconds', {})] = time.time() - _started
+        _values[_key('etfinfo_last_run_timestamp_seconds', {})] = time.time()
+        snapshot = dict(_values)
+
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        series = sorted((labels, value) for (metric, labels), value in snapshot.items() if metric == name)
+        if not series:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in series:
+            if kind == 'histogram':
+                cumulative = 0
+                for bound, count in zip(list(buckets) + ['+Inf'], value['buckets']):
+                    cumulative += count
+                    le = bound if bound == '+Inf' else _number(float(bound))
+                    lines.append(f"{name}_bucket{_labels(labels, [('le', le)])} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(value['sum'])}")
+                lines.append(f"{name}_count{_labels(labels)} {value['count']}")
+            else:
+                lines.append(f"{name}{_labels(labels)} {_number(value)}")
+    return '\n'.join(lines) + '\n'
+
+
+def write_metrics():
+    """
+    Écrit le fichier de métriques (écriture atomique, lisible à tout moment par le collecteur)
+
+    Returns:
+        bool: True si le fichier a été écrit
+    """
+    if not _enabled:
+        return False
+    tmp_path = f"{_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(render_metrics())
+        os.replace(tmp_path, _path)
+    except OSError as e:
+        log_warning(f"Écriture des métriques impossible ({_path}): {e}")
+        return False
+    if is_debug_enabled(): log_debug("Métriques écrites dans %s", _path)
+    return True
@@ -0,0 +1,686 @@
+#!/usr/bin/python3
+# etf_net.py - Point de passage unique des appels Yahoo : cache, débit, reprises, disjoncteur, comptage et budget
+
+import sys
+import json
+import time
+import random
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from colorama import Fore, Style
+from etf_format import fmt
+from etf_logging import log_debug, log_warning, is_debug_enabled, is_memory_tracking_enabled, span
+from etf_metrics import inc, observe, set_gauge, record_failure
+
+try:
+    from yfinance.exceptions import YFRateLimitError
+except ImportError:
+    YFRateLimitError = None
+
+# Types de données suivis (affichés dans cet ordre par --stats)
+KINDS = ('session', 'info', 'history', 'dividends', 'fund', 'quotes')
+
+# Colonnes d'historique conservées en cache (les seules utilisées par les calculs)
+HISTORY_COLUMNS = ('Close', 'Dividends')
+
+# Taille maximale du cache de l'exécution (octets), modifiable par --mem-budget
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+
+# Nombre de récupérations lancées en parallèle par prefetch()
+PREFETCH_WORKERS = 6
+
+# Débit vers Yahoo (requêtes par minute, modifiable par --rate) et rafale autorisée
+DEFAULT_RATE_PER_MINUTE = 120
+RATE_BURST = 10
+
+# Requêtes Yahoo simultanées au plus, tous threads confondus (comme un navigateur par hôte)
+MAX_CONCURRENT_REQUESTS = 6
+
+# Nouvelles tentatives sur limitation (429), erreur serveur (5xx) ou coupure réseau
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+
+# Disjoncteur : ouvert après N échecs consécutifs, réessayé après COOLDOWN secondes
+CIRCUIT_THRESHOLD = 5
+CIRCUIT_COOLDOWN = 60.0
+
+
+class RequestBudgetExceeded(BaseException):
+    """
+    Budget de requêtes (--max-requests) épuisé.
+
+    Hérite de BaseException (comme KeyboardInterrupt) pour traverser les
+    `except Exception` des étapes de calcul et interrompre tout le traitement.
+    """
+
+
+class YahooUnavailable(Exception):
+    """Disjoncteur ouvert : Yahoo limite ou rejette les requêtes, l'appel échoue sans être envoyé"""
+
+
+class YahooThrottled(Exception):
+    """Réponse de limitation renvoyée sous forme de données (yahooquery) plutôt que d'exception"""
+
+
+class RateLimiter:
+    """Limiteur global (seau à jetons) : au plus `rate` opérations par minute"""
+
+    def __init__(self, rate_per_minute, burst=1):
+        self.interval = 60.0 / rate_per_minute
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def set_rate(self, rate_per_minute):
+        with self.lock:
+            self.interval = 60.0 / rate_per_minute
+
+    def acquire(self):
+        """
+        Bloque jusqu'à ce qu'un jeton soit disponible
+
+        Returns:
+            float: temps d'attente (secondes)
+        """
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) / self.interval)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait = (1 - self.tokens) * self.interval
+            time.sleep(wait)
+            waited += wait
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur : après `threshold` échecs consécutifs, les appels échouent immédiatement
+    pendant `cooldown` secondes, puis un seul appel d'essai décide de la reprise
+    """
+
+    def __init__(self, threshold, cooldown):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial = False
+        self.opens = 0
+        self.lock = threading.Lock()
+
+    def before(self):
+        """Raises: YahooUnavailable si le disjoncteur est ouvert"""
+        with self.lock:
+            if self.opened_at is None:
+                return
+            remaining = self.cooldown - (time.monotonic() - self.opened_at)
+            if remaining > 0:
+                raise YahooUnavailable(f"Yahoo limite les requêtes, nouvel essai dans {remaining:.0f} s")
+            if self.trial:
+                raise YahooUnavailable("Yahoo limite les requêtes, essai de reprise en cours")
+            self.trial = True
+
+    def success(self):
+        with self.lock:
+            if self.opened_at is not None:
+                log_warning("net: disjoncteur refermé, Yahoo répond de nouveau")
+                set_gauge('etfinfo_circuit_open', 0)
+            self.failures = 0
+            self.opened_at = None
+            self.trial = False
+
+    def abort(self):
+        """Appel interrompu avant la réponse (Ctrl+C, budget) : un autre appel fera l'essai de reprise"""
+        with self.lock:
+            self.trial = False
+
+    def failure(self):
+        with self.lock:
+            self.failures += 1
+            reopen = self.opened_at is not None and self.trial
+            self.trial = False
+            if reopen or (self.opened_at is None and self.failures >= self.threshold):
+                self.opened_at = time.monotonic()
+                self.opens += 1
+                log_warning(f"net: disjoncteur ouvert après {self.failures} échecs consécutifs ({self.cooldown:.0f} s)")
+                set_gauge('etfinfo_circuit_open', 1)
+
+    def state(self):
+        with self.lock:
+            if self.opened_at is None:
+                return "fermé"
+            return "semi-ouvert" if time.monotonic() - self.opened_at >= self.cooldown else "ouvert"
+
+
+_lock = threading.Lock()
+_cache = OrderedDict()
+_cache_sizes = {}
+_cache_times = {}
+_cache_bytes = 0
+_cache_ttl = None
+_memory_budget = DEFAULT_MEMORY_BUDGET
+_evictions = 0
+_inflight = {}
+_executor = None
+_budget = None
+_requests = 0
+_by_kind = {}
+_by_caller = {}
+_limiter = RateLimiter(DEFAULT_RATE_PER_MINUTE, burst=RATE_BURST)
+_slots = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+_breaker = CircuitBreaker(CIRCUIT_THRESHOLD, CIRCUIT_COOLDOWN)
+_throttle_wait = 0.0
+
+
+def _new_counters():
+    return {'requests': 0, 'hits': 0, 'errors': 0, 'retries': 0, 'bytes': 0, 'latencies': []}
+
+
+def set_rate_limit(rate_per_minute):
+    """Fixe le débit maximum vers Yahoo (requêtes par minute)"""
+    _limiter.set_rate(rate_per_minute)
+
+
+def get_rate_limit():
+    """Débit maximum courant vers Yahoo (requêtes par minute)"""
+    return 60.0 / _limiter.interval
+
+
+def set_budget(max_requests):
+    """
+    Fixe le nombre maximum de requêtes réseau de l'exécution (None = illimité)
+    """
+    global _budget
+    _budget = max_requests
+
+
+def set_memory_budget(max_bytes):
+    """
+    Fixe la taille maximale du cache : au-delà, les réponses les plus anciennes sont libérées
+    """
+    global _memory_budget
+    _memory_budget = max_bytes
+
+
+def set_cache_ttl(seconds):
+    """
+    Fixe la durée de validité des réponses en cache (None = toute l'exécution)
+
+    Utile pour les processus de longue durée (serveur) : au-delà, l'appel est refait.
+    """
+    global _cache_ttl
+    _cache_ttl = seconds
+
+
+def _drop(cache_key):
+    """Retire une entrée du cache (verrou déjà pris)"""
+    global _cache_bytes
+    _cache.pop(cache_key, None)
+    _cache_times.pop(cache_key, None)
+    _cache_bytes -= _cache_sizes.pop(cache_key, 0)
+
+
+def _store(cache_key, value, size):
+    """Ajoute une entrée au cache puis libère les plus anciennes au-delà du budget mémoire"""
+    global _cache_bytes, _evictions
+    with _lock:
+        _drop(cache_key)
+        _cache[cache_key] = value
+        _cache_sizes[cache_key] = size
+        _cache_times[cache_key] = time.monotonic()
+        _cache_bytes += size
+        while _cache_bytes > _memory_budget and len(_cache) > 1:
+            oldest = next(iter(_cache))
+            _drop(oldest)
+            _evictions += 1
+            if is_debug_enabled(): log_debug("net: budget mémoire atteint, %s libéré", oldest)
+
+
+def release(symbol):
+    """
+    Libère les données en cache d'un ticker (à appeler une fois ses indicateurs calculés)
+
+    Args:
+        symbol: symbole du ticker
+    """
+    with _lock:
+        for cache_key in [k for k in _cache if k[1] == symbol]:
+            _drop(cache_key)
+
+
+def clear_cache():
+    """Oublie les réponses mises en cache (les compteurs sont conservés)"""
+    global _cache_bytes
+    with _lock:
+        _cache.clear()
+        _cache_sizes.clear()
+        _cache_times.clear()
+        _cache_bytes = 0
+
+
+def reset_stats():
+    """Remet les compteurs à zéro (--stats, --max-requests) en conservant le cache"""
+    global _requests, _evictions, _throttle_wait
+    with _lock:
+        _throttle_wait = 0.0
+        _by_kind.clear()
+        _by_caller.clear()
+        _requests = 0
+        _evictions = 0
+
+
+def reset():
+    """Vide le cache et remet les compteurs à zéro"""
+    clear_cache()
+    reset_stats()
+
+
+def _caller():
+    """Fonction (module.fonction) ayant appelé le helper get_* de ce module"""
+    frame = sys._getframe(2)
+    return f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_name}"
+
+
+def _payload_size(value):
+    """Taille approximative des données reçues (octets)"""
+    try:
+        if hasattr(value, 'memory_usage'):
+            usage = value.memory_usage(index=True)
+            return int(usage.sum()) if hasattr(usage, 'sum') else int(usage)
+        if isinstance(value, (dict, list)):
+            return len(json.dumps(value, default=str))
+        return sys.getsizeof(value)
+    except Exception:
+        return 0
+
+
+def _record(kind, caller, hit, elapsed=None, size=0, error=False):
+    """Met à jour les compteurs par type et par appelant"""
+    with _lock:
+        for counters in (_by_kind.setdefault(kind, _new_counters()),
+                         _by_caller.setdefault(caller, _new_counters())):
+            if hit:
+                counters['hits'] += 1
+                continue
+            counters['requests'] += 1
+            counters['latencies'].append(elapsed)
+            counters['bytes'] += size
+            if error:
+                counters['errors'] += 1
+
+
+def fetch(kind, key, loader, caller='?', cache=True):
+    """
+    Exécute un appel réseau, en réutilisant le résultat d'un appel identique de la même exécution
+
+    Les objets renvoyés depuis le cache sont partagés : ils ne doivent pas être modifiés.
+    Un appel identique déjà en cours (autre thread) est attendu plutôt que relancé.
+
+    Args:
+        kind: type de données ('info', 'history', 'dividends', 'fund')
+        key: clé identifiant l'appel (symbole + paramètres)
+        loader: fonction sans argument réalisant l'appel
+        caller: fonction à l'origine de l'appel (pour --stats)
+        cache: False pour ne pas conserver le résultat (il reste comptabilisé)
+
+    Returns:
+        résultat de loader()
+
+    Raises:
+        RequestBudgetExceeded: le budget --max-requests est atteint
+    """
+    global _requests
+    cache_key = (kind,) + tuple(key)
+    pending = None
+    with _lock:
+        if (cache_key in _cache and _cache_ttl is not None
+                and time.monotonic() - _cache_times[cache_key] > _cache_ttl):
+            _drop(cache_key)
+        if cache_key in _cache:
+            value = _cache[cache_key]
+            _cache.move_to_end(cache_key)
+            hit = True
+        elif cache_key in _inflight:
+            pending = _inflight[cache_key]
+            hit = True
+        else:
+            hit = False
+            if _budget is not None and _requests >= _budget:
+                raise RequestBudgetExceeded(f"budget de {_budget} requêtes atteint ({kind} {key[0]})")
+            _requests += 1
+            _inflight[cache_key] = Future()
+    if pending is not None:
+        # Même appel en cours dans un autre thread : partager sa réponse
+        value = pending.result()
+    if hit:
+        _record(kind, caller, hit=True)
+        inc('etfinfo_cache_requests_total', kind=kind, result='hit')
+        if is_debug_enabled(): log_debug("net: cache %s %s (%s)", kind, key, caller)
+        return value
+
+    start = time.perf_counter()
+    try:
+        with span(f"net.{kind}", ticker=key[0], caller=caller):
+            value = _call(kind, caller, key, loader)
+    except BaseException as e:
+        _finish(cache_key, exception=e)
+        if not isinstance(e, Exception):
+            raise
+        _record(kind, caller, hit=False, elapsed=time.perf_counter() - start, error=True)
+        inc('etfinfo_cache_requests_total', kind=kind, result='miss')
+        if is_retryable(e) or isinstance(e, YahooUnavailable):
+            # Réponses attendues (404 des variantes de --search...) : comptées par l'appelant s'il y a lieu
+            record_failure('fetch', key[0])
+        raise
+    elapsed = time.perf_counter() - start
+    size = _payload_size(value)
+    _record(kind, caller, hit=False, elapsed=elapsed, size=size)
+    inc('etfinfo_cache_requests_total', kind=kind, result='miss')
+    observe('etfinfo_fetch_duration_seconds', elapsed, ticker=key[0], kind=kind)
+    if cache:
+        _store(cache_key, value, size)
+    _finish(cache_key, value=value)
+    if is_debug_enabled(): log_debug("net: %s %s en %.3fs (%s)", kind, key, elapsed, caller)
+    return value
+
+
+def is_retryable(exc):
+    """Erreur passagère (limitation, erreur serveur, réseau) justifiant une nouvelle tentative"""
+    if isinstance(exc, (YahooThrottled, ConnectionError, TimeoutError, json.JSONDecodeError)):
+        # JSONDecodeError : page d'erreur HTML renvoyée à la place de l'API (limitation)
+        return True
+    if YFRateLimitError is not None and isinstance(exc, YFRateLimitError):
+        return True
+    status = getattr(getattr(exc, 'response', None), 'status_code', None)
+    if status in RETRYABLE_STATUS:
+        return True
+    if type(exc).__name__ in ('ConnectionError', 'Timeout', 'ConnectTimeout', 'ReadTimeout'):
+        return True
+    return 'Too Many Requests' in str(exc)
+
+
+def _retry_delay(exc, attempt):
+    """Attente avant la tentative suivante : Retry-After si fourni, sinon exponentielle avec gigue"""
+    headers = getattr(getattr(exc, 'response', None), 'headers', None) or {}
+    try:
+        retry_after = float(headers.get('Retry-After'))
+        if retry_after >= 0:
+            return min(retry_after, BACKOFF_MAX)
+    except (TypeError, ValueError):
+        pass
+    ceiling = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)
+    return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+
+def _call(kind, caller, key, loader):
+    """
+    Exécute loader() via l'ordonnanceur : débit, requêtes simultanées, reprises et disjoncteur
+
+    Raises:
+        YahooUnavailable: disjoncteur ouvert
+        l'exception de loader() si elle n'est pas passagère ou après MAX_RETRIES reprises
+    """
+    global _throttle_wait
+    attempt = 0
+    while True:
+        _breaker.before()
+        waited = _limiter.acquire()
+        if waited:
+            with _lock:
+                _throttle_wait += waited
+        error = None
+        with _slots:
+            try:
+                value = loader()
+            except Exception as e:
+                if not is_retryable(e):
+                    # Yahoo a répondu (404, données invalides) : pas une limitation
+                    _breaker.success()
+                    raise
+                error = e
+            except BaseException:
+                _breaker.abort()
+                raise
+        if error is None:
+            _breaker.success()
+            return value
+
+        _breaker.failure()
+        if attempt >= MAX_RETRIES:
+            raise error
+        delay = _retry_delay(error, attempt)
+        attempt += 1
+        with _lock:
+            for counters in (_by_kind.setdefault(kind, _new_counters()),
+                             _by_caller.setdefault(caller, _new_counters())):
+                counters['retries'] += 1
+        inc('etfinfo_retries_total', kind=kind)
+        log_warning(f"net: {kind} {key[0]} - {type(error).__name__}: {error} ; "
+                    f"tentative {attempt + 1}/{MAX_RETRIES + 1} dans {delay:.1f} s")
+        time.sleep(delay)
+
+
+def _finish(cache_key, value=None, exception=None):
+    """Transmet la réponse (ou l'erreur) d'un appel aux threads qui l'attendent"""
+    with _lock:
+        pending = _inflight.pop(cache_key, None)
+    if pending is None:
+        return
+    if exception is not None:
+        pending.set_exception(exception)
+    else:
+        pending.set_result(value)
+
+
+def prefetch(tasks):
+    """
+    Lance des récupérations indépendantes en parallèle
+
+    Les résultats sont lus ensuite dans l'ordre d'affichage : la durée totale est
+    celle de la récupération la plus lente plutôt que la somme de toutes.
+    Une tâche ne doit pas elle-même appeler prefetch().
+
+    Avec --memprofile, les tâches sont exécutées immédiatement dans le thread appelant :
+    le pic mémoire de tracemalloc est global au processus, des spans simultanés dans
+    d'autres threads fausseraient celui de chaque étape.
+
+    Args:
+        tasks: dict {nom: fonction sans argument}
+
+    Returns:
+        dict {nom: Future} (Future.result() relève l'exception éventuelle de la tâche)
+    """
+    global _executor
+    if is_memory_tracking_enabled():
+        return {name: _run_inline(task) for name, task in tasks.items()}
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="etfinfo-fetch")
+    if is_debug_enabled(): log_debug("net: prefetch %s", ", ".join(tasks))
+    return {name: _executor.submit(task) for name, task in tasks.items()}
+
+
+def _run_inline(task):
+    """Exécute une tâche de prefetch dans le thread appelant (Future déjà terminé)"""
+    future = Future()
+    try:
+        future.set_result(task())
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def _symbol(ticker):
+    """Symbole d'un objet yfinance.Ticker ou yahooquery.Ticker"""
+    symbols = getattr(ticker, 'symbols', None)
+    if symbols:
+        return symbols[0]
+    return getattr(ticker, 'ticker', '?')
+
+
+def get_info(fund):
+    """fund.info (yfinance), mis en cache pour l'exécution"""
+    return fetch('info', (_symbol(fund),), lambda: fund.info, _caller())
+
+
+def _trim_history(hist):
+    """Ne garde que les colonnes de HISTORY_COLUMNS (les autres colonnes sont libérées)"""
+    columns = [c for c in HISTORY_COLUMNS if c in getattr(hist, 'columns', ())]
+    return hist[columns] if columns else hist
+
+
+def period_arguments(period):
+    """Arguments de get_history pour --period (1y, max... ou YYYY-MM-DD:YYYY-MM-DD)"""
+    if ':' in period:
+        start, end = period.split(':')
+        return {'start': start, 'end': end}
+    return {'period': period}
+
+
+def daily_series(series, unique=False):
+    """
+    Série indexée par date sans fuseau (places de fuseaux différents alignées sur le jour local)
+
+    Args:
+        series: colonne d'un historique ou dividendes yfinance
+        unique: une seule valeur par jour (la dernière), pour aligner des cours
+
+    Returns:
+        pandas.Series de floats triée par date
+    """
+    index = series.index
+    if getattr(index, 'tz', None) is not None:
+        index = index.tz_localize(None)
+    series = pd.Series(series.to_numpy(dtype=float), index=index.normalize()).sort_index()
+    return series[~series.index.duplicated(keep='last')] if unique else series
+
+
+def get_history(fund, full=False, **kwargs):
+    """
+    fund.history(**kwargs) (yfinance), mis en cache pour l'exécution
+
+    Seules les colonnes HISTORY_COLUMNS sont conservées, sauf avec full=True
+    (affichage brut) : le tableau complet est alors renvoyé sans être mis en cache.
+    """
+    key = (_symbol(fund),) + tuple(sorted((k, str(v)) for k, v in kwargs.items()))
+    if full:
+        return fetch('history', key + ('full',), lambda: fund.history(**kwargs), _caller(), cache=False)
+    return fetch('history', key, lambda: _trim_history(fund.history(**kwargs)), _caller())
+
+
+def get_dividends(fund):
+    """fund.dividends (yfinance), mis en cache pour l'exécution"""
+    return fetch('dividends', (_symbol(fund),), lambda: fund.dividends, _caller())
+
+
+def _check_throttled(data):
+    """yahooquery renvoie les erreurs sous forme de texte : détecter une limitation"""
+    values = data.values() if isinstance(data, dict) else [data]
+    for value in values:
+        if isinstance(value, str) and ('Too Many Requests' in value or 'rate limit' in value.lower()):
+            raise YahooThrottled(value)
+    return data
+
+
+def get_fund_module(yqfund, name):
+    """Module fonds yahooquery (ex: 'fund_sector_weightings'), mis en cache pour l'exécution"""
+    return fetch('fund', (_symbol(yqfund), name), lambda: _check_throttled(getattr(yqfund, name)), _caller())
+
+
+def get_quotes(yqfund):
+    """
+    Cotations de tous les symboles d'un yahooquery.Ticker en une requête (jamais mises en cache)
+
+    Returns:
+        dict {symbole: cotation} (regularMarketPrice, fiftyDayAverage...)
+    """
+    symbols = yqfund.symbols
+    return fetch('quotes', (_symbol(yqfund), len(symbols)), lambda: _check_throttled(yqfund.quotes), _caller(), cache=False)
+
+
+def open_session(symbol, factory):
+    """
+    Ouverture de session (cookie + crumb), soumise au débit et aux reprises, jamais mise en cache
+
+    Args:
+        symbol: premier ticker de la session
+        factory: fonction sans argument créant l'objet (ex: yahooquery.Ticker)
+    """
+    return fetch('session', (symbol,), factory, _caller(), cache=False)
+
+
+def get_stats():
+    """
+    Statistiques réseau de l'exécution
+
+    Returns:
+        dict {'requests', 'budget', 'circuit', 'throttle_wait_s', ..., 'by_kind': {...}, 'by_caller': {...}}, chaque entrée
+        contenant requests, hits, errors, retries, bytes, p50_s, p95_s, max_s, total_s
+    """
+    def summarize(counters):
+        latencies = np.array(counters['latencies'], dtype='float64')
+        has = len(latencies) > 0
+        return {
+            'requests': counters['requests'],
+            'hits': counters['hits'],
+            'errors': counters['errors'],
+            'retries': counters['retries'],
+            'bytes': counters['bytes'],
+            'p50_s': float(np.percentile(latencies, 50)) if has else None,
+            'p95_s': float(np.percentile(latencies, 95)) if has else None,
+            'max_s': float(latencies.max()) if has else None,
+            'total_s': float(latencies.sum()) if has else 0.0,
+        }
+
+    with _lock:
+        return {
+            'requests': _requests,
+            'budget': _budget,
+            'cache_bytes': _cache_bytes,
+            'evictions': _evictions,
+            'throttle_wait_s': _throttle_wait,
+            'circuit': _breaker.state(),
+            'circuit_opens': _breaker.opens,
+            'by_kind': {kind: summarize(c) for kind, c in _by_kind.items()},
+            'by_caller': {caller: summarize(c) for caller, c in _by_caller.items()},
+        }
+
+
+def _ms(seconds):
+    return f"{fmt(seconds * 1000, 'nombre')} ms" if seconds is not None else "-"
+
+
+def print_stats():
+    """Affiche le résumé --stats (par type de données puis par fonction appelante)"""
+    stats = get_stats()
+    budget = f" / {stats['budget']}" if stats['budget'] is not None else ""
+    print(f"\n{Style.BRIGHT}{Fore.CYAN}📊 Réseau : {stats['requests']}{budget} requête(s){Style.RESET_ALL}"
+          f"{Style.DIM} - cache {fmt(stats['cache_bytes'] / (1024 * 1024), 'nombre')} Mo, "
+          f"{stats['evictions']} libération(s){Style.RESET_ALL}")
+    if stats['throttle_wait_s'] or stats['circuit_opens']:
+        print(f"{Style.DIM}Limiteur : {fmt(stats['throttle_wait_s'], 'nombre')} s d'attente - disjoncteur "
+              f"{stats['circuit']} ({stats['circuit_opens']} ouverture(s)){Style.RESET_ALL}")
+    if not stats['by_kind']:
+        return
+
+    header = (f"{'':<12} {'Requêtes':>8} {'Cache':>6} {'Erreurs':>7} {'Reprises':>8} {'Ko':>10} "
+              f"{'p50':>11} {'p95':>11} {'max':>11}")
+    print(f"{Style.BRIGHT}{header}{Style.RESET_ALL}")
+    order = [k for k in KINDS if k in stats['by_kind']] + sorted(set(stats['by_kind']) - set(KINDS))
+    for kind in order:
+        s = stats['by_kind'][kind]
+        print(f"{kind:<12} {s['requests']:>8} {s['hits']:>6} {s['errors']:>7} {s['retries']:>8} "
+              f"{fmt(s['bytes'] / 1024, 'nombre'):>10} {_ms(s['p50_s']):>11} {_ms(s['p95_s']):>11} {_ms(s['max_s']):>11}")
+
+    print(f"\n{Style.BRIGHT}{'Appelant':<45} {'Requêtes':>8} {'Cache':>6} {'Temps':>11}{Style.RESET_ALL}")
+    for caller, s in sorted(stats['by_caller'].items(), key=lambda item: -item[1]['total_s']):
+        print(f"{caller:<45} {s['requests']:>8} {s['hits']:>6} {_ms(s['total_s']):>11}")
@@ -6,18 +6,26 @@ from datetime import datetime
 from colorama import Fore, Style
 import re
 import time
-from etf_utils import detect_indice, get_emetteur_url, get_ratio_emoji, format_date_fr
+from etf_utils import detect_indice, detect_distribution, get_emetteur_url, get_ratio_emoji, format_date_fr
 from etf_markdown import (
     write_header,
     write_general_section,
     write_financial_section,
     write_description_section,
     write_performance_section,
+    write_charts_section,
+    write_history_section,
     write_dividends_section,
     write_sector_allocation_section,
     write_holdings_section,
     write_notes_section
 )
+from etf_history import build_snapshot, append_snapshot, load_history
+from etf_charts import submit_charts
+from etf_net import get_history, prefetch
+from etf_instruments import record_instrument
+from etf_metrics import inc, record_failure
+from etf_overrides import OVERRIDE_FIELDS, get_overrides, record_overrides, load_patch_file
 from etf_data import (
     compute_ytd_return,
     build_dividend_info,
@@ -32,7 +40,9 @@ from etf_logging import (
     log_warning,
     log_error,
     log_exception,
-    is_debug_enabled
+    is_debug_enabled,
+    span,
+    traced
 )
 
 # Champs éditables en mode --editall
@@ -64,28 +74,71 @@ def print_note_dates(created, modified):
     else:
         print(f"{Fore.YELLOW}{modified_label} {modified}{Style.RESET_ALL}")
 
-def get_obsidian_paths(longName):
+def get_obsidian_directory():
     """
-    Construit les chemins Obsidian (dossier + fichier) pour la fiche ETF.
-    Crée le dossier cible s'il n'existe pas.
-    Returns: (directory_name, filename)
+    Retourne le répertoire des fiches ETF dans le vault Obsidian
+    (ou ~/ObsidianTest/ETF si le flag .obsidian_test_mode est présent).
+    La variable d'environnement ETFINFO_OBSIDIAN_DIR permet de le surcharger.
     """
+    override = os.environ.get("ETFINFO_OBSIDIAN_DIR")
+    if override:
+        return os.path.expanduser(override)
+
     # Mode test : si le flag existe, on isole l’écriture
     repo_root = os.path.dirname(os.path.abspath(__file__))
     test_flag = os.path.join(repo_root, ".obsidian_test_mode")
 
     if os.path.exists(test_flag):
-        test_dir = os.path.expanduser("~/ObsidianTest/ETF")
-        os.makedirs(test_dir, exist_ok=True)
-        filename = f"{test_dir}/{longName}.md"
-        return test_dir, filename
+        return os.path.expanduser("~/ObsidianTest/ETF")
     home_directory = os.path.expanduser("~")
     obsidian_directory = home_directory + "/Library/Mobile Documents/iCloud~md~obsidian/Documents/Invest"
-    directory_name = obsidian_directory + "/8 ETF"
+    return obsidian_directory + "/8 ETF"
+
+def get_obsidian_paths(longName):
+    """
+    Construit les chemins Obsidian (dossier + fichier) pour la fiche ETF.
+    Crée le dossier cible s'il n'existe pas.
+    Returns: (directory_name, filename)
+    """
+    directory_name = get_obsidian_directory()
     os.makedirs(directory_name, exist_ok=True)
     filename = f"{directory_name}/{longName}.md"
     return directory_name, filename
 
+def list_vault_notes():
+    """
+    Liste les fiches ETF présentes dans le vault avec leur symbole et leur exchange.
+
+    Returns:
+        list de dicts {'symbol', 'exchange', 'path'} (exchange = code Yahoo, ex: GER)
+    """
+    directory = get_obsidian_directory()
+    if not os.path.isdir(directory):
+        return []
+
+    notes = []
+    for file in sorted(os.listdir(directory)):
+        if not file.lower().endswith(".md"):
+            continue
+        path = os.path.join(directory, file)
+        symbol = None
+        exchange = None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.startswith("- **Symbole** :"):
+                        symbol = line.split(":", 1)[1].strip()
+                    elif line.startswith("- **Exchange** :"):
+                        exchange = line.split(":", 1)[1].strip()
+                    elif line.startswith("## ") and not line.startswith("## Généralités"):
+                        break
+        except Exception as e:
+            log_warning(f"Impossible de lire {path}: {e}")
+            continue
+        if symbol:
+            notes.append({'symbol': symbol, 'exchange': exchange, 'path': path})
+    return notes
+
 
 def confirm_overwrite_if_exists(filename, date_creation):
     """
@@ -145,6 +198,19 @@ def confirm_overwrite_if_exists(filename, date_creation):
     if is_debug_enabled(): log_info("Aucune fiche existante, création nouvelle")
     return True, date_creation
 
+def extract_notes_section(content):
+    """
+    Extrait le contenu de la section 'Notes personnelles' d'une fiche existante.
+    Retourne None si absente ou si elle ne contient que le texte par défaut.
+    """
+    match = re.search(r"## Notes personnelles\s*([\s\S]*)\Z", content)
+    if not match:
+        return None
+    body = match.group(1).strip()
+    if not body or body == "*Ajoutez ici vos notes, analyses et réflexions sur cet ETF...*":
+        return None
+    return body
+
 def extract_creation_date(content):
     """
     Extrait la date de création depuis le contenu Markdown existant.
@@ -159,7 +225,8 @@ def extract_creation_date(content):
             )
     return None
 
-def write_to_obsidian(fund, yqfund, info, ticker_symbol):
+@traced("obsidian.write_to_obsidian")
+def write_to_obsidian(fund, yqfund, info, ticker_symbol, interactive=True, purchase_date=None):
     """
     Crée une fiche Markdown complète dans Obsidian pour un ETF
     
@@ -168,13 +235,29 @@ def write_to_obsidian(fund, yqfund, info, ticker_symbol):
         yqfund: objet yahooquery.Ticker
         info: dictionnaire des informations du ticker
         ticker_symbol: symbole du ticker
+        interactive: si False (mode daemon), aucune question n'est posée :
+            la fiche existante est mise à jour en conservant les champs saisis
+        purchase_date: date d'achat (YYYY-MM-DD) pour le yield on cost de la section Dividendes
     """
     
-    total_start = time.time()
+    total_start = time.perf_counter()
+    pending = {}
     
     try:
         # Récupération des éléments nécessaires pour créer la fiche Obsidian        
         symbol = info.get('symbol', ticker_symbol)
+
+        # Sections réseau lancées dès maintenant (en parallèle, et pendant les éventuelles
+        # questions d'édition) puis lues dans l'ordre de la fiche
+        dividend_yield = info.get('yield', info.get('trailingAnnualDividendYield', None))
+        pending = prefetch({
+            'hist_1y': lambda: get_history(fund, period='1y'),
+            'repartition': lambda: get_sector_weights(yqfund, ticker_symbol),
+            'top_holdings': lambda: get_top_holdings(yqfund, ticker_symbol),
+            'performance': lambda: compute_performance_and_stats(fund),
+            'ytd': lambda: compute_ytd_return(fund),
+            'dividendes': lambda: build_dividend_info(fund, dividend_yield, purchase_date),
+        })
         shortName = info.get('shortName', 'N/A')
         longName = info.get('longName', info.get('shortName', symbol))
         date_creation = datetime.now().strftime('%d/%m/%Y à %H:%M')
@@ -190,6 +273,10 @@ def write_to_obsidian(fund, yqfund, info, ticker_symbol):
         firstTrade = info.get('firstTradeDateEpochUtc', None)
         firstTradeDate = datetime.fromtimestamp(firstTrade).strftime('%d/%m/%Y') if firstTrade else 'N/A'
         isin = info.get('isin', 'N/A')
+        yahoo_values = {"indice_replique": indice_replique, "isin": isin, "firstTradeDate": firstTradeDate}
+
+        # Surcharges manuelles enregistrées (--apply-edits ou éditions précédentes)
+        overrides = get_overrides(symbol)
         
         # --- Gestion mise à jour inline de champs existants ---
         file_exists = os.path.exists(filename)
@@ -197,10 +284,9 @@ def write_to_obsidian(fund, yqfund, info, ticker_symbol):
         new_description = None
 
         if file_exists:
-            t_read = time.time()
-            with open(filename, "r", encoding="utf-8") as f:
-                old_content = f.read()
-            if is_debug_enabled(): log_debug(f"Durée lecture fiche existante: {time.time() - t_read:.2f}s")
+            with span("obsidian.lecture_fiche", ticker=symbol):
+                with open(filename, "r", encoding="utf-8") as f:
+                    old_content = f.read()
             lines = old_content.splitlines()
 
             fields_to_check = {
@@ -225,8 +311,8 @@ def write_to_obsidian(fund, yqfund, info, ticker_symbol):
             original_values["description"] = current_desc if current_desc else "Non disponible"
 
             import sys
-            edit_na_mode = ("--editna" in sys.argv)
-            edit_all_mode = ("--editall" in sys.argv)
+            edit_na_mode = interactive and ("--editna" in sys.argv)
+            edit_all_mode = interactive and ("--editall" in sys.argv)
 
             # --- Mode editall: proposer sélection des champs via menu ---
             if file_exists and edit_all_mode:
@@ -374,6 +460,9 @@ def write_to_obsidian(fund, yqfund, info, ticker_symbol):
             proceed = True
             original_creation_date = extract_creation_date(old_content)
             print("✅ Mise à jour des champs existants, sans écraser toute la fiche.")
+        elif file_exists and not interactive:
+            proceed = True
+            original_creation_date = extract_creation_date(old_content) or date_creation
         else:
             proceed, original_creation_date = confirm_overwrite_if_exists(filename, date_creation)
         
@@ -400,8 +489,7 @@ def write_to_obsidian(fund, yqfund, info, ticker_symbol):
         expenseRatio = info.get('annualReportExpenseRatio', info.get('expenseRatio', None))
         
         # Type d'ETF (distribution/capitalisation)
-        dividendYield = info.get('yield', info.get('trailingAnnualDividendYield', None))
-        etf_type = "Distribuant" if dividendYield and dividendYield > 0 else "Capitalisant"
+        etf_type = detect_distribution(info)
         
         # Détection de l'indice / ISIN / date déjà préparées en amont (et potentiellement éditées par l'utilisateur)
         # category, indice_replique, firstTradeDate, isin : conservés
@@ -420,7 +508,7 @@ def write_to_obsidian(fund, yqfund, info, ticker_symbol):
             businessSummary = new_description
 
         # --- Vérification et enrichissement manuel de la description (hors editall) ---
-        if file_exists and 'edit_all_mode' in locals() and not edit_all_mode:
+        if file_exists and interactive and 'edit_all_mode' in locals() and not edit_all_mode and "description" not in overrides:
             desc_pattern = re.search(r"## Description\s+([\s\S]+?)(?=## |\Z)", old_content)
             current_desc = None
             if desc_pattern:
@@ -438,72 +526,136 @@ def write_to_obsidian(fund, yqfund, info, ticker_symbol):
                     if lines:
                         businessSummary = "\n".join(lines)
                         user_modified = True
+
+        # --- Surcharges manuelles : les éditions de cette exécution et les corrections faites
+        #     à la main dans la fiche sont persistées, les surcharges priment ensuite sur Yahoo ---
+        yahoo_values["site_web"] = get_emetteur_url(fundFamily, longName)
+        yahoo_values["description"] = info.get('longBusinessSummary', info.get('description', 'Non disponible'))
+        if file_exists and overrides:
+            # Chaque écriture reporte la surcharge dans la fiche : une valeur différente
+            # a été corrigée dans Obsidian depuis, elle remplace la surcharge
+            in_note = read_note_fields(old_content)
+            hand_edited = {
+                key: in_note[key] for key, value in overrides.items()
+                if key in in_note and in_note[key] != str(value).strip()
+                and in_note[key] not in ("N/A", "Non renseigné", "Non disponible", "")
+            }
+            if hand_edited:
+                if is_debug_enabled(): log_info(f"Corrections manuelles de la fiche conservées: {sorted(hand_edited)}")
+                record_overrides({symbol: hand_edited})
+                overrides.update(hand_edited)
+        current_values = {
+            "indice_replique": indice_replique,
+            "isin": isin,
+            "firstTradeDate": firstTradeDate,
+            "site_web": site_web,
+            "description": businessSummary
+        }
+        if user_modified:
+            edited = {
+                key: value for key, value in current_values.items()
+                if value != yahoo_values[key] and value not in ("N/A", "Non renseigné", "Non disponible", "")
+            }
+            if edited:
+                record_overrides({symbol: edited})
+                overrides.update(edited)
+        if overrides:
+            if is_debug_enabled(): log_info(f"Surcharges appliquées: {sorted(overrides)}")
+            indice_replique = overrides.get("indice_replique", indice_replique)
+            isin = overrides.get("isin", isin)
+            firstTradeDate = overrides.get("firstTradeDate", firstTradeDate)
+            site_web = overrides.get("site_web", site_web)
+            businessSummary = overrides.get("description", businessSummary)
+
+        # ISIN de la fiche (éventuellement saisi à la main) : cotation retrouvable par ISIN
+        record_instrument(info, isin=isin if isin != "N/A" else None, source="obsidian")
         
-        # Répartition sectorielle
-        # Répartition sectorielle
-        t0 = time.time()
+        # Historique 1 an : récupéré une seule fois pour les performances et les graphiques
+        with span("obsidian.historique_1y", ticker=symbol) as sp:
+            try:
+                hist_1y = pending['hist_1y'].result()
+                sp.set(rows=len(hist_1y), bytes=int(hist_1y.memory_usage(index=True).sum()))
+            except Exception as e:
+                if is_debug_enabled(): log_warning(f"Historique 1 an indisponible - {e}")
+                hist_1y = None
+
+        # Graphiques rendus en arrière-plan pendant les autres récupérations
+        chart_files = []
         try:
-            repartition_fmt, rep_err = get_sector_weights(yqfund, ticker_symbol)
-            if rep_err:
-                print(f"{Fore.YELLOW}Attention: Répartition non disponible - {rep_err}{Style.RESET_ALL}")
-                if is_debug_enabled(): log_warning(f"Répartition non disponible - {rep_err}")
+            if hist_1y is not None and len(hist_1y) > 1:
+                chart_files = submit_charts(symbol, hist_1y['Close'], directory_name)
         except Exception as e:
-            print(f"{Fore.RED}Erreur lors de la récupération de la répartition sectorielle: {e}{Style.RESET_ALL}")
-            if is_debug_enabled(): log_error(f"Erreur répartition sectorielle: {e}")
-            repartition_fmt = "Non disponible"
-        finally:
-            if is_debug_enabled(): log_debug(f"Durée get_sector_weights: {time.time() - t0:.2f}s")
+            print(f"{Fore.YELLOW}Attention: graphiques non générés - {e}{Style.RESET_ALL}")
+            if is_debug_enabled(): log_warning(f"Graphiques non générés - {e}")
+
+        # Répartition sectorielle
+        with span("obsidian.sector_weights", ticker=symbol):
+            try:
+                repartition_fmt, rep_err = pending['repartition'].result()
+                if rep_err:
+                    print(f"{Fore.YELLOW}Attention: Répartition non disponible - {rep_err}{Style.RESET_ALL}")
+                    if is_debug_enabled(): log_warning(f"Répartition non disponible - {rep_err}")
+            except Exception as e:
+                print(f"{Fore.RED}Erreur lors de la récupération de la répartition sectorielle: {e}{Style.RESET_ALL}")
+                record_failure('fetch', symbol)
+                if is_debug_enabled(): log_error(f"Erreur répartition sectorielle: {e}")
+                repartition_fmt = "Non disponible"
 
         # Principales positions
-        t0 = time.time()
-        try:
-            top_holdings_fmt, th_err = get_top_holdings(yqfund, ticker_symbol)
-            if th_err:
-                print(f"{Fore.YELLOW}Attention: Holdings non disponibles - {th_err}{Style.RESET_ALL}")
-                if is_debug_enabled(): log_warning(f"Holdings non disponibles - {th_err}")
-        except Exception as e:
-            print(f"{Fore.RED}Erreur lors de la récupération des principales positions: {e}{Style.RESET_ALL}")
-            if is_debug_enabled(): log_error(f"Erreur principales positions: {e}")
-            top_holdings_fmt = "Non disponible"
-        finally:
-            if is_debug_enabled(): log_debug(f"Durée get_top_holdings: {time.time() - t0:.2f}s")
+        with span("obsidian.top_holdings", ticker=symbol):
+            try:
+                top_holdings_fmt, th_err = pending['top_holdings'].result()
+                if th_err:
+                    print(f"{Fore.YELLOW}Attention: Holdings non disponibles - {th_err}{Style.RESET_ALL}")
+                    if is_debug_enabled(): log_warning(f"Holdings non disponibles - {th_err}")
+            except Exception as e:
+                print(f"{Fore.RED}Erreur lors de la récupération des principales positions: {e}{Style.RESET_ALL}")
+                record_failure('fetch', symbol)
+                if is_debug_enabled(): log_error(f"Erreur principales positions: {e}")
+                top_holdings_fmt = "Non disponible"
 
         # Calcul de rendement sur 1 an (version complète avec statistiques)
-        t0 = time.time()
-        try:
-            rendement_data, stats_data = compute_performance_and_stats(fund)
-        except Exception as e:
-            print(f"{Fore.RED}Erreur lors du calcul des performances: {e}{Style.RESET_ALL}")
-            if is_debug_enabled(): log_error(f"Erreur calcul performances: {e}")
-            rendement_data, stats_data = {}, {}
-        finally:
-            if is_debug_enabled(): log_debug(f"Durée compute_performance_and_stats: {time.time() - t0:.2f}s")
+        with span("obsidian.performance", ticker=symbol):
+            try:
+                rendement_data, stats_data = pending['performance'].result()
+            except Exception as e:
+                print(f"{Fore.RED}Erreur lors du calcul des performances: {e}{Style.RESET_ALL}")
+                record_failure('compute', symbol)
+                if is_debug_enabled(): log_error(f"Erreur calcul performances: {e}")
+                rendement_data, stats_data = {}, {}
 
         # YTD (rendement depuis le début de l'année)
-        t0 = time.time()
-        try:
-            ytd_rendement = compute_ytd_return(fund)
-        except Exception as e:
-            print(f"{Fore.RED}Erreur lors du calcul YTD: {e}{Style.RESET_ALL}")
-            if is_debug_enabled(): log_error(f"Erreur calcul YTD: {e}")
-            ytd_rendement = None
-        finally:
-            if is_debug_enabled(): log_debug(f"Durée compute_ytd_return: {time.time() - t0:.2f}s")
+        with span("obsidian.ytd", ticker=symbol):
+            try:
+                ytd_rendement = pending['ytd'].result()
+            except Exception as e:
+                print(f"{Fore.RED}Erreur lors du calcul YTD: {e}{Style.RESET_ALL}")
+                record_failure('compute', symbol)
+                if is_debug_enabled(): log_error(f"Erreur calcul YTD: {e}")
+                ytd_rendement = None
 
         # Dividendes
-        t0 = time.time()
-        try:
-            dividend_info = build_dividend_info(fund, dividendYield)
-        except Exception as e:
-            print(f"{Fore.RED}Erreur lors de la récupération des dividendes: {e}{Style.RESET_ALL}")
-            if is_debug_enabled(): log_error(f"Erreur récupération dividendes: {e}")
-            dividend_info = {}
-        finally:
-            if is_debug_enabled(): log_debug(f"Durée build_dividend_info: {time.time() - t0:.2f}s")
+        with span("obsidian.dividendes", ticker=symbol):
+            try:
+                dividend_info = pending['dividendes'].result()
+            except Exception as e:
+                print(f"{Fore.RED}Erreur lors de la récupération des dividendes: {e}{Style.RESET_ALL}")
+                record_failure('compute', symbol)
+                if is_debug_enabled(): log_error(f"Erreur récupération dividendes: {e}")
+                dividend_info = {}
         
-        t_write = time.time()
-        t0 = time.time()
-        with open(filename, "w", encoding='utf-8') as file:
+        # Historique : ajout de la mesure du jour puis lecture des colonnes affichées
+        history = None
+        with span("obsidian.historique_indicateurs", ticker=symbol):
+            try:
+                if rendement_data:
+                    append_snapshot(symbol, build_snapshot(rendement_data, stats_data, info, ytd_rendement))
+                history = load_history(symbol, columns=['prix', 'rendement_total', 'volatilite', 'sharpe', 'aum', 'ter'])
+            except Exception as e:
+                print(f"{Fore.YELLOW}Attention: historique des indicateurs indisponible - {e}{Style.RESET_ALL}")
+                if is_debug_enabled(): log_warning(f"Historique indisponible - {e}")
+
+        with span("obsidian.ecriture", ticker=symbol), open(filename, "w", encoding='utf-8') as file:
             # En-tête et sections Markdown
             write_header(file, symbol_as_tag, original_creation_date, date_creation)
             
@@ -546,6 +698,8 @@ def write_to_obsidian(fund, yqfund, info, ticker_symbol):
                             
             # 4. Performance
             write_performance_section(file, rendement_data, stats_data, ytd_rendement, currency)
+            write_charts_section(file, chart_files)
+            write_history_section(file, history)
             
             # 5. Dividendes
             if dividend_info:
@@ -557,28 +711,141 @@ def write_to_obsidian(fund, yqfund, info, ticker_symbol):
             # 7. Principales positions
             write_holdings_section(file, top_holdings_fmt)
             
-            # 8. Notes personnelles
-            write_notes_section(file)
-        if is_debug_enabled(): log_debug(f"Durée écriture Markdown: {time.time() - t0:.2f}s")
-        if is_debug_enabled(): log_debug(f"Durée écriture fiche Obsidian: {time.time() - t_write:.2f}s")
+            # 8. Notes personnelles (conservées lors d'une mise à jour)
+            write_notes_section(file, extract_notes_section(old_content) if file_exists else None)
         
+        inc('etfinfo_notes_written_total')
         print(f"{Fore.WHITE}✓ Fiche Obsidian créée : {Style.RESET_ALL}{Fore.GREEN}{longName}.md{Style.RESET_ALL}")
         print(f"{Fore.WHITE}📁 Emplacement : {Style.RESET_ALL}{Fore.GREEN}{directory_name}{Style.RESET_ALL}")
-        total_time = time.time() - total_start
+        total_time = time.perf_counter() - total_start
         if is_debug_enabled():
             log_info(f"Fiche créée: {filename}")
-            log_info(f"Durée totale génération fiche {symbol}: {total_time:.2f}s")
             print(f"{Fore.CYAN}⏱  Durée totale (debug): {total_time:.2f} secondes{Style.RESET_ALL}")
     
     except Exception as e:
+        record_failure('write', ticker_symbol)
         print(f"{Fore.RED}✗ Erreur lors de la création de la fiche Obsidian: {e}{Style.RESET_ALL}")
         if is_debug_enabled(): log_exception("Erreur lors de la création de la fiche Obsidian")
         import traceback
         traceback.print_exc()
+    finally:
+        # Fiche abandonnée (écrasement refusé, erreur) : ne pas lancer les récupérations restantes
+        for future in pending.values():
+            future.cancel()
     
     return
 
 
+def apply_edits_to_content(content, fields):
+    """
+    Applique des valeurs de champs au contenu Markdown d'une fiche, sans réseau.
+
+    Args:
+        content: contenu de la fiche
+        fields: dict {champ: valeur} (clés de OVERRIDE_FIELDS)
+
+    Returns:
+        str: contenu mis à jour (inchangé si aucun champ ne change)
+    """
+    original = content
+    for field, value in fields.items():
+        if field == "description":
+            content = re.sub(
+                r"## Description\s+[\s\S]*?(?=\n## |\Z)",
+                lambda m: f"## Description\n\n{value}\n",
+                content,
+                count=1
+            )
+            continue
+        label = OVERRIDE_FIELDS[field]
+        content = re.sub(
+            rf"^- \*\*{re.escape(label)}\*\* :.*$",
+            lambda m: f"- **{label}** : {value}",
+            content,
+            count=1,
+            flags=re.MULTILINE | re.IGNORECASE
+        )
+    # Date de mise à jour changée seulement si un champ a réellement changé
+    return touch_last_update(content) if content != original else content
+
+def touch_last_update(content):
+    """Met la date 'Dernière mise à jour' d'une fiche à maintenant"""
+    new_modif = datetime.now().strftime('%d/%m/%Y à %H:%M')
+    return re.sub(
+        r"\*\*Dernière mise à jour :\*\* .*",
+        lambda m: f"**Dernière mise à jour :** {new_modif}",
+        content
+    )
+
+def read_note_fields(content):
+    """
+    Valeurs actuelles des champs surchargeables d'une fiche, sans réseau.
+
+    Args:
+        content: contenu de la fiche
+
+    Returns:
+        dict {champ: valeur} des champs présents dans la fiche
+    """
+    values = {}
+    for field, label in OVERRIDE_FIELDS.items():
+        if field == "description":
+            match = re.search(r"## Description\s+([\s\S]*?)(?=\n## |\Z)", content)
+        else:
+            match = re.search(rf"^- \*\*{re.escape(label)}\*\* :(.*)$", content, flags=re.MULTILINE | re.IGNORECASE)
+        if match:
+            values[field] = match.group(1).strip()
+    return values
+
+def apply_edits_file(path):
+    """
+    Applique un fichier de modifications (CSV/YAML indexé par symbole) à toutes
+    les fiches concernées en une seule passe, sans accès réseau. Les valeurs sont
+    aussi enregistrées comme surcharges pour les prochaines mises à jour.
+
+    Args:
+        path: chemin du fichier de modifications
+
+    Returns:
+        int: code de sortie (0 = OK)
+    """
+    try:
+        edits = load_patch_file(path)
+    except (OSError, ValueError) as e:
+        print(f"{Fore.RED}✗ Fichier de modifications invalide : {e}{Style.RESET_ALL}")
+        if is_debug_enabled(): log_error(f"apply_edits_file: {e}")
+        return 1
+    if not edits:
+        print(f"{Fore.YELLOW}Aucune modification trouvée dans {path}.{Style.RESET_ALL}")
+        return 0
+
+    record_overrides(edits)
+
+    notes = {note['symbol']: note['path'] for note in list_vault_notes()}
+    updated = 0
+    missing = []
+    for symbol, fields in edits.items():
+        note_path = notes.get(symbol)
+        if not note_path:
+            missing.append(symbol)
+            continue
+        with open(note_path, "r", encoding="utf-8") as f:
+            content = f.read()
+        new_content = apply_edits_to_content(content, fields)
+        if new_content != content:
+            with open(note_path, "w", encoding="utf-8") as f:
+                f.write(new_content)
+            updated += 1
+            inc('etfinfo_notes_written_total')
+            print(f"{Fore.GREEN}✓ {symbol}{Style.RESET_ALL} : {', '.join(OVERRIDE_FIELDS[k] for k in fields)}")
+
+    print(f"{Fore.WHITE}✓ {updated} fiche(s) mise(s) à jour, {len(edits)} surcharge(s) enregistrée(s){Style.RESET_ALL}")
+    if missing:
+        print(f"{Fore.YELLOW}Sans fiche (appliqué à la prochaine création) : {', '.join(missing)}{Style.RESET_ALL}")
+    if is_debug_enabled(): log_info(f"apply_edits_file: {updated} fiches mises à jour, sans fiche: {missing}")
+    return 0
+
+
 # --- Nouvelle fonction : ajout de note personnelle à une fiche Obsidian existante ---
 def append_obsidian_note(ticker_symbol):
     """
@@ -591,17 +858,7 @@ def append_obsidian_note(ticker_symbol):
 
     try:
         # Déterminer le bon répertoire (mode test ou Vault principal)
-        repo_root = os.path.dirname(os.path.abspath(__file__))
-        test_flag = os.path.join(repo_root, ".obsidian_test_mode")
-
-        home_directory = os.path.expanduser("~")
-        if os.path.exists(test_flag):
-            obsidian_directory = os.path.join(home_directory, "ObsidianTest/ETF")
-        else:
-            obsidian_directory = os.path.join(
-                home_directory,
-                "Library/Mobile Documents/iCloud~md~obsidian/Documents/Invest/8 ETF"
-            )
+        obsidian_directory = get_obsidian_directory()
 
         filename = None
         search_pattern = f"**Symbole** : {ticker_symbol}"
@@ -682,6 +939,7 @@ def append_obsidian_note(ticker_symbol):
         # Écriture finale
         with open(filename, "w", encoding="utf-8") as f:
             f.write(content)
+        inc('etfinfo_notes_written_total')
         print(f"{Fore.WHITE}✓ Note ajoutée dans : {Style.RESET_ALL}{Fore.GREEN}{os.path.basename(filename)}{Style.RESET_ALL}")
         print(f"{Fore.WHITE}📁 Emplacement : {Style.RESET_ALL}{Fore.GREEN}{os.path.dirname(filename)}{Style.RESET_ALL}")
 
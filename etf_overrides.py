@@ -0,0 +1,145 @@
+#!/usr/bin/python3
+# etf_overrides.py - Valeurs saisies manuellement par ETF (persistées hors des fiches)
+
+import os
+import csv
+import json
+from etf_utils import get_data_dir
+from etf_logging import log_debug, log_info, log_warning, is_debug_enabled
+
+# Champs surchargeables -> libellé dans la fiche Obsidian
+OVERRIDE_FIELDS = {
+    "indice_replique": "Indice répliqué",
+    "isin": "ISIN",
+    "firstTradeDate": "Date de création ETF",
+    "site_web": "Site web",
+    "description": "Description",
+}
+
+# Alias acceptés dans les fichiers de modifications (clé en minuscules)
+_ALIASES = {label.lower(): key for key, label in OVERRIDE_FIELDS.items()}
+_ALIASES.update({key.lower(): key for key in OVERRIDE_FIELDS})
+_ALIASES.update({"indice": "indice_replique", "site": "site_web", "date_creation": "firstTradeDate"})
+
+_cache = None
+
+def _store_path():
+    return os.path.join(get_data_dir(), "overrides.json")
+
+def load_overrides():
+    """
+    Charge toutes les surcharges enregistrées
+
+    Returns:
+        dict {symbole: {champ: valeur}}
+    """
+    global _cache
+    if _cache is None:
+        path = _store_path()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                _cache = json.load(f)
+        except FileNotFoundError:
+            _cache = {}
+        except Exception as e:
+            log_warning(f"Surcharges illisibles ({path}): {e}")
+            _cache = {}
+    return _cache
+
+def get_overrides(symbol):
+    """Retourne les surcharges d'un ETF (dict vide si aucune)"""
+    return dict(load_overrides().get(symbol, {}))
+
+def record_overrides(edits):
+    """
+    Enregistre des surcharges (fusionnées avec les valeurs existantes)
+
+    Args:
+        edits: dict {symbole: {champ: valeur}}
+    """
+    store = load_overrides()
+    for symbol, fields in edits.items():
+        if fields:
+            store.setdefault(symbol, {}).update(fields)
+
+    # Écriture atomique
+    path = _store_path()
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(store, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+    if is_debug_enabled(): log_debug(f"record_overrides: {len(edits)} ETF enregistrés dans {path}")
+
+def normalize_value(field, value):
+    """
+    Normalise une valeur saisie (dates ISO -> dd/mm/yyyy, URL nue -> lien Markdown)
+    """
+    value = str(value).strip()
+    if field == "firstTradeDate" and "-" in value:
+        try:
+            y, m, d = value.split("-")
+            return f"{d}/{m}/{y}"
+        except ValueError:
+            return value
+    if field == "site_web" and value.startswith(("http://", "https://")):
+        return f"[Site web]({value})"
+    return value
+
+def _normalize_record(symbol, fields, source):
+    """Convertit les colonnes/clés d'un enregistrement en champs connus"""
+    normalized = {}
+    for key, value in fields.items():
+        if key is None or value is None or str(value).strip() == "":
+            continue
+        field = _ALIASES.get(str(key).strip().lower())
+        if field is None:
+            log_warning(f"{source}: champ inconnu '{key}' ignoré pour {symbol}")
+            continue
+        normalized[field] = normalize_value(field, value)
+    return normalized
+
+def load_patch_file(path):
+    """
+    Lit un fichier de modifications CSV ou YAML indexé par symbole
+
+    CSV : une colonne 'symbol' puis une colonne par champ (isin, indice_replique,
+    firstTradeDate, site_web, description). Cellule vide = champ inchangé.
+    YAML : {symbole: {champ: valeur}}.
+
+    Returns:
+        dict {symbole: {champ: valeur}}
+
+    Raises:
+        ValueError: format non reconnu ou colonne 'symbol' absente
+    """
+    ext = os.path.splitext(path)[1].lower()
+    edits = {}
+
+    if ext in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError("PyYAML n'est pas installé (pip install pyyaml), utilise un fichier CSV")
+        with open(path, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+        if not isinstance(data, dict):
+            raise ValueError("le fichier YAML doit contenir un dictionnaire {symbole: {champ: valeur}}")
+        for symbol, fields in data.items():
+            if isinstance(fields, dict):
+                edits[str(symbol).strip()] = _normalize_record(symbol, fields, path)
+
+    elif ext == ".csv":
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            reader = csv.DictReader(f)
+            symbol_col = next((c for c in (reader.fieldnames or []) if c.strip().lower() in ("symbol", "symbole", "ticker")), None)
+            if symbol_col is None:
+                raise ValueError("colonne 'symbol' absente du fichier CSV")
+            for row in reader:
+                symbol = (row.pop(symbol_col) or "").strip()
+                if symbol:
+                    edits.setdefault(symbol, {}).update(_normalize_record(symbol, row, path))
+    else:
+        raise ValueError(f"format non reconnu '{ext}' (attendu: .csv, .yaml, .yml)")
+
+    if is_debug_enabled(): log_info(f"load_patch_file: {len(edits)} ETF lus depuis {path}")
+    return {symbol: fields for symbol, fields in edits.items() if fields}
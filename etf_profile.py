@@ -0,0 +1,224 @@
+#!/usr/bin/python3
+# etf_profile.py - Profilage d'une commande : temps (--profile, cProfile + échantillonnage) et mémoire (--memprofile)
+
+import os
+import sys
+import time
+import pstats
+import cProfile
+import tracemalloc
+import threading
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from colorama import Fore, Style
+from etf_logging import log_info, is_debug_enabled, enable_memory_tracking, get_memory_peaks
+
+# Répertoire du projet : les fichiers qui s'y trouvent sont « nos modules »
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Groupes de bibliothèques affichés séparément (nom du groupe -> paquets)
+LIBRARY_GROUPS = {
+    'yfinance': ('yfinance',),
+    'yahooquery': ('yahooquery',),
+    'pandas/numpy': ('pandas', 'numpy'),
+}
+
+# Intervalle d'échantillonnage des piles (secondes)
+SAMPLE_INTERVAL = 0.005
+
+# Nombre de fonctions affichées par groupe
+TOP_N = 8
+
+
+class StackSampler(threading.Thread):
+    """Échantillonne périodiquement les piles de tous les threads (format « collapsed stacks »)"""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        super().__init__(name="etfinfo-profiler", daemon=True)
+        self.interval = interval
+        self.samples = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stop_event.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if thread_id not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{_module_name(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def write_collapsed(self, path):
+        """Écrit les piles au format attendu par flamegraph.pl / speedscope"""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def _module_name(filename):
+    """Nom court d'un fichier source pour les piles (module du projet ou chemin relatif au paquet)"""
+    parts = filename.replace('\\', '/').split('/')
+    for marker in ('site-packages', 'dist-packages'):
+        if marker in parts:
+            return '.'.join(parts[parts.index(marker) + 1:]).removesuffix('.py')
+    return os.path.splitext(os.path.basename(filename))[0]
+
+
+def classify(filename):
+    """
+    Groupe d'une fonction profilée
+
+    Returns:
+        str: 'etfinfo', un groupe de LIBRARY_GROUPS, ou 'autres'
+    """
+    # Modules du projet : fichiers à la racine du dépôt (un venv créé dans le dépôt n'en fait pas partie)
+    if os.path.dirname(filename) == PROJECT_DIR:
+        return 'etfinfo'
+    normalized = filename.replace('\\', '/')
+    for group, packages in LIBRARY_GROUPS.items():
+        if any(f"/{package}/" in normalized for package in packages):
+            return group
+    return 'autres'
+
+
+def hotspots(stats, top=TOP_N):
+    """
+    Fonctions les plus coûteuses (temps cumulé) par groupe
+
+    Args:
+        stats: pstats.Stats
+        top: nombre de fonctions par groupe
+
+    Returns:
+        dict {groupe: [(fonction, appels, temps propre, temps cumulé), ...]}
+    """
+    groups = {}
+    for (filename, line, name), (cc, nc, tt, ct, callers) in stats.stats.items():
+        if filename == '~':
+            continue
+        label = f"{_module_name(filename)}:{name}:{line}"
+        groups.setdefault(classify(filename), []).append((label, nc, tt, ct))
+    return {group: sorted(rows, key=lambda row: -row[3])[:top] for group, rows in groups.items()}
+
+
+def print_hotspots(stats, total):
+    """Affiche les points chauds séparés entre nos modules et les bibliothèques"""
+    print(f"\n{Style.BRIGHT}{Fore.CYAN}🔥 Profil : {total:.2f} s au total{Style.RESET_ALL}")
+    by_group = hotspots(stats)
+    for group in ['etfinfo'] + list(LIBRARY_GROUPS) + ['autres']:
+        rows = by_group.get(group)
+        if not rows:
+            continue
+        print(f"\n{Style.BRIGHT}{group}{Style.RESET_ALL}")
+        print(f"{Style.DIM}{'Fonction':<60} {'Appels':>8} {'Propre':>9} {'Cumulé':>9}{Style.RESET_ALL}")
+        for label, calls, own, cumulative in rows:
+            print(f"{label[:60]:<60} {calls:>8} {own:>8.3f}s {cumulative:>8.3f}s")
+
+
+@contextmanager
+def _profile(prefix):
+    profiler = cProfile.Profile()
+    sampler = StackSampler()
+    sampler.start()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        total = time.perf_counter() - start
+        sampler.stop()
+
+        pstats_path = f"{prefix}.pstats"
+        collapsed_path = f"{prefix}.collapsed"
+        profiler.dump_stats(pstats_path)
+        sampler.write_collapsed(collapsed_path)
+        print_hotspots(pstats.Stats(profiler), total)
+        print(f"\n🔥 Profil écrit : {pstats_path} (snakeviz, pstats) et {collapsed_path} "
+              f"({sum(sampler.samples.values())} échantillons, flamegraph.pl / speedscope)")
+        if is_debug_enabled(): log_info(f"Profil écrit dans {pstats_path} et {collapsed_path}")
+
+
+def profiled(prefix):
+    """
+    Context manager profilant le bloc exécuté (inactif si prefix est None)
+
+    Args:
+        prefix: préfixe des fichiers produits (<prefix>.pstats et <prefix>.collapsed)
+    """
+    return _profile(prefix) if prefix else nullcontext()
+
+
+def _mb(size):
+    return f"{size / (1024 * 1024):>9.1f} Mo"
+
+
+def print_memory_report(peaks, total_peak, top=TOP_N * 2):
+    """
+    Affiche les pics mémoire par étape puis par ticker
+
+    Args:
+        peaks: liste (étape, ticker, octets) de get_memory_peaks()
+        total_peak: pic global de l'exécution (octets)
+        top: nombre d'étapes affichées
+    """
+    by_stage = {}
+    by_ticker = {}
+    for name, ticker, size in peaks:
+        count, peak = by_stage.get(name, (0, 0))
+        by_stage[name] = (count + 1, max(peak, size))
+        if ticker:
+            by_ticker[ticker] = max(by_ticker.get(ticker, 0), size)
+
+    print(f"\n{Style.BRIGHT}{Fore.CYAN}🧠 Mémoire : pic de {total_peak / (1024 * 1024):.1f} Mo{Style.RESET_ALL}")
+    if by_stage:
+        print(f"\n{Style.BRIGHT}{'Étape':<50} {'Appels':>7} {'Pic':>12}{Style.RESET_ALL}")
+        for name, (count, peak) in sorted(by_stage.items(), key=lambda item: -item[1][1])[:top]:
+            print(f"{name:<50} {count:>7} {_mb(peak)}")
+    if by_ticker:
+        print(f"\n{Style.BRIGHT}{'Ticker':<50} {'':>7} {'Pic':>12}{Style.RESET_ALL}")
+        for ticker, peak in sorted(by_ticker.items(), key=lambda item: -item[1]):
+            print(f"{ticker:<50} {'':>7} {_mb(peak)}")
+
+
+@contextmanager
+def _memprofile():
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start()
+    enable_memory_tracking()
+    tracemalloc.reset_peak()
+    start = tracemalloc.get_traced_memory()[0]
+    try:
+        yield
+    finally:
+        peaks = get_memory_peaks()
+        total_peak = max([size for _, _, size in peaks] + [tracemalloc.get_traced_memory()[1] - start])
+        if not already_tracing:
+            tracemalloc.stop()
+        print_memory_report(peaks, total_peak)
+        if is_debug_enabled(): log_info(f"Pic mémoire: {total_peak} octets, {len(peaks)} spans mesurés")
+
+
+def memprofiled(enabled):
+    """
+    Context manager mesurant le pic mémoire (tracemalloc) de chaque étape et de chaque ticker
+
+    Les étapes sont les spans (voir etf_logging.span) : le rapport est affiché à la sortie du bloc.
+
+    Args:
+        enabled: False = inactif
+    """
+    return _memprofile() if enabled else nullcontext()
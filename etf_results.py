@@ -0,0 +1,235 @@
+#!/usr/bin/python3
+# etf_results.py - Résultats typés des commandes et sérialisation JSON / NDJSON (--format)
+
+import json
+import math
+from dataclasses import dataclass, field, fields, is_dataclass
+from typing import Optional
+
+# orjson (optionnel) : sérialisation nettement plus rapide pour les gros lots
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+FORMATS = ('text', 'json', 'ndjson')
+
+# Version du schéma des enregistrements (à incrémenter si un champ change de sens)
+SCHEMA_VERSION = 1
+
+
+@dataclass
+class BasicInfo:
+    """Identification de l'ETF (--summary, --financials, ... et affichage par défaut)"""
+    symbol: str
+    short_name: Optional[str] = None
+    long_name: Optional[str] = None
+    fund_family: Optional[str] = None
+    exchange: Optional[str] = None
+    quote_type: Optional[str] = None
+    currency: Optional[str] = None
+
+
+@dataclass
+class Financials:
+    """Données financières (--financials)"""
+    current_price: Optional[float] = None
+    previous_close: Optional[float] = None
+    fifty_two_week_low: Optional[float] = None
+    fifty_two_week_high: Optional[float] = None
+    fifty_day_average: Optional[float] = None
+    two_hundred_day_average: Optional[float] = None
+    volume: Optional[float] = None
+    total_assets: Optional[float] = None
+    expense_ratio: Optional[float] = None
+
+
+@dataclass
+class Weight:
+    """Ligne de répartition : secteur ou position, poids en %"""
+    name: str
+    weight: Optional[float]
+    symbol: Optional[str] = None
+
+
+@dataclass
+class BenchmarkComparison:
+    """Comparaison avec un benchmark (--benchmark)"""
+    ticker: str
+    rendement_total: Optional[float] = None
+    difference: Optional[float] = None
+    beta: Optional[float] = None
+    correlation: Optional[float] = None
+    erreur: Optional[str] = None
+
+
+@dataclass
+class Rendement:
+    """Analyse de rendement sur une période (--rendement)"""
+    periode: str
+    date_debut: str
+    date_fin: str
+    nb_jours: int
+    prix_debut: float
+    prix_fin: float
+    total_dividendes: float = 0.0
+    nb_dividendes: int = 0
+    rendement_prix: Optional[float] = None
+    rendement_total: Optional[float] = None
+    rendement_annualise: Optional[float] = None
+    volatilite: Optional[float] = None
+    max_drawdown: Optional[float] = None
+    date_max_drawdown: Optional[str] = None
+    sharpe: Optional[float] = None
+    sortino: Optional[float] = None
+    calmar: Optional[float] = None
+    prix_min: Optional[float] = None
+    prix_max: Optional[float] = None
+    prix_moyen: Optional[float] = None
+    jours_positifs: int = 0
+    jours_negatifs: int = 0
+    meilleur_jour: Optional[float] = None
+    pire_jour: Optional[float] = None
+    benchmark: Optional[BenchmarkComparison] = None
+
+
+@dataclass
+class PricePoint:
+    """Cours d'une séance (--history)"""
+    date: str
+    open: Optional[float]
+    high: Optional[float]
+    low: Optional[float]
+    close: Optional[float]
+    volume: Optional[float]
+
+
+@dataclass
+class TickerReport:
+    """Enregistrement complet d'un ticker : une ligne en NDJSON"""
+    ticker: str
+    basic: Optional[BasicInfo] = None
+    financials: Optional[Financials] = None
+    summary: Optional[str] = None
+    repartition: Optional[list] = None
+    top_holdings: Optional[list] = None
+    history: Optional[list] = None
+    rendement: Optional[Rendement] = None
+    raw: Optional[dict] = None
+    erreur: Optional[str] = None
+    schema: int = SCHEMA_VERSION
+
+
+@dataclass
+class ComparedFund:
+    """Un ETF du tableau de comparaison (--compare)"""
+    ticker: str
+    rang: int
+    nom: Optional[str] = None
+    rendement: Optional[Rendement] = None
+
+
+@dataclass
+class ComparisonReport:
+    """Comparaison de plusieurs ETF sur une période commune (--compare)"""
+    periode: str
+    date_debut: Optional[str] = None
+    date_fin: Optional[str] = None
+    fonds: list = field(default_factory=list)
+    correlations: Optional[dict] = None
+    erreurs: Optional[dict] = None
+    schema: int = SCHEMA_VERSION
+
+
+@dataclass
+class LiveQuote:
+    """Indicateurs intrajournaliers d'un ticker en continu (--live)"""
+    ticker: str
+    heure: str
+    cours: float
+    nb_ticks: int
+    variation_jour: Optional[float] = None
+    vwap: Optional[float] = None
+    volume: Optional[float] = None
+    volatilite_realisee: Optional[float] = None
+    volatilite_fenetre: Optional[float] = None
+    schema: int = SCHEMA_VERSION
+
+
+def to_float(value):
+    """Convertit une valeur Yahoo/numpy en float Python (None si absente ou non finie)"""
+    if value is None or isinstance(value, (str, bool)):
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if math.isfinite(value) else None
+
+
+def to_dict(obj):
+    """
+    Convertit un résultat en structures JSON (sans copie profonde, champs None omis)
+
+    Args:
+        obj: dataclass, liste ou valeur simple
+
+    Returns:
+        dict / list / valeur
+    """
+    if is_dataclass(obj):
+        result = {}
+        for f in fields(obj):
+            value = getattr(obj, f.name)
+            if value is not None:
+                result[f.name] = to_dict(value)
+        return result
+    if isinstance(obj, (list, tuple)):
+        return [to_dict(item) for item in obj]
+    if isinstance(obj, dict):
+        return {str(k): to_dict(v) for k, v in obj.items()}
+    if isinstance(obj, float) and not math.isfinite(obj):
+        return None
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    # Scalaires numpy, Timestamp, ... (données brutes de --raw)
+    number = to_float(obj)
+    return number if number is not None else str(obj)
+
+
+def dumps(record):
+    """Sérialise un enregistrement sur une ligne (orjson si disponible)"""
+    data = to_dict(record)
+    if orjson is not None:
+        return orjson.dumps(data).decode()
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+class ResultWriter:
+    """
+    Écrit les enregistrements au fil de l'eau
+
+    ndjson : une ligne par ticker ; json : un tableau (un objet seul pour un unique ticker).
+    """
+
+    def __init__(self, stream, output_format, single=False):
+        self.stream = stream
+        self.format = output_format
+        self.single = single
+        self.count = 0
+
+    def write(self, record):
+        line = dumps(record)
+        if self.format == 'ndjson':
+            self.stream.write(line + '\n')
+        elif self.single:
+            self.stream.write(line + '\n')
+        else:
+            self.stream.write(('[\n' if self.count == 0 else ',\n') + line)
+        self.stream.flush()
+        self.count += 1
+
+    def close(self):
+        if self.format == 'json' and not self.single:
+            self.stream.write('\n]\n' if self.count else '[]\n')
+            self.stream.flush()
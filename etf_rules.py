@@ -0,0 +1,176 @@
+#!/usr/bin/python3
+# etf_rules.py - Classification des ETF (indice répliqué, émetteur) à partir de etf_rules.json
+
+import os
+import re
+import json
+import threading
+from etf_logging import log_info, log_warning, log_debug, is_debug_enabled
+
+# Règles livrées avec etfinfo ; un fichier du même nom dans le répertoire de données
+# ajoute des règles prioritaires (ex: nouveaux indices) sans modifier le code
+RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "etf_rules.json")
+
+NON_IDENTIFIE = "Non identifié"
+
+# Nombre maximum de textes mémorisés par RuleMatcher
+CACHE_SIZE = 50_000
+
+_lock = threading.Lock()
+_matchers = None
+
+
+class RuleMatcher:
+    """
+    Toutes les règles d'une catégorie compilées en une seule expression régulière
+
+    Un motif est recherché comme sous-chaîne (texte en minuscules) ; quand plusieurs règles
+    correspondent, la première dans l'ordre du fichier l'emporte, quelle que soit la position
+    du motif dans le texte.
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.priority = {}
+        for index, rule in enumerate(rules):
+            for pattern in rule['patterns']:
+                self.priority.setdefault(pattern, index)
+        # Motifs triés par priorité : à une position donnée, la règle prioritaire est essayée d'abord
+        patterns = sorted(self.priority, key=lambda p: (self.priority[p], -len(p)))
+        self.regex = re.compile("|".join(re.escape(p) for p in patterns)) if patterns else None
+        # Textes déjà classés (catégories Yahoo, familles de fonds : peu de valeurs distinctes)
+        self._cache = {}
+
+    def best_priority(self, text):
+        """
+        Priorité de la meilleure règle trouvée dans un texte (None si aucune)
+
+        La recherche reprend juste après le début de chaque correspondance : les motifs
+        qui se chevauchent (ex: "msci europe 600") sont tous examinés.
+        """
+        if text in self._cache:
+            return self._cache[text]
+        best = None
+        search = self.regex.search
+        m = search(text)
+        while m is not None:
+            priority = self.priority[m.group()]
+            if best is None or priority < best:
+                best = priority
+                if best == 0:
+                    break
+            m = search(text, m.start() + 1)
+        if len(self._cache) >= CACHE_SIZE:
+            self._cache.clear()
+        self._cache[text] = best
+        return best
+
+    def match(self, *texts):
+        """
+        Règle correspondant aux textes donnés
+
+        Args:
+            texts: textes déjà en minuscules (nom, catégorie...)
+
+        Returns:
+            dict de la règle, ou None
+        """
+        if self.regex is None:
+            return None
+        best = None
+        for text in texts:
+            if text:
+                priority = self.best_priority(text)
+                if priority is not None and (best is None or priority < best):
+                    best = priority
+        return None if best is None else self.rules[best]
+
+
+def _read_rules(path):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    rules = {}
+    for category in ("indices", "emetteurs"):
+        rules[category] = [
+            dict(rule, patterns=[p.lower() for p in rule.get("patterns", []) if p])
+            for rule in data.get(category, []) if rule.get("name")
+        ]
+    return rules
+
+
+def load_rules():
+    """
+    Compile les règles (une seule fois par processus)
+
+    Returns:
+        dict {'indices': RuleMatcher, 'emetteurs': RuleMatcher}
+    """
+    global _matchers
+    if _matchers is not None:
+        return _matchers
+    with _lock:
+        if _matchers is None:
+            from etf_utils import get_data_dir
+            rules = _read_rules(RULES_FILE)
+            user_file = os.path.join(get_data_dir(), os.path.basename(RULES_FILE))
+            if os.path.exists(user_file):
+                try:
+                    user_rules = _read_rules(user_file)
+                    for category in rules:
+                        rules[category] = user_rules[category] + rules[category]
+                    log_info(f"Règles personnelles chargées depuis {user_file}")
+                except (OSError, ValueError) as e:
+                    log_warning(f"Règles personnelles ignorées ({user_file}) : {e}")
+            _matchers = {category: RuleMatcher(items) for category, items in rules.items()}
+            if is_debug_enabled(): log_debug("rules: %d indices, %d émetteurs compilés",
+                                             len(rules['indices']), len(rules['emetteurs']))
+    return _matchers
+
+
+def classify_indice(long_name, category=''):
+    """Nom de l'indice répliqué, ou "Non identifié" (voir etf_utils.detect_indice)"""
+    rule = load_rules()['indices'].match((long_name or '').lower(), (category or '').lower())
+    return rule['name'] if rule else NON_IDENTIFIE
+
+
+def classify_emetteur(fund_family, long_name=''):
+    """
+    Lien Markdown vers le site de l'émetteur (voir etf_utils.get_emetteur_url)
+
+    Returns:
+        str: "[Nom](url)" ou message à compléter
+    """
+    if not fund_family or fund_family == '<non présent>':
+        return "[A compléter - émetteur non reconnu]()"
+    rule = load_rules()['emetteurs'].match(fund_family.lower())
+    if rule is None:
+        return f"[A compléter - {fund_family}]()"
+    url = rule.get('url', '').replace('{nom}', (long_name or '').replace(' ', '%20'))
+    return f"[{rule['name']}]({url})"
+
+
+def classify_many(infos):
+    """
+    Classe un lot d'ETF (univers du screener, vault complet...)
+
+    Les combinaisons nom / catégorie / famille déjà vues ne sont pas réévaluées.
+
+    Args:
+        infos: itérable de dictionnaires info Yahoo (longName, category, fundFamily)
+
+    Returns:
+        list de dicts {'indice', 'site_web'} dans l'ordre des infos
+    """
+    load_rules()
+    seen = {}
+    results = []
+    for info in infos:
+        long_name = info.get('longName', info.get('shortName', '')) or ''
+        key = (long_name, info.get('category', ''), info.get('fundFamily', info.get('family')))
+        if key not in seen:
+            seen[key] = {
+                'indice': classify_indice(long_name, key[1]),
+                'site_web': classify_emetteur(key[2], long_name),
+            }
+        results.append(dict(seen[key]))
+    return results
@@ -0,0 +1,315 @@
+#!/usr/bin/python3
+# etf_screener.py - Screener local : métadonnées et indicateurs par ETF dans SQLite (--screen, --screen-refresh)
+
+import time
+from datetime import datetime
+from concurrent.futures import as_completed
+import pandas as pd
+from colorama import Fore, Style
+from etf_db import connect
+from etf_core import get_ticker_data
+from etf_data import compute_performance_and_stats
+from etf_utils import detect_indice, detect_distribution
+from etf_net import get_history, prefetch, release
+from etf_format import fmt
+from etf_metrics import record_failure
+from etf_logging import log_info, log_warning, log_debug, is_debug_enabled, span
+
+# Périodes des indicateurs enregistrés (nombre d'années) : un seul historique 5 ans par ticker
+SCREEN_PERIODS = {'1y': 1, '3y': 3, '5y': 5}
+
+# Colonnes de tri acceptées par screen() (toujours décroissant, sauf le TER)
+SORT_COLUMNS = ('sharpe', 'rendement_annualise', 'volatilite', 'ter', 'aum')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS funds (
+    symbol TEXT PRIMARY KEY,
+    name TEXT,
+    isin TEXT,
+    fund_family TEXT,
+    indice TEXT COLLATE NOCASE,
+    currency TEXT COLLATE NOCASE,
+    exchange TEXT,
+    distribution TEXT COLLATE NOCASE,
+    ter REAL,
+    aum REAL,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_funds_filters ON funds(indice, currency, distribution, ter);
+CREATE INDEX IF NOT EXISTS idx_funds_currency ON funds(currency, distribution);
+CREATE INDEX IF NOT EXISTS idx_funds_ter ON funds(ter);
+CREATE INDEX IF NOT EXISTS idx_funds_isin ON funds(isin);
+CREATE TABLE IF NOT EXISTS fund_metrics (
+    symbol TEXT NOT NULL,
+    period TEXT NOT NULL,
+    rendement_total REAL,
+    rendement_annualise REAL,
+    volatilite REAL,
+    max_drawdown REAL,
+    sharpe REAL,
+    sortino REAL,
+    calmar REAL,
+    date_debut TEXT,
+    date_fin TEXT,
+    updated_at TEXT,
+    PRIMARY KEY (symbol, period)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_metrics_period_sharpe ON fund_metrics(period, sharpe);
+"""
+
+# Index des filtres de funds (supprimés puis recréés par _migrate)
+FILTER_INDEXES = ('idx_funds_filters', 'idx_funds_currency', 'idx_funds_ter', 'idx_funds_isin')
+
+METRIC_FIELDS = ('rendement_total', 'rendement_annualise', 'volatilite', 'max_drawdown', 'sharpe', 'sortino', 'calmar')
+
+
+def _number(value):
+    """Valeur numérique Yahoo/numpy -> float SQLite (None si absente)"""
+    if value is None or isinstance(value, str):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def fund_record(info, symbol):
+    """
+    Métadonnées d'un ETF pour la table funds
+
+    Args:
+        info: dictionnaire des informations du ticker
+        symbol: symbole du ticker
+
+    Returns:
+        dict {colonne: valeur}
+    """
+    name = info.get('longName', info.get('shortName', symbol)) or symbol
+    return {
+        'symbol': info.get('symbol', symbol),
+        'name': name,
+        'isin': info.get('isin'),
+        'fund_family': info.get('fundFamily', info.get('family')),
+        'indice': detect_indice(name, info.get('category', '')),
+        'currency': info.get('currency'),
+        'exchange': info.get('exchange'),
+        'distribution': detect_distribution(info),
+        'ter': _number(info.get('annualReportExpenseRatio', info.get('expenseRatio'))),
+        'aum': _number(info.get('totalAssets')),
+        'updated_at': datetime.now().isoformat(timespec='seconds'),
+    }
+
+
+def store_fund(conn, record, metrics):
+    """
+    Enregistre un ETF et ses indicateurs (une transaction)
+
+    Args:
+        conn: connexion etf_db
+        record: dict de fund_record()
+        metrics: dict {période: rendement_data de compute_performance_and_stats}
+    """
+    now = record['updated_at']
+    with conn:
+        conn.execute(
+            f"INSERT OR REPLACE INTO funds ({', '.join(record)}) VALUES ({', '.join('?' * len(record))})",
+            list(record.values()),
+        )
+        conn.execute("DELETE FROM fund_metrics WHERE symbol = ?", (record['symbol'],))
+        conn.executemany(
+            f"INSERT INTO fund_metrics (symbol, period, {', '.join(METRIC_FIELDS)}, date_debut, date_fin, updated_at) "
+            f"VALUES (?, ?, {', '.join('?' * len(METRIC_FIELDS))}, ?, ?, ?)",
+            [
+                [record['symbol'], period] + [_number(data.get(field)) for field in METRIC_FIELDS]
+                + [data.get('periode_debut'), data.get('periode_fin'), now]
+                for period, data in metrics.items() if data
+            ],
+        )
+
+
+def compute_period_metrics(fund):
+    """
+    Indicateurs de chaque période de SCREEN_PERIODS, à partir d'un seul historique
+
+    Returns:
+        dict {période: rendement_data}
+    """
+    hist = get_history(fund, period=f"{max(SCREEN_PERIODS.values())}y")
+    metrics = {}
+    if hist is None or len(hist) <= 1:
+        return metrics
+    for period, years in SCREEN_PERIODS.items():
+        start = hist.index[-1] - pd.DateOffset(years=years)
+        # Historique trop court pour la période : pas d'indicateur plutôt qu'une valeur trompeuse
+        if hist.index[0] > start + pd.Timedelta(days=7):
+            continue
+        rendement_data, _ = compute_performance_and_stats(fund, hist[hist.index >= start], period=period)
+        if rendement_data:
+            metrics[period] = rendement_data
+    return metrics
+
+
+def refresh_ticker(symbol):
+    """
+    Récupère un ETF et met à jour ses lignes dans la base
+
+    Returns:
+        str: symbole enregistré
+
+    Raises:
+        ValueError: données indisponibles
+    """
+    with span("screener.refresh", ticker=symbol):
+        try:
+            result = get_ticker_data(symbol)
+            if result is None:
+                record_failure('fetch', symbol)
+                raise ValueError("données indisponibles")
+            fund, _, info = result
+            record = fund_record(info, symbol)
+            store_fund(_connect(), record, compute_period_metrics(fund))
+            return record['symbol']
+        finally:
+            release(symbol)
+
+
+def _migrate(conn):
+    """
+    Base créée avant la comparaison insensible à la casse des filtres : table funds
+    recréée avec les colonnes COLLATE NOCASE pour que ses index servent aux filtres
+    """
+    row = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'funds'").fetchone()
+    if row is None or 'COLLATE NOCASE' in row['sql']:
+        return
+    log_info("Screener: migration de la table funds (filtres insensibles à la casse)")
+    conn.executescript(
+        "BEGIN;"
+        + "".join(f"DROP INDEX IF EXISTS {index};" for index in FILTER_INDEXES)
+        + "ALTER TABLE funds RENAME TO funds_old;"
+        + SCHEMA
+        + "INSERT INTO funds SELECT * FROM funds_old; DROP TABLE funds_old; COMMIT;"
+    )
+
+
+def _connect():
+    """Connexion à la base du screener (schéma à jour)"""
+    conn = connect(SCHEMA)
+    _migrate(conn)
+    return conn
+
+
+def stored_symbols():
+    """Symboles déjà présents dans la base"""
+    return [row['symbol'] for row in _connect().execute("SELECT symbol FROM funds ORDER BY symbol")]
+
+
+def refresh(symbols):
+    """
+    Remplit la base pour une liste de tickers (plusieurs tickers traités en parallèle)
+
+    Args:
+        symbols: tickers à (re)calculer
+
+    Returns:
+        int: nombre d'échecs
+    """
+    start = time.perf_counter()
+    print(f"{Fore.CYAN}↻ Mise à jour du screener : {len(symbols)} ETF{Style.RESET_ALL}")
+    pending = prefetch({symbol: (lambda s=symbol: refresh_ticker(s)) for symbol in symbols})
+    symbols_by_future = {future: symbol for symbol, future in pending.items()}
+    failures = 0
+    for done, future in enumerate(as_completed(symbols_by_future), 1):
+        symbol = symbols_by_future[future]
+        try:
+            future.result()
+            print(f"  {Fore.GREEN}✓{Style.RESET_ALL} [{done}/{len(symbols)}] {symbol}")
+        except Exception as e:
+            failures += 1
+            print(f"  {Fore.RED}✗{Style.RESET_ALL} [{done}/{len(symbols)}] {symbol} : {e}")
+            log_warning(f"Screener: échec de la mise à jour de {symbol}: {e}")
+    elapsed = time.perf_counter() - start
+    print(f"{Fore.WHITE}✓ Screener à jour : {len(symbols) - failures} ETF enregistrés, "
+          f"{failures} échec(s) en {elapsed:.1f} s{Style.RESET_ALL}")
+    log_info(f"Screener: {len(symbols)} tickers, {failures} échecs, {elapsed:.1f} s")
+    return failures
+
+
+def screen(period='1y', currency=None, distribution=None, indice=None, ter_max=None,
+           sharpe_min=None, sort='sharpe', limit=None):
+    """
+    Recherche les ETF de la base répondant aux critères (requête indexée, sans réseau)
+
+    Args:
+        period: période des indicateurs (clé de SCREEN_PERIODS)
+        currency: devise (ex: EUR)
+        distribution: "Capitalisant" ou "Distribuant"
+        indice: indice répliqué tel que détecté (ex: MSCI World)
+        ter_max: TER maximum (fraction, ex: 0.0025 pour 0,25 %)
+        sharpe_min: ratio de Sharpe minimum sur la période
+        sort: colonne de tri (SORT_COLUMNS)
+        limit: nombre maximum de résultats
+
+    Returns:
+        list de dicts (colonnes de funds et indicateurs de la période)
+    """
+    clauses = ["m.period = ?"]
+    params = [period]
+    # Colonnes COLLATE NOCASE : comparaison insensible à la casse qui utilise les index
+    for column, value in (('f.currency', currency), ('f.distribution', distribution), ('f.indice', indice)):
+        if value:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    if ter_max is not None:
+        clauses.append("f.ter <= ?")
+        params.append(ter_max)
+    if sharpe_min is not None:
+        clauses.append("m.sharpe >= ?")
+        params.append(sharpe_min)
+    order = f"{'f' if sort in ('ter', 'aum') else 'm'}.{sort} IS NULL, {'f' if sort in ('ter', 'aum') else 'm'}.{sort}" \
+        + ("" if sort == 'ter' else " DESC")
+    query = (
+        "SELECT f.*, m.period, " + ", ".join(f"m.{field}" for field in METRIC_FIELDS) + ", m.date_fin "
+        "FROM funds f JOIN fund_metrics m ON m.symbol = f.symbol "
+        f"WHERE {' AND '.join(clauses)} ORDER BY {order}"
+        + (" LIMIT ?" if limit else "")
+    )
+    if limit:
+        params.append(limit)
+
+    start = time.perf_counter()
+    rows = [dict(row) for row in _connect().execute(query, params)]
+    if is_debug_enabled(): log_debug("screener: %d résultats en %.2f ms (%s)", len(rows), (time.perf_counter() - start) * 1000, query)
+    return rows
+
+
+def print_screen(rows, period):
+    """Affiche les résultats du screener"""
+    if not rows:
+        print(f"{Fore.YELLOW}Aucun ETF ne correspond aux critères (voir --screen-refresh pour remplir la base).{Style.RESET_ALL}")
+        return
+    print(f"\n{Style.BRIGHT}{Fore.CYAN}🔎 {len(rows)} ETF - indicateurs sur {period}{Style.RESET_ALL}")
+    print(f"{Style.BRIGHT}{'Symbole':<10} {'Nom':<40} {'Indice':<22} {'Devise':<6} {'Type':<12} "
+          f"{'TER':>7} {'Rdt ann.':>9} {'Vol.':>8} {'Sharpe':>7}{Style.RESET_ALL}")
+    for row in rows:
+        print(f"{row['symbol']:<10} {(row['name'] or '')[:40]:<40} {(row['indice'] or '')[:22]:<22} "
+              f"{row['currency'] or '':<6} {row['distribution'] or '':<12} {fmt(row['ter'], 'taux'):>7} "
+              f"{fmt(row['rendement_annualise'], 'pct'):>9} {fmt(row['volatilite'], 'pct'):>8} {fmt(row['sharpe'], 'ratio'):>7}")
+
+
+def refresh_universe(symbols=None):
+    """
+    Met à jour la base du screener
+
+    Args:
+        symbols: tickers à ajouter ou recalculer (défaut : fiches du vault et ETF déjà enregistrés)
+
+    Returns:
+        int: code de sortie
+    """
+    from etf_obsidian import list_vault_notes
+    if not symbols:
+        symbols = sorted({note['symbol'] for note in list_vault_notes() if note['symbol']} | set(stored_symbols()))
+    if not symbols:
+        print(f"{Fore.RED}Aucun ETF à enregistrer : indiquez des tickers ou créez des fiches dans le vault.{Style.RESET_ALL}")
+        return 1
+    return 1 if refresh(symbols) else 0
@@ -0,0 +1,203 @@
+#!/usr/bin/python3
+# etf_search.py - Recherche approchée hors ligne (trigrammes) sur les noms, symboles et ISIN de la table des instruments
+
+import re
+import time
+import unicodedata
+import numpy as np
+from etf_db import connect
+from etf_logging import log_debug, is_debug_enabled
+
+# Index inversé : pour chaque trigramme, les identifiants (uint32 triés) des cotations qui le contiennent
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_docs (
+    id INTEGER PRIMARY KEY,
+    symbol TEXT UNIQUE NOT NULL,
+    grams TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS search_postings (
+    trigram TEXT PRIMARY KEY,
+    ids BLOB NOT NULL
+) WITHOUT ROWID;
+"""
+
+# Similarité minimale d'un candidat (0-1, voir search)
+MIN_SCORE = 0.15
+
+# Nombre de candidats proposés par défaut
+DEFAULT_LIMIT = 10
+
+# Cotations présélectionnées (plus grand nombre de trigrammes communs) avant le calcul du score
+PRESELECTION = 200
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+# Séparateur des trigrammes d'une cotation dans search_docs (absent des textes normalisés)
+_SEP = "|"
+
+_IDS = np.uint32
+
+# Bases dont l'index a été vérifié par ce processus
+_checked = set()
+
+
+def normalize(text):
+    """Minuscules sans accents ni ponctuation ("All-World" -> "all world")"""
+    text = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode()
+    return _NON_ALNUM.sub(" ", text.lower()).strip()
+
+
+def trigrams(text):
+    """
+    Trigrammes d'un texte, mot par mot (début de mot marqué par deux espaces, fin par un)
+
+    Returns:
+        set de trigrammes
+    """
+    grams = set()
+    for word in normalize(text).split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _document(row):
+    # Symbole indexé avec et sans suffixe de place (VWCE.DE -> "vwce de" et "vwcede")
+    symbol = row['symbol'] or ''
+    return " ".join(filter(None, (row['name'], symbol, symbol.replace('.', ''), row['isin'])))
+
+
+def _chunks(items, size=500):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def index_symbols(conn, symbols):
+    """
+    (Ré)indexe des cotations de la table instruments (à appeler après leur enregistrement)
+
+    Seules les listes des trigrammes ajoutés ou retirés sont réécrites.
+
+    Args:
+        conn: connexion etf_db ouverte avec le schéma de etf_instruments (qui inclut SCHEMA) ;
+            la transaction de l'appelant est réutilisée
+        symbols: symboles à indexer
+    """
+    changes = {}  # trigramme -> (ids ajoutés, ids retirés)
+    for chunk in _chunks(symbols):
+        marks = ", ".join("?" * len(chunk))
+        rows = conn.execute(f"SELECT symbol, name, isin FROM instruments WHERE symbol IN ({marks})", chunk).fetchall()
+        docs = {row[1]: (row[0], row[2]) for row in conn.execute(
+            f"SELECT id, symbol, grams FROM search_docs WHERE symbol IN ({marks})", chunk)}
+        for row in rows:
+            new = trigrams(_document(row))
+            if row['symbol'] in docs:
+                doc_id, stored = docs[row['symbol']]
+                old = set(stored.split(_SEP)) if stored else set()
+                if old == new:
+                    continue
+                conn.execute("UPDATE search_docs SET grams = ? WHERE id = ?", (_SEP.join(sorted(new)), doc_id))
+            else:
+                doc_id = conn.execute("INSERT INTO search_docs (symbol, grams) VALUES (?, ?)",
+                                      (row['symbol'], _SEP.join(sorted(new)))).lastrowid
+                old = set()
+            for gram in new - old:
+                changes.setdefault(gram, (set(), set()))[0].add(doc_id)
+            for gram in old - new:
+                changes.setdefault(gram, (set(), set()))[1].add(doc_id)
+
+    for chunk in _chunks(changes):
+        marks = ", ".join("?" * len(chunk))
+        postings = dict(conn.execute(f"SELECT trigram, ids FROM search_postings WHERE trigram IN ({marks})", chunk))
+        updates = []
+        for gram in chunk:
+            ids = np.frombuffer(postings[gram], dtype=_IDS) if gram in postings else np.empty(0, dtype=_IDS)
+            added, removed = changes[gram]
+            if removed:
+                ids = ids[~np.isin(ids, np.fromiter(removed, dtype=_IDS))]
+            if added:
+                ids = np.union1d(ids, np.fromiter(added, dtype=_IDS))
+            updates.append((gram, ids.astype(_IDS).tobytes()))
+        conn.executemany("INSERT OR REPLACE INTO search_postings (trigram, ids) VALUES (?, ?)", updates)
+
+
+def _ensure_index(conn):
+    """Indexe les cotations enregistrées avant la création de l'index (bases existantes)"""
+    path = conn.execute("PRAGMA database_list").fetchone()[2]
+    if path in _checked:
+        return
+    _checked.add(path)
+    missing = [row[0] for row in conn.execute(
+        "SELECT symbol FROM instruments WHERE symbol NOT IN (SELECT symbol FROM search_docs)"
+    )]
+    if missing:
+        with conn:
+            index_symbols(conn, missing)
+        if is_debug_enabled(): log_debug("search: %d cotations indexées", len(missing))
+
+
+def search(query, limit=DEFAULT_LIMIT, min_score=MIN_SCORE):
+    """
+    Cotations dont le nom, le symbole ou l'ISIN ressemble à la saisie (sans réseau)
+
+    Score : moyenne de la similarité de Jaccard des trigrammes et de la part des trigrammes
+    de la saisie présents dans la cotation (un nom long contenant tous les mots tapés reste
+    bien classé). Un symbole identique à la saisie (avec ou sans suffixe) obtient 1.
+
+    Args:
+        query: texte saisi (ex: "vanguard all world", "vwce", "IE00BK5BQ")
+        limit: nombre maximum de candidats
+        min_score: similarité minimale (0-1)
+
+    Returns:
+        list de dicts de la table instruments, complétés d'un champ 'score', du plus proche au moins proche
+    """
+    from etf_instruments import SCHEMA as INSTRUMENTS_SCHEMA
+    start = time.perf_counter()
+    conn = connect(INSTRUMENTS_SCHEMA)
+    _ensure_index(conn)
+
+    grams = trigrams(query)
+    if not grams:
+        return []
+    marks = ", ".join("?" * len(grams))
+    postings = [np.frombuffer(row[0], dtype=_IDS) for row in conn.execute(
+        f"SELECT ids FROM search_postings WHERE trigram IN ({marks})", list(grams))]
+    shared = np.bincount(np.concatenate(postings)) if postings else np.zeros(0, dtype=np.int64)
+
+    # Présélection sur le nombre de trigrammes communs, puis symboles identiques à la saisie
+    candidates = np.flatnonzero(shared)
+    if len(candidates) > PRESELECTION:
+        candidates = candidates[np.argpartition(-shared[candidates], PRESELECTION)[:PRESELECTION]]
+    exact = query.strip().upper()
+    ids = {int(i) for i in candidates}
+    ids.update(row[0] for row in conn.execute(
+        "SELECT id FROM search_docs WHERE symbol = ? OR symbol LIKE ? ESCAPE '\\'",
+        (exact, exact.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '.%')))
+
+    scored = []
+    for chunk in _chunks(ids):
+        for doc_id, symbol, stored in conn.execute(
+                f"SELECT id, symbol, grams FROM search_docs WHERE id IN ({', '.join('?' * len(chunk))})", chunk):
+            common = int(shared[doc_id]) if doc_id < len(shared) else 0
+            ntrigrams = stored.count(_SEP) + 1 if stored else 0
+            score = 0.5 * common / (len(grams) + ntrigrams - common) + 0.5 * common / len(grams)
+            if symbol == exact or symbol.split('.')[0] == exact:
+                score = 1.0
+            if score >= min_score:
+                scored.append((score, symbol))
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    scored = scored[:limit]
+
+    results = []
+    if scored:
+        details = {row['symbol']: dict(row) for row in conn.execute(
+            f"SELECT * FROM instruments WHERE symbol IN ({', '.join('?' * len(scored))})", [s for _, s in scored]
+        )}
+        for score, symbol in scored:
+            if symbol in details:
+                results.append(dict(details[symbol], score=round(score, 3)))
+    if is_debug_enabled(): log_debug("search: '%s' -> %d candidats en %.2f ms", query, len(results),
+                                     (time.perf_counter() - start) * 1000)
+    return results
@@ -0,0 +1,291 @@
+#!/usr/bin/python3
+# etf_server.py - Mode serveur (etfinfo.py serve) : modules importés, sessions Yahoo et cache gardés en mémoire
+
+import io
+import os
+import sys
+import json
+import time
+import hmac
+import signal
+import socket
+import secrets
+import argparse
+import threading
+import traceback
+import socketserver
+from datetime import datetime
+from colorama import Fore, Style
+from etf_utils import get_data_dir
+from etf_net import set_cache_ttl, reset_stats
+from etf_logging import log_info, log_warning, log_exception, reset_tracing
+from etfclient import SOCKET_NAME, TOKEN_NAME
+
+# Durée de validité par défaut des données en cache entre deux commandes (secondes)
+DEFAULT_CACHE_TTL = 300
+
+# Options qui ne peuvent pas être servies (elles occupent le processus indéfiniment)
+REFUSED_OPTIONS = ('--daemon',)
+
+# Les commandes s'exécutent l'une après l'autre : sys.stdout, sys.argv et le répertoire
+# courant sont propres au processus
+_command_lock = threading.Lock()
+
+# Console du serveur (sys.stdout est redirigé vers le client pendant une commande)
+_console = sys.stdout
+
+
+class _Connection:
+    """Échanges JSON (une ligne par message) avec un client etfclient.py"""
+
+    def __init__(self, rfile, wfile):
+        self.rfile = rfile
+        self.wfile = wfile
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def send(self, message):
+        if self.closed:
+            return
+        data = (json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8")
+        with self.lock:
+            try:
+                self.wfile.write(data)
+                self.wfile.flush()
+            except OSError:
+                # Client parti (Ctrl+C) : la commande se termine sans sortie
+                self.closed = True
+
+    def receive(self):
+        if self.closed:
+            return None
+        try:
+            line = self.rfile.readline()
+        except OSError:
+            line = b""
+        if not line:
+            self.closed = True
+            return None
+        return json.loads(line)
+
+
+class _RemoteOutput(io.TextIOBase):
+    """Remplace sys.stdout / sys.stderr : chaque écriture est transmise au client"""
+
+    def __init__(self, connection, key, tty=False):
+        self.connection = connection
+        self.key = key
+        self.tty = tty
+
+    def isatty(self):
+        # Terminal du client (affichage rafraîchi de --live, refus du Parquet sur un terminal)
+        return self.tty
+
+    @property
+    def encoding(self):
+        return "utf-8"
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        if text:
+            self.connection.send({self.key: text})
+        return len(text)
+
+
+class _RemoteInput(io.TextIOBase):
+    """Remplace sys.stdin : input() demande la ligne au client"""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def readable(self):
+        return True
+
+    def readline(self, size=-1):
+        sys.stdout.flush()
+        self.connection.send({"input": True})
+        reply = self.connection.receive()
+        if not reply or reply.get("eof"):
+            return ""
+        return reply.get("line", "")
+
+
+def run_command(connection, argv, cwd=None, isatty=False):
+    """
+    Exécute une commande etfinfo dans le processus serveur
+
+    Args:
+        connection: _Connection du client
+        argv: arguments de etfinfo.py
+        cwd: répertoire courant du client (chemins relatifs de --trace, --profile...)
+        isatty: sortie du client sur un terminal
+
+    Returns:
+        int: code de sortie
+    """
+    import etfinfo
+
+    if any(option in argv for option in REFUSED_OPTIONS) or argv[:1] == ["serve"]:
+        connection.send({"err": f"etfinfo serve : {' '.join(REFUSED_OPTIONS)} et serve ne sont pas disponibles via le serveur\n"})
+        return 2
+
+    with _command_lock:
+        saved = sys.argv, sys.stdin, sys.stdout, sys.stderr, os.getcwd()
+        sys.argv = ["etfinfo.py"] + list(argv)
+        sys.stdin = _RemoteInput(connection)
+        sys.stdout = _RemoteOutput(connection, "out", isatty)
+        sys.stderr = _RemoteOutput(connection, "err", isatty)
+        reset_stats()
+        reset_tracing()
+        try:
+            if cwd and os.path.isdir(cwd):
+                os.chdir(cwd)
+            exit_code = etfinfo.main(list(argv))[0]
+        except SystemExit as e:
+            # argparse (--help, erreur d'argument)
+            exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except Exception:
+            log_exception(f"Erreur pendant la commande {argv}")
+            traceback.print_exc()
+            exit_code = 1
+        finally:
+            sys.stdout.flush()
+            sys.argv, sys.stdin, sys.stdout, sys.stderr, cwd = saved
+            os.chdir(cwd)
+    return exit_code
+
+
+class _Handler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        connection = _Connection(self.rfile, self.wfile)
+        request = connection.receive()
+        if not request or "argv" not in request:
+            return
+        token = getattr(self.server, "token", None)
+        if token and not hmac.compare_digest(str(request.get("token") or ""), token):
+            connection.send({"err": f"etfinfo serve : jeton d'accès absent ou invalide ({TOKEN_NAME})\n"})
+            connection.send({"exit": 2})
+            log_warning(f"Commande refusée (jeton invalide) depuis {self.client_address}")
+            return
+        start = time.perf_counter()
+        exit_code = run_command(connection, request["argv"], request.get("cwd"), bool(request.get("isatty")))
+        connection.send({"exit": exit_code})
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{Style.DIM}{datetime.now():%H:%M:%S}{Style.RESET_ALL} etfinfo {' '.join(request['argv'])} "
+              f"→ {exit_code} ({elapsed:.0f} ms)", file=_console, flush=True)
+        log_info(f"Commande servie {request['argv']} → {exit_code} en {elapsed:.0f} ms")
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def _prepare_socket(path):
+    """
+    Supprime un socket laissé par un serveur arrêté
+
+    Returns:
+        bool: False si un serveur écoute déjà sur ce chemin
+    """
+    if not os.path.exists(path):
+        return True
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+        return False
+    except OSError:
+        os.unlink(path)
+        return True
+    finally:
+        probe.close()
+
+
+def _write_token(path):
+    """
+    Crée le jeton d'accès du mode TCP, lisible par le seul utilisateur du serveur
+
+    Returns:
+        str: jeton
+    """
+    token = secrets.token_hex(32)
+    if os.path.exists(path):
+        os.unlink(path)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(token + "\n")
+    return token
+
+
+def serve(socket_path=None, port=None, cache_ttl=DEFAULT_CACHE_TTL):
+    """
+    Lance le serveur jusqu'à Ctrl+C
+
+    Args:
+        socket_path: socket Unix (défaut: <data dir>/etfinfo.sock)
+        port: port TCP local (127.0.0.1) à la place du socket Unix ; les commandes doivent
+              fournir le jeton écrit dans <data dir>/etfinfo.token (voir etfclient.read_token)
+        cache_ttl: durée de validité des données en cache (secondes)
+
+    Returns:
+        int: code de sortie
+    """
+    start = time.perf_counter()
+    import etfinfo  # noqa: F401 - chargement de tous les modules avant la première commande
+    set_cache_ttl(cache_ttl)
+
+    token_path = os.path.join(get_data_dir(), TOKEN_NAME)
+    if port:
+        server = _TCPServer(("127.0.0.1", port), _Handler)
+        server.token = _write_token(token_path)
+        address = f"127.0.0.1:{port}"
+    else:
+        socket_path = socket_path or os.path.join(get_data_dir(), SOCKET_NAME)
+        if not _prepare_socket(socket_path):
+            print(f"{Fore.RED}Un serveur écoute déjà sur {socket_path}{Style.RESET_ALL}")
+            return 1
+        server = _UnixServer(socket_path, _Handler)
+        os.chmod(socket_path, 0o600)
+        address = socket_path
+
+    print(f"{Fore.GREEN}✓ Serveur etfinfo prêt en {time.perf_counter() - start:.1f} s sur {address}{Style.RESET_ALL}")
+    print(f"{Style.DIM}Cache des données : {cache_ttl} s - Ctrl+C pour arrêter{Style.RESET_ALL}")
+    log_info(f"Serveur démarré sur {address} (cache {cache_ttl} s)")
+    # Arrêt propre (suppression du socket) aussi sur SIGTERM (systemd, kill)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nArrêt du serveur.")
+    finally:
+        server.server_close()
+        if not port and os.path.exists(socket_path):
+            os.unlink(socket_path)
+        if port and os.path.exists(token_path):
+            os.unlink(token_path)
+        log_info("Serveur arrêté")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='etfinfo serve',
+        description="Garde etfinfo chargé en mémoire et exécute les commandes envoyées par etfclient.py"
+    )
+    parser.add_argument("--socket", metavar="CHEMIN", help=f"Socket Unix (défaut: <répertoire de données>/{SOCKET_NAME})")
+    parser.add_argument("--port", type=int, help="Écouter sur 127.0.0.1:PORT au lieu du socket Unix")
+    parser.add_argument("--cache-ttl", type=int, default=DEFAULT_CACHE_TTL, metavar="SECONDES",
+                        help=f"Durée de validité des données en cache entre deux commandes (défaut: {DEFAULT_CACHE_TTL})")
+    args = parser.parse_args(argv)
+    if args.socket and args.port:
+        parser.error("--socket et --port sont exclusifs")
+    if args.port and not 0 < args.port < 65536:
+        parser.error("port invalide")
+    return serve(args.socket, args.port, args.cache_ttl)
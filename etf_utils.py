@@ -1,9 +1,37 @@
 #!/usr/bin/python3
 # etf_utils.py - Fonctions utilitaires pour etfinfo
 
+import os
 from datetime import datetime
 import yfinance as yf
-from etf_logging import log_debug, log_info
+from etf_logging import log_debug, log_info, span
+from etf_format import to_fr
+from etf_net import get_info
+from etf_rules import classify_indice, classify_emetteur
+
+def get_data_dir(*parts):
+    """
+    Retourne (et crée si besoin) un répertoire de données locales d'etfinfo
+
+    Par défaut ~/.etfinfo, ou ~/ObsidianTest/.etfinfo en mode test Obsidian.
+    La variable d'environnement ETFINFO_DATA_DIR permet de le surcharger.
+
+    Args:
+        *parts: sous-répertoires éventuels (ex: "history", "VWCE.DE")
+
+    Returns:
+        str: chemin absolu du répertoire
+    """
+    base = os.environ.get("ETFINFO_DATA_DIR")
+    if not base:
+        repo_root = os.path.dirname(os.path.abspath(__file__))
+        if os.path.exists(os.path.join(repo_root, ".obsidian_test_mode")):
+            base = os.path.expanduser("~/ObsidianTest/.etfinfo")
+        else:
+            base = os.path.expanduser("~/.etfinfo")
+    path = os.path.join(base, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
 
 def format_date_fr(date):
     """Formate une date au format français dd/mm/yyyy"""
@@ -16,25 +44,21 @@ def format_number_fr(number, decimals=2):
     if number == 'N/A' or number is None:
         return 'N/A'
     
-    formatted = f"{number:,.{decimals}f}"
-    # Remplacer séparateur de milliers par espace
-    formatted = formatted.replace(',', ' ')
-    # Remplacer point décimal par virgule
-    formatted = formatted.replace('.', ',')
-    return formatted
+    # Séparateur de milliers -> espace, point décimal -> virgule
+    return to_fr(f"{number:,.{decimals}f}")
 
 def format_percentage_fr(value, decimals=2):
     """Formate un pourcentage avec conventions françaises"""
     if value == 'N/A' or value is None:
         return 'N/A'
     
-    formatted = f"{value:.{decimals}f}%"
-    formatted = formatted.replace('.', ',')
-    return formatted
+    return to_fr(f"{value:.{decimals}f}%")
 
 def detect_indice(long_name, category=''):
     """
     Détecte l'indice répliqué par l'ETF depuis son nom ou sa catégorie
+
+    Les règles sont lues dans etf_rules.json (voir etf_rules).
     
     Args:
         long_name: Nom complet de l'ETF
@@ -43,40 +67,24 @@ def detect_indice(long_name, category=''):
     Returns:
         str: Nom de l'indice répliqué ou "Non identifié"
     """
-    long_name_lower = long_name.lower()
-    category_lower = category.lower() if category else ''
-    
-    # Patterns de détection d'indices
-    indices = {
-        'MSCI World': ['msci world'],
-        'FTSE All-World / MSCI ACWI': ['msci acwi', 'all-world', 'ftse all-world'],
-        'S&P 500': ['s&p 500', 'sp500', 'sp 500'],
-        'EURO STOXX 50': ['stoxx 50', 'euro stoxx 50'],
-        'STOXX Europe 600': ['stoxx 600', 'europe 600'],
-        'NASDAQ': ['nasdaq'],
-        'FTSE 100': ['ftse 100'],
-        'DAX': ['dax'],
-        'CAC 40': ['cac 40'],
-        'MSCI Emerging Markets': ['emerging', 'emergent'],
-        'FTSE Developed Europe': ['developed europe'],
-        'MSCI USA': ['msci usa'],
-        'MSCI Europe': ['msci europe'],
-        'Russell 2000': ['russell 2000'],
-        'MSCI Japan': ['msci japan'],
-        'MSCI China': ['msci china'],
-        'FTSE Developed Asia Pacific': ['developed asia pacific'],
-    }
-    
-    for indice_name, patterns in indices.items():
-        for pattern in patterns:
-            if pattern in long_name_lower or pattern in category_lower:
-                return indice_name
-    
-    return "Non identifié"
+    return classify_indice(long_name, category)
+
+def detect_distribution(info):
+    """
+    Politique de distribution de l'ETF (d'après le rendement du dividende publié)
+
+    Args:
+        info: dictionnaire des informations du ticker
+
+    Returns:
+        str: "Distribuant" ou "Capitalisant"
+    """
+    dividend_yield = info.get('yield', info.get('trailingAnnualDividendYield', None))
+    return "Distribuant" if dividend_yield and dividend_yield > 0 else "Capitalisant"
 
 def get_emetteur_url(fund_family, long_name):
     """
-    Génère l'URL du site de l'émetteur de l'ETF
+    Génère l'URL du site de l'émetteur de l'ETF (règles de etf_rules.json)
     
     Args:
         fund_family: Famille de fonds (ex: Vanguard, BlackRock)
@@ -85,46 +93,7 @@ def get_emetteur_url(fund_family, long_name):
     Returns:
         str: URL formatée en Markdown ou message à compléter
     """
-    if not fund_family or fund_family == '<non présent>':
-        return "[A compléter - émetteur non reconnu]()"
-    
-    fund_family_lower = fund_family.lower()
-    
-    # Mapping des émetteurs vers leurs URLs
-    if 'blackrock' in fund_family_lower or 'ishares' in fund_family_lower:
-        # Encoder le nom pour l'URL BlackRock
-        etf_name_encoded = long_name.replace(' ', '%20')
-        return f"[BlackRock iShares](https://www.blackrock.com/fr/particuliers/products/investment-funds#/?productView=all&search={etf_name_encoded})"
-    
-    elif 'vanguard' in fund_family_lower:
-        return "[Vanguard](https://investor.vanguard.com)"
-    
-    elif 'amundi' in fund_family_lower:
-        return "[Amundi ETF](https://www.amundietf.fr/fr/particuliers)"
-    
-    elif 'lyxor' in fund_family_lower:
-        return "[Lyxor / Amundi](https://www.amundietf.fr/fr/particuliers)"
-    
-    elif 'spdr' in fund_family_lower or 'state street' in fund_family_lower:
-        return "[SPDR / State Street](https://www.ssga.com/fr/en_gb/institutional/etfs)"
-    
-    elif 'xtrackers' in fund_family_lower or 'dws' in fund_family_lower:
-        return "[Xtrackers / DWS](https://etf.dws.com)"
-    
-    elif 'wisdomtree' in fund_family_lower:
-        return "[WisdomTree](https://www.wisdomtree.eu)"
-    
-    elif 'invesco' in fund_family_lower:
-        return "[Invesco](https://www.invesco.com/us/financial-products/etfs)"
-    
-    elif 'hsbc' in fund_family_lower:
-        return "[HSBC ETF](https://www.assetmanagement.hsbc.com/etf)"
-    
-    elif 'ubs' in fund_family_lower:
-        return "[UBS ETF](https://www.ubs.com/etf)"
-    
-    else:
-        return f"[A compléter - {fund_family}]()"
+    return classify_emetteur(fund_family, long_name)
 
 def get_ratio_emoji(ratio_value, ratio_type='sharpe'):
     """
@@ -161,6 +130,18 @@ def get_ratio_emoji(ratio_value, ratio_type='sharpe'):
     
     return '', None
 
+# Suffixes des principales places boursières européennes et US
+EXCHANGE_SUFFIXES = {
+    '.DE': 'XETRA (Allemagne)',
+    '.F': 'Frankfurt (Allemagne)',
+    '.L': 'London Stock Exchange (UK)',
+    '.AS': 'Euronext Amsterdam (Pays-Bas)',
+    '.PA': 'Euronext Paris (France)',
+    '.MI': 'Borsa Italiana (Italie)',
+    '.SW': 'SIX Swiss Exchange (Suisse)',
+    '': 'US Markets (NYSE/NASDAQ)'
+}
+
 def search_ticker_variants(base_ticker):
     """
     Recherche les variantes d'un ticker sur différentes places boursières
@@ -173,32 +154,21 @@ def search_ticker_variants(base_ticker):
     """
     import os
     from contextlib import redirect_stderr
-    
-    # Suffixes des principales places boursières européennes et US
-    suffixes = {
-        '.DE': 'XETRA (Allemagne)',
-        '.F': 'Frankfurt (Allemagne)', 
-        '.L': 'London Stock Exchange (UK)',
-        '.AS': 'Euronext Amsterdam (Pays-Bas)',
-        '.PA': 'Euronext Paris (France)',
-        '.MI': 'Borsa Italiana (Italie)',
-        '.SW': 'SIX Swiss Exchange (Suisse)',
-        '': 'US Markets (NYSE/NASDAQ)'
-    }
+    from etf_instruments import record_instrument
     
     results = []
     
     print(f"🔍 Recherche de variantes pour '{base_ticker}'...\n")
     
-    for suffix, exchange_name in suffixes.items():
+    for suffix, exchange_name in EXCHANGE_SUFFIXES.items():
         ticker = base_ticker + suffix if suffix else base_ticker
         
         try:
             # Supprimer les messages d'erreur HTTP
-            with open(os.devnull, 'w') as devnull:
+            with span("fetch.variant", ticker=ticker), open(os.devnull, 'w') as devnull:
                 with redirect_stderr(devnull):
                     fund = yf.Ticker(ticker)
-                    info = fund.info
+                    info = get_info(fund)
             
             # Vérifier si le ticker existe vraiment
             if info and 'symbol' in info and info.get('regularMarketPrice'):
@@ -206,6 +176,7 @@ def search_ticker_variants(base_ticker):
                 exchange = info.get('exchange', 'N/A')
                 currency = info.get('currency', 'N/A')
                 price = info.get('regularMarketPrice', 'N/A')
+                record_instrument(info)
                 
                 results.append({
                     'ticker': ticker,
@@ -247,7 +218,10 @@ def display_ticker_choices(results):
         print(f"    Place     : {result['exchange_name']}")
         print(f"    Exchange  : {result['exchange']}")
         print(f"    Devise    : {result['currency']}")
-        print(f"    Prix      : {price_str} {result['currency']}")
+        if result['price'] is not None:
+            print(f"    Prix      : {price_str} {result['currency']}")
+        if result.get('score') is not None:
+            print(f"    Similarité: {result['score']:.0%}")
         print()
     
     # Demander le choix
@@ -268,6 +242,6 @@ def display_ticker_choices(results):
                 print(f"{Fore.RED}Choix invalide. Entrez un nombre entre 1 et {len(results)}.{Style.RESET_ALL}")
         except ValueError:
             print(f"{Fore.RED}Choix invalide. Entrez un nombre ou 'q'.{Style.RESET_ALL}")
-        except KeyboardInterrupt:
+        except (KeyboardInterrupt, EOFError):
             print("\n\nAnnulation.")
             return None
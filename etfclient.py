@@ -0,0 +1,155 @@
+#!/usr/bin/python3
+# etfclient.py - Client léger du serveur etfinfo (etfinfo.py serve) : mêmes arguments que etfinfo.py
+#
+# N'importe que la bibliothèque standard : le démarrage ne coûte que celui de Python.
+# Si aucun serveur n'écoute, la commande est exécutée directement par etfinfo.py.
+
+import os
+import sys
+import json
+import socket
+
+# Nom du socket Unix dans le répertoire de données (voir etf_utils.get_data_dir)
+SOCKET_NAME = "etfinfo.sock"
+
+# Jeton d'accès du mode TCP (fichier 0600 du répertoire de données, écrit par le serveur) :
+# le port est joignable par tous les utilisateurs de la machine, contrairement au socket Unix
+TOKEN_NAME = "etfinfo.token"
+
+# Variable d'environnement désignant le serveur : chemin de socket ou hôte:port
+SERVER_ENV = "ETFINFO_SERVER"
+
+
+def default_socket_path():
+    """
+    Chemin du socket Unix par défaut
+
+    Même répertoire que etf_utils.get_data_dir(), calculé sans importer les modules etfinfo.
+
+    Returns:
+        str: chemin du socket
+    """
+    base = os.environ.get("ETFINFO_DATA_DIR")
+    if not base:
+        repo_root = os.path.dirname(os.path.abspath(__file__))
+        if os.path.exists(os.path.join(repo_root, ".obsidian_test_mode")):
+            base = os.path.expanduser("~/ObsidianTest/.etfinfo")
+        else:
+            base = os.path.expanduser("~/.etfinfo")
+    return os.path.join(base, SOCKET_NAME)
+
+
+def token_path():
+    """Chemin du jeton d'accès du mode TCP (à côté du socket par défaut)"""
+    return os.path.join(os.path.dirname(default_socket_path()), TOKEN_NAME)
+
+
+def read_token():
+    """
+    Jeton d'accès du serveur TCP
+
+    Returns:
+        str, ou None si le fichier est absent ou illisible
+    """
+    try:
+        with open(token_path(), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def server_address(value=None):
+    """
+    Adresse du serveur
+
+    Args:
+        value: chemin de socket ou "hôte:port" (défaut: $ETFINFO_SERVER, sinon le socket par défaut)
+
+    Returns:
+        tuple (famille de socket, adresse)
+    """
+    value = value or os.environ.get(SERVER_ENV) or default_socket_path()
+    host, sep, port = value.rpartition(":")
+    if sep and port.isdigit() and "/" not in value:
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    return socket.AF_UNIX, value
+
+
+def connect(address=None):
+    """
+    Ouvre une connexion vers le serveur
+
+    Returns:
+        socket connecté, ou None si aucun serveur n'écoute
+    """
+    family, target = server_address(address)
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    try:
+        sock.connect(target)
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def _send(sock, message):
+    sock.sendall((json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8"))
+
+
+def run_remote(sock, argv, token=None):
+    """
+    Envoie une commande au serveur et recopie sa sortie au fil de l'eau
+
+    Args:
+        sock: connexion ouverte par connect()
+        argv: arguments de etfinfo.py
+        token: jeton d'accès (serveur TCP)
+
+    Returns:
+        int: code de sortie de la commande
+    """
+    request = {"argv": argv, "cwd": os.getcwd(), "isatty": sys.stdout.isatty()}
+    if token:
+        request["token"] = token
+    _send(sock, request)
+    with sock.makefile("r", encoding="utf-8") as replies:
+        for line in replies:
+            message = json.loads(line)
+            if "out" in message:
+                sys.stdout.write(message["out"])
+                sys.stdout.flush()
+            elif "err" in message:
+                sys.stderr.write(message["err"])
+                sys.stderr.flush()
+            elif "input" in message:
+                # Question posée par la commande (choix de variante, confirmation...)
+                answer = sys.stdin.readline()
+                _send(sock, {"line": answer} if answer else {"eof": True})
+            elif "exit" in message:
+                return message["exit"]
+    sys.stderr.write("etfclient: connexion au serveur interrompue\n")
+    return 1
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    sock = connect()
+    if sock is None:
+        # Pas de serveur : exécution directe (même comportement, démarrage complet)
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "etfinfo.py")
+        os.execv(sys.executable, [sys.executable, script] + argv)
+    try:
+        return run_remote(sock, argv, read_token() if sock.family == socket.AF_INET else None)
+    except KeyboardInterrupt:
+        sys.stderr.write("\nAnnulation.\n")
+        return 130
+    except BrokenPipeError:
+        # Sortie fermée par le lecteur (ex: | head) : ne plus rien écrire
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    finally:
+        sock.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,8 +3,10 @@
 
 import sys
 import argparse
+from contextlib import redirect_stdout
 from colorama import Fore, Style
 import re
+from datetime import datetime
 
 # Imports des modules locaux
 from etf_core import (
@@ -15,12 +17,45 @@ from etf_core import (
     get_business_summary,
     get_history,
     get_repartition,
-    get_top_holdings
+    get_top_holdings,
+    build_basic_info,
+    build_financials,
+    build_summary,
+    build_history,
+    build_repartition,
+    build_top_holdings
 )
-from etf_analysis import calculate_rendement
+from etf_analysis import calculate_rendement, compute_rendement
+from etf_results import FORMATS, TickerReport, ResultWriter
+from etf_screener import SORT_COLUMNS
+from etf_export import EXPORT_FORMATS
 from etf_obsidian import write_to_obsidian
-from etf_utils import search_ticker_variants, display_ticker_choices
-from etf_logging import setup_logging, log_info, log_warning, log_debug, log_error
+from etf_charts import wait_for_charts
+from etf_utils import EXCHANGE_SUFFIXES, search_ticker_variants, display_ticker_choices
+from etf_instruments import is_isin, listings, lookup_symbol, import_file, print_listings
+from etf_search import search as search_instruments, DEFAULT_LIMIT as SEARCH_LIMIT
+from etf_net import (
+    RequestBudgetExceeded,
+    DEFAULT_RATE_PER_MINUTE,
+    set_budget,
+    set_memory_budget,
+    set_rate_limit,
+    print_stats,
+    release,
+    prefetch
+)
+from etf_metrics import enable_metrics, record_failure, write_metrics
+from etf_profile import profiled, memprofiled
+from etf_logging import (
+    setup_logging,
+    log_info,
+    log_warning,
+    log_debug,
+    log_error,
+    span,
+    enable_tracing,
+    export_trace
+)
 
 USE_LEGACY = True  # désactiver plus tard pour tester la nouvelle logique
 
@@ -58,16 +93,140 @@ def run_rendement(args, fund, info, ticker_symbol):
         benchmark_ticker=args.benchmark
     )
 
-def run_obsidian(fund, yqfund, info, ticker_symbol):
-    write_to_obsidian(fund, yqfund, info, ticker_symbol)
+def run_obsidian(fund, yqfund, info, ticker_symbol, purchase_date=None):
+    write_to_obsidian(fund, yqfund, info, ticker_symbol, purchase_date=purchase_date)
+    # Les graphiques sont rendus en arrière-plan : attendre avant de quitter
+    wait_for_charts()
 
 def run_all(fund, yqfund, info, ticker_symbol):
+    # Sections réseau lancées ensemble, affichées dans l'ordre habituel à leur arrivée
+    pending = prefetch({
+        'repartition': lambda: build_repartition(yqfund, ticker_symbol),
+        'top_holdings': lambda: build_top_holdings(yqfund, ticker_symbol),
+        'history': lambda: build_history(fund),
+    })
     get_basic_info(info, ticker_symbol)
     get_financials(info)
     get_business_summary(info)
-    get_repartition(yqfund, ticker_symbol)
-    get_top_holdings(yqfund, ticker_symbol)
-    get_history(fund)
+    get_repartition(yqfund, ticker_symbol, pending['repartition'])
+    get_top_holdings(yqfund, ticker_symbol, pending['top_holdings'])
+    get_history(fund, pending['history'])
+
+def resolve_isin(isin, interactive=True):
+    """
+    Résout un ISIN en symbole Yahoo à partir de la table locale des cotations
+
+    Plusieurs cotations : choix de l'utilisateur, ou la première (devise puis symbole) sans UI.
+
+    Returns:
+        str: symbole choisi, ou None si ISIN inconnu / choix annulé
+    """
+    rows = listings(isin)
+    if not rows:
+        log_warning(f"ISIN {isin} absent de la table des instruments")
+        print_listings(isin, rows)
+        return None
+    if len(rows) == 1 or not interactive:
+        symbol = rows[0]['symbol']
+        print(f"{Fore.GREEN}✓ {isin} → {symbol}{Style.RESET_ALL}"
+              + (f" ({len(rows)} cotations, voir --listings)" if len(rows) > 1 else ""))
+        log_info(f"ISIN {isin} résolu en {symbol} ({len(rows)} cotation(s))")
+        return symbol
+
+    print(f"\n🔍 Cotations connues pour l'ISIN {isin}\n")
+    selected = display_ticker_choices(listing_choices(rows))
+    if not selected:
+        log_info("Utilisateur a annulé la sélection")
+    return selected
+
+def listing_choices(rows):
+    """Cotations de la table des instruments au format de display_ticker_choices"""
+    return [{
+        'ticker': row['symbol'],
+        'name': row['name'] or 'N/A',
+        'exchange': row['exchange'] or 'N/A',
+        'exchange_name': EXCHANGE_SUFFIXES.get('.' + row['symbol'].rsplit('.', 1)[1] if '.' in row['symbol'] else '',
+                                               row['exchange'] or 'N/A'),
+        'currency': row['currency'] or 'N/A',
+        'price': None,
+        'score': row.get('score'),
+    } for row in rows]
+
+def resolve_search(query, candidates, interactive=True):
+    """
+    Choix parmi les cotations locales ressemblant à la saisie (nom, symbole sans suffixe...)
+
+    Sans UI, seul un symbole identique à la saisie est retenu d'office.
+
+    Returns:
+        str: symbole choisi, ou None
+    """
+    exact = [row for row in candidates if row['score'] >= 1.0]
+    if len(exact) == 1 and (len(candidates) == 1 or not interactive):
+        print(f"{Fore.GREEN}✓ {query} → {exact[0]['symbol']}{Style.RESET_ALL}")
+        return exact[0]['symbol']
+    if not interactive:
+        log_info(f"Recherche '{query}' ambiguë sans UI : {[row['symbol'] for row in candidates]}")
+        print(f"{Fore.YELLOW}'{query}' n'est pas un ticker ; cotations proches : "
+              f"{', '.join(row['symbol'] for row in candidates)}{Style.RESET_ALL}")
+        return None
+
+    print(f"\n🔍 Cotations connues proches de '{query}'\n")
+    selected = display_ticker_choices(listing_choices(candidates))
+    if not selected:
+        log_info("Utilisateur a annulé la sélection")
+    return selected
+
+def run_listings(args):
+    """
+    Option --listings : cotations connues de chaque ISIN (ou de l'ISIN d'un symbole), sans réseau
+
+    Returns:
+        int: 0 si chaque entrée a au moins une cotation connue, 1 sinon
+    """
+    writer = ResultWriter(sys.stdout, args.format, single=len(args.ticker) == 1) if args.format != "text" else None
+    exit_code = 0
+    for value in args.ticker:
+        isin = value.upper()
+        if not is_isin(isin):
+            known = lookup_symbol(value)
+            isin = known['isin'] if known and known['isin'] else isin
+        rows = listings(isin) if is_isin(isin) else []
+        if not rows:
+            exit_code = 1
+        if writer:
+            writer.write({'isin': isin, 'listings': rows})
+        elif is_isin(isin):
+            print_listings(isin, rows)
+        else:
+            print(f"{Fore.YELLOW}ISIN inconnu pour '{value}' dans la table des instruments.{Style.RESET_ALL}")
+    if writer:
+        writer.close()
+    return exit_code
+
+def run_search(args):
+    """
+    Option --search : cotations locales les plus proches du texte donné, sans réseau
+
+    Returns:
+        int: 0 si au moins une cotation est trouvée, 1 sinon
+    """
+    query = " ".join(args.ticker)
+    rows = search_instruments(query, limit=args.limit or SEARCH_LIMIT)
+    if args.format != "text":
+        writer = ResultWriter(sys.stdout, args.format)
+        for row in rows:
+            writer.write(row)
+        writer.close()
+    elif not rows:
+        print(f"{Fore.YELLOW}Aucune cotation connue ne ressemble à '{query}' "
+              f"(consulter l'ETF une première fois ou --import-instruments FICHIER.csv).{Style.RESET_ALL}")
+    else:
+        print(f"\n{Style.BRIGHT}{Fore.CYAN}🔍 {len(rows)} cotation(s) proche(s) de '{query}'{Style.RESET_ALL}")
+        for row in rows:
+            print(f"  {row['symbol']:<12} {row['score']:>5.0%}  {row['isin'] or '':<12}  "
+                  f"{row['currency'] or 'N/A':<4} {row['name'] or ''}")
+    return 0 if rows else 1
 
 def resolve_ticker(ticker_symbol, interactive=True):
     """
@@ -77,10 +236,21 @@ def resolve_ticker(ticker_symbol, interactive=True):
       - None si pas trouvé ou choix utilisateur 'n'
     Ne charge pas les données, juste la résolution du symbole.
     """
+    # ISIN : cotations connues de la table locale, sans réseau
+    if is_isin(ticker_symbol.upper()):
+        return resolve_isin(ticker_symbol.upper(), interactive)
+
     is_complete = bool(ticker_with_suffix.match(ticker_symbol))
 
+    # Nom ou symbole sans suffixe : recherche approchée dans la table locale des cotations,
+    # les places ne sont interrogées sur le réseau qu'à défaut
+    if not is_complete:
+        candidates = search_instruments(ticker_symbol, limit=5)
+        if candidates:
+            return resolve_search(ticker_symbol, candidates, interactive)
+
     # Ticker potentiellement incomplet (>=4 chars mais pas de suffixe)
-    if not is_complete and len(ticker_symbol) >= 4:
+    if not is_complete and len(ticker_symbol) >= 4 and " " not in ticker_symbol:
         log_warning(f"Ticker '{ticker_symbol}' semble incomplet (manque suffixe).")
         print(f"\n{Fore.YELLOW}Le ticker '{ticker_symbol}' semble incomplet.{Style.RESET_ALL}")
         print("Souhaites-tu rechercher sur quelles places il est coté ? (o/n)")
@@ -108,7 +278,7 @@ def resolve_ticker(ticker_symbol, interactive=True):
 
             return selected
 
-        except KeyboardInterrupt:
+        except (KeyboardInterrupt, EOFError):
             log_info("Interruption utilisateur")
             print("\nAnnulation.")
             return None
@@ -117,19 +287,108 @@ def resolve_ticker(ticker_symbol, interactive=True):
     elif not is_complete:
         log_error(f"Ticker '{ticker_symbol}' mal formaté.")
         print(f"\n{Fore.RED}Le ticker '{ticker_symbol}' n'est pas au bon format.{Style.RESET_ALL}")
-        print("Format attendu: XXXX.YY (ex: VWCE.DE)")
+        print("Format attendu: XXXX.YY (ex: VWCE.DE), un ISIN, ou le nom d'un ETF déjà consulté")
         return None
 
     # Ticker déjà complet
     return ticker_symbol
 
-def legacy_resolve_and_load(args):
+def build_report(args, ticker_symbol):
+    """
+    Construit l'enregistrement d'un ticker pour --format json/ndjson (sans interaction)
+
+    Args:
+        args: arguments de la ligne de commande (mêmes options que le mode texte)
+        ticker_symbol: ticker demandé
+
+    Returns:
+        TickerReport (champ erreur renseigné en cas d'échec, partiel ou total)
+    """
+    resolved = resolve_ticker(ticker_symbol, interactive=False)
+    if resolved is None:
+        record_failure('resolve', ticker_symbol)
+        return TickerReport(ticker=ticker_symbol, erreur="ticker introuvable ou incomplet (format attendu: XXXX.YY)")
+
+    report = TickerReport(ticker=resolved)
+    result = get_ticker_data(resolved)
+    if result is None:
+        record_failure('fetch', resolved)
+        report.erreur = "données indisponibles"
+        return report
+    fund, yqfund, info = result
+
+    errors = []
+    def section(name, builder):
+        try:
+            return builder()
+        except Exception as e:
+            log_warning(f"{name} indisponible pour {resolved}: {e}")
+            errors.append(f"{name}: {e}")
+            return None
+
+    try:
+        if args.raw:
+            report.raw = info
+        else:
+            report.basic = build_basic_info(info, resolved)
+        if args.summary or args.all:
+            report.summary = build_summary(info)
+        if args.financials or args.all:
+            report.financials = build_financials(info)
+
+        # Sections réseau récupérées en parallèle, assemblées dans l'ordre de l'enregistrement
+        builders = {}
+        if args.repartition or args.all:
+            builders['repartition'] = lambda: build_repartition(yqfund, resolved)
+        if args.top_holdings or args.all:
+            builders['top_holdings'] = lambda: build_top_holdings(yqfund, resolved)
+        if args.history or args.all:
+            builders['history'] = lambda: build_history(fund)
+        if args.rendement:
+            builders['rendement'] = lambda: compute_rendement(fund, args.period, not args.no_dividends, args.benchmark)
+        for name, pending in prefetch(builders).items():
+            setattr(report, name, section(name, pending.result))
+        if args.rendement:
+            if report.rendement is None and not errors:
+                errors.append("rendement: données insuffisantes pour la période")
+    finally:
+        release(resolved)
+
+    if errors:
+        report.erreur = "; ".join(errors)
+    return report
+
+def run_machine_output(args, tickers):
+    """
+    Écrit un enregistrement JSON par ticker sur la sortie standard (--format json/ndjson)
+
+    Les messages de progression des modules sont redirigés vers stderr pour que
+    stdout ne contienne que des données exploitables (jq, pandas.read_json, ...).
+
+    Returns:
+        int: 0 si tous les tickers ont abouti, 1 sinon
+    """
+    stdout = sys.stdout
+    writer = ResultWriter(stdout, args.format, single=len(tickers) == 1)
+    exit_code = 0
+    try:
+        for ticker_symbol in tickers:
+            with redirect_stdout(sys.stderr):
+                report = build_report(args, ticker_symbol)
+            if report.erreur:
+                exit_code = 1
+            writer.write(report)
+    finally:
+        writer.close()
+    log_info(f"{writer.count} enregistrement(s) {args.format} écrit(s)")
+    return exit_code
+
+def legacy_resolve_and_load(args, ticker_symbol):
     """
     Réplique fidèle de la logique actuelle (ticker + variantes + chargement),
     mais sans sys.exit(). Retourne: (exit_code, ticker_symbol, fund, yqfund, info)
     exit_code: 0=OK, 1=ticker/refus/aucune variante, 2=chargement KO, 3=annulation (Ctrl+C)
     """
-    ticker_symbol = args.ticker
     ticker_with_suffix = re.compile(r"^[A-Z0-9]{3,5}\.[A-Z]{1,2}$")
     result = None
     is_complete_ticker = ticker_with_suffix.match(ticker_symbol)
@@ -163,7 +422,7 @@ def legacy_resolve_and_load(args):
             else:
                 log_info("Utilisateur a refusé la recherche de variantes")
                 return 1, ticker_symbol, None, None, None
-        except KeyboardInterrupt:
+        except (KeyboardInterrupt, EOFError):
             log_info("Interruption utilisateur (Ctrl+C)")
             print("\n\nAnnulation.")
             return 3, ticker_symbol, None, None, None
@@ -206,7 +465,7 @@ def legacy_resolve_and_load(args):
                 else:
                     log_info("Utilisateur a refusé la recherche de variantes")
                     return 1, ticker_symbol, None, None, None
-            except KeyboardInterrupt:
+            except (KeyboardInterrupt, EOFError):
                 log_info("Interruption utilisateur (Ctrl+C)")
                 print("\n\nAnnulation.")
                 return 3, ticker_symbol, None, None, None
@@ -219,14 +478,23 @@ def legacy_resolve_and_load(args):
     log_info(f"Données récupérées avec succès pour {ticker_symbol}")
     return 0, ticker_symbol, fund, yqfund, info
 
-def main():
+def main(argv=None):
+    """
+    Point d'entrée de la ligne de commande
+
+    Args:
+        argv: arguments (sys.argv[1:] par défaut ; fournis par etf_server en mode serveur)
+
+    Returns:
+        tuple (exit_code, args, ticker_symbol, fund, yqfund, info)
+    """
     
     # Créer le parser d'argument
     parser = argparse.ArgumentParser(
         prog='etfinfo',
         description='Outil d\'analyse et d\'information sur les ETF'
     )
-    parser.add_argument("ticker", help="Ticker de l'ETF (ex: VWCE.DE)")
+    parser.add_argument("ticker", nargs="*", help="Ticker(s) de l'ETF (ex: VWCE.DE, ou plusieurs pour un traitement en lot)")
     parser.add_argument("--raw", action="store_true", help="Afficher le contenu de Ticker.info.")
     parser.add_argument("--summary", action="store_true", help="Afficher le business summary.")
     parser.add_argument("--financials", action="store_true", help="Afficher les données financières.")
@@ -242,14 +510,297 @@ def main():
     parser.add_argument("--benchmark", type=str, help="Comparer avec un benchmark (ex: ^GSPC pour S&P500)")
     parser.add_argument("--editna", action="store_true", help="Éditer uniquement les champs N/A dans la fiche Obsidian")
     parser.add_argument("--editall", action="store_true", help="Modifier tous les champs éditables de la fiche Obsidian")
+    parser.add_argument("--apply-edits", metavar="FILE",
+                    help="Appliquer un fichier de modifications (CSV/YAML par symbole) aux fiches Obsidian, sans réseau")
     parser.add_argument("--add-note", action="store_true",
                     help="Ajouter une note personnelle à la fiche Obsidian")
+    parser.add_argument("--daemon", action="store_true",
+                    help="Mettre à jour en continu les fiches Obsidian après la clôture de chaque place")
+    parser.add_argument("--daemon-spread", type=int, default=30,
+                    help="Fenêtre (minutes) d'étalement des mises à jour après une clôture (défaut: 30)")
+    parser.add_argument("--daemon-rate", type=float, default=6,
+                    help="Nombre maximum de fiches mises à jour par minute (défaut: 6)")
+    parser.add_argument("--alerts", metavar="FICHIER",
+                    help="Surveiller les alertes de prix d'un fichier de règles (CSV/YAML) jusqu'à Ctrl+C")
+    parser.add_argument("--interval", type=int, default=60, metavar="SECONDES",
+                    help="Intervalle entre deux relevés des cotations pour --alerts (défaut: 60)")
+    parser.add_argument("--live", action="store_true",
+                    help="Suivre les cours en temps réel des tickers (variation du jour, VWAP, volatilité réalisée) jusqu'à Ctrl+C")
+    parser.add_argument("--dividends", action="store_true",
+                    help="Analyser les distributions des tickers donnés, sinon de toutes les fiches du vault (--obsidian : section Dividendes)")
+    parser.add_argument("--purchase-date", metavar="YYYY-MM-DD",
+                    help="Date d'achat pour le yield on cost (--dividends, --obsidian)")
+    parser.add_argument("--listings", action="store_true",
+                    help="Lister les cotations connues (symbole, place, devise) des ISIN donnés, sans réseau")
+    parser.add_argument("--search", action="store_true",
+                    help="Rechercher par nom, symbole ou ISIN approché parmi les cotations connues, sans réseau")
+    parser.add_argument("--import-instruments", metavar="FICHIER",
+                    help="Importer des cotations (colonnes isin, symbol, exchange, currency, name) depuis un CSV")
+    parser.add_argument("--export", metavar="FICHIER",
+                    help="Exporter l'historique (cours, dividendes, indice de rendement total) des tickers sur --period ('-' : sortie standard)")
+    parser.add_argument("--export-metrics", metavar="FICHIER",
+                    help="Exporter les indicateurs (rendement, volatilité, Sharpe...) des tickers sur --period ('-' : sortie standard)")
+    parser.add_argument("--export-format", choices=EXPORT_FORMATS,
+                    help="Format d'export (défaut : d'après l'extension, .parquet ou .csv)")
+    parser.add_argument("--compare", action="store_true",
+                    help="Comparer les tickers donnés sur --period (tableau classé ; --obsidian : note de comparaison)")
+    parser.add_argument("--screen", action="store_true",
+                    help="Rechercher dans la base locale les ETF répondant aux critères (--currency, --ter-max, ...)")
+    parser.add_argument("--screen-refresh", action="store_true",
+                    help="Remplir ou mettre à jour la base du screener (tickers donnés, sinon fiches du vault)")
+    parser.add_argument("--currency", metavar="DEVISE", help="Screener : devise de cotation (ex: EUR)")
+    parser.add_argument("--distribution", choices=("capitalisant", "distribuant"),
+                    help="Screener : politique de distribution")
+    parser.add_argument("--indice", metavar="INDICE", help="Screener : indice répliqué (ex: \"MSCI World\")")
+    parser.add_argument("--ter-max", type=float, metavar="PCT", help="Screener : TER maximum en %% (ex: 0.25)")
+    parser.add_argument("--sharpe-min", type=float, metavar="X", help="Screener : ratio de Sharpe minimum sur --period")
+    parser.add_argument("--sort", choices=SORT_COLUMNS, default="sharpe", help="Screener : colonne de tri (défaut: sharpe)")
+    parser.add_argument("--limit", type=int, metavar="N", help="Nombre maximum de résultats (--screen, --search)")
+    parser.add_argument("--format", choices=FORMATS, default="text",
+                    help="Format de sortie : text (défaut), json ou ndjson (un enregistrement par ticker)")
     parser.add_argument("--debug", action="store_true", help="Activer le mode debug avec logs dans fichier")
+    parser.add_argument("--trace", metavar="FICHIER",
+                    help="Exporter les durées de chaque étape au format Chrome trace (JSON)")
+    parser.add_argument("--stats", action="store_true",
+                    help="Afficher les statistiques réseau (requêtes, cache, octets, latences)")
+    parser.add_argument("--max-requests", type=int, metavar="N",
+                    help="Interrompre le traitement au-delà de N requêtes réseau")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE_PER_MINUTE, metavar="N",
+                    help=f"Débit maximum vers Yahoo en requêtes par minute (défaut: {DEFAULT_RATE_PER_MINUTE})")
+    parser.add_argument("--profile", nargs="?", const="etfinfo-profile", metavar="PREFIXE",
+                    help="Profiler la commande : écrit PREFIXE.pstats et PREFIXE.collapsed (défaut: etfinfo-profile)")
+    parser.add_argument("--memprofile", action="store_true",
+                    help="Mesurer le pic mémoire de chaque étape et de chaque ticker (tracemalloc)")
+    parser.add_argument("--mem-budget", type=int, default=256, metavar="MO",
+                    help="Mémoire maximale des données conservées en cache pendant l'exécution (défaut: 256 Mo)")
+    parser.add_argument("--metrics-file", metavar="FICHIER",
+                    help="Écrire les métriques de l'exécution au format texte Prometheus (.prom)")
 
     # Analyser les arguments en ligne de commande
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     setup_logging(debug=args.debug)
+    if args.trace:
+        enable_tracing()
+    set_budget(args.max_requests)
+    if args.rate <= 0:
+        parser.error("--rate doit être positif")
+    set_rate_limit(args.rate)
+    if args.daemon_rate <= 0:
+        parser.error("--daemon-rate doit être positif")
+    if args.daemon_spread < 0:
+        parser.error("--daemon-spread doit être positif ou nul")
+    set_memory_budget(args.mem_budget * 1024 * 1024)
+    if args.metrics_file:
+        enable_metrics(args.metrics_file)
+
+    try:
+        with memprofiled(args.memprofile), span("etfinfo.main", argv=" ".join(sys.argv[1:])), profiled(args.profile):
+            return run_command(parser, args)
+    except RequestBudgetExceeded as e:
+        print(f"\n{Fore.RED}✗ Traitement interrompu : {e} (--max-requests){Style.RESET_ALL}")
+        log_error(f"Budget de requêtes atteint : {e}")
+        wait_for_charts()
+        return 3, args, None, None, None, None
+    finally:
+        if args.stats:
+            print_stats()
+        write_metrics()
+        if args.trace:
+            count = export_trace(args.trace)
+            print(f"🧭 Trace exportée : {args.trace} ({count} spans)")
+
+def run_screener(parser, args):
+    """
+    Options --screen-refresh et --screen
+
+    Returns:
+        int: code de sortie
+    """
+    from etf_screener import SCREEN_PERIODS, refresh_universe, screen, print_screen
+    if args.period not in SCREEN_PERIODS:
+        parser.error(f"--screen : période parmi {', '.join(SCREEN_PERIODS)}")
+    exit_code = 0
+    if args.screen_refresh:
+        exit_code = refresh_universe(args.ticker)
+    if not args.screen:
+        return exit_code
+
+    rows = screen(
+        period=args.period,
+        currency=args.currency,
+        distribution=args.distribution.capitalize() if args.distribution else None,
+        indice=args.indice,
+        ter_max=args.ter_max / 100 if args.ter_max is not None else None,
+        sharpe_min=args.sharpe_min,
+        sort=args.sort,
+        limit=args.limit,
+    )
+    if args.format == "text":
+        print_screen(rows, args.period)
+    else:
+        writer = ResultWriter(sys.stdout, args.format)
+        for row in rows:
+            writer.write(row)
+        writer.close()
+    return exit_code
+
+def run_compare(args):
+    """
+    Option --compare
+
+    Returns:
+        int: code de sortie
+    """
+    from etf_compare import compare, print_comparison, write_comparison_note
+    symbols = [resolve_ticker(ticker, interactive=False) or ticker for ticker in args.ticker]
+    report = compare(symbols, args.period, include_dividends=not args.no_dividends)
+    if args.format == "text":
+        print_comparison(report)
+    else:
+        writer = ResultWriter(sys.stdout, args.format, single=True)
+        writer.write(report)
+        writer.close()
+    if args.obsidian and report.fonds:
+        path = write_comparison_note(report)
+        if args.format == "text":
+            print(f"{Fore.GREEN}✓ Note de comparaison écrite : {path}{Style.RESET_ALL}")
+    return 0 if report.fonds and not report.erreurs else 1
+
+def run_dividends_command(args):
+    """
+    Option --dividends
+
+    Returns:
+        int: code de sortie
+    """
+    from etf_dividends import run_dividends, print_watchlist, update_vault_notes
+    symbols = [resolve_ticker(ticker, interactive=False) or ticker for ticker in args.ticker]
+    exit_code, results, errors = run_dividends(symbols, args.purchase_date)
+    if args.format == "text":
+        if results or errors:
+            print_watchlist(results, errors)
+        if args.obsidian and results:
+            updated = update_vault_notes(results)
+            print(f"{Fore.GREEN}✓ Section Dividendes mise à jour dans {updated} fiche(s){Style.RESET_ALL}")
+    else:
+        writer = ResultWriter(sys.stdout, args.format)
+        for symbol, info in results.items():
+            writer.write(dict(info, ticker=symbol))
+        for symbol, error in errors.items():
+            writer.write({'ticker': symbol, 'erreur': error})
+        writer.close()
+    return exit_code
+
+def run_command(parser, args):
+    """
+    Exécute la commande demandée (résolution du ticker puis dispatch des options)
+    Returns: (exit_code, args, ticker_symbol, fund, yqfund, info)
+    """
     log_debug(f"Arguments: {args}")
+
+    # Mode daemon : toutes les fiches du vault (ou le ticker donné), sans interaction
+    if args.daemon:
+        from etf_daemon import run_daemon
+        symbols = args.ticker or None
+        exit_code = run_daemon(args.daemon_spread, args.daemon_rate, symbols)
+        return exit_code, args, None, None, None, None
+
+    # Alertes de prix : relevés périodiques des cotations de tous les tickers des règles
+    if args.alerts:
+        if args.interval <= 0:
+            parser.error("--interval doit être positif")
+        from etf_alerts import run_alerts
+        return run_alerts(args.alerts, args.interval), args, None, None, None, None
+
+    # Cours en temps réel : flux websocket, sans résolution interactive
+    if args.live:
+        if not args.ticker:
+            parser.error("--live : indiquer un ou plusieurs tickers")
+        if args.format == "json":
+            parser.error("--live : flux continu, utiliser --format ndjson")
+        from etf_live import run_live
+        run_live(args.ticker, args.format)
+        return 0, args, None, None, None, None
+
+    if args.purchase_date:
+        try:
+            datetime.strptime(args.purchase_date, "%Y-%m-%d")
+        except ValueError:
+            parser.error("--purchase-date : date au format YYYY-MM-DD")
+
+    # Distributions : tickers donnés ou fiches du vault, en un seul lot
+    if args.dividends:
+        if args.format != "text" and args.obsidian:
+            parser.error("--format json/ndjson ne s'applique qu'aux commandes de consultation")
+        return run_dividends_command(args), args, None, None, None, None
+
+    # Modifications en lot depuis un fichier : pas de ticker ni d'accès réseau
+    if args.apply_edits:
+        from etf_obsidian import apply_edits_file
+        return apply_edits_file(args.apply_edits), args, None, None, None, None
+
+    # Table des instruments : import CSV et cotations par ISIN, sans réseau
+    if args.import_instruments:
+        return import_file(args.import_instruments), args, None, None, None, None
+    if args.search:
+        if not args.ticker:
+            parser.error("--search : indiquer le texte à rechercher")
+        return run_search(args), args, None, None, None, None
+    if args.listings:
+        if not args.ticker:
+            parser.error("--listings : indiquer un ou plusieurs ISIN (ou symboles)")
+        return run_listings(args), args, None, None, None, None
+
+    # Export CSV / Parquet : ticker par ticker, sans tout garder en mémoire
+    if args.export or args.export_metrics:
+        if not args.ticker:
+            parser.error("--export : indiquer un ou plusieurs tickers")
+        if args.export == "-" and args.export_metrics == "-":
+            parser.error("--export et --export-metrics ne peuvent pas écrire tous deux sur la sortie standard")
+        if "-" in (args.export, args.export_metrics) and args.export_format == "parquet" and sys.stdout.isatty():
+            parser.error("Parquet est un format binaire : rediriger la sortie standard vers un fichier ou un programme")
+        from etf_export import run_export
+        with redirect_stdout(sys.stderr if "-" in (args.export, args.export_metrics) else sys.stdout):
+            symbols = [resolve_ticker(ticker, interactive=False) or ticker for ticker in args.ticker]
+        exit_code = run_export(symbols, args.period, args.export, args.export_metrics, args.export_format)
+        return exit_code, args, None, None, None, None
+
+    # Comparaison : historiques en parallèle, alignés sur une période commune
+    if args.compare:
+        if len(args.ticker) < 2:
+            parser.error("--compare : indiquer au moins deux tickers")
+        return run_compare(args), args, None, None, None, None
+
+    # Screener : mise à jour de la base, puis recherche locale sans réseau
+    if args.screen_refresh or args.screen:
+        return run_screener(parser, args), args, None, None, None, None
+
+    if not args.ticker:
+        parser.error("le ticker est obligatoire (sauf avec --daemon, --apply-edits, --screen ou --import-instruments)")
+
+    # Sortie machine (JSON / NDJSON) : un enregistrement par ticker, sans interaction
+    if args.format != "text":
+        if args.obsidian or args.add_note or args.editall or args.editna:
+            parser.error("--format json/ndjson ne s'applique qu'aux commandes de consultation")
+        return run_machine_output(args, args.ticker), args, None, None, None, None
+
+    # Traitement en lot : chaque ticker l'un après l'autre, données libérées au fur et à mesure
+    if len(args.ticker) > 1:
+        exit_code = 0
+        for symbol in args.ticker:
+            result = run_ticker(args, symbol)
+            exit_code = max(exit_code, result[0])
+            if result[2]:
+                release(result[2])
+        return exit_code, args, None, None, None, None
+
+    return run_ticker(args, args.ticker[0])
+
+def run_ticker(args, ticker_symbol):
+    """
+    Résout un ticker, charge ses données puis exécute l'option demandée
+    Returns: (exit_code, args, ticker_symbol, fund, yqfund, info)
+    """
     
     # Propager --editall vers etf_obsidian via sys.argv
     if args.editall and "--editall" not in sys.argv:
@@ -257,23 +808,24 @@ def main():
         
     if args.editna:
         log_info("Mode édition activé pour mise à jour des champs Obsidian.")
-    log_info(f"Démarrage etfinfo avec ticker: {args.ticker}")
+    log_info(f"Démarrage etfinfo avec ticker: {ticker_symbol}")
     log_info(f"Lancement de etfinfo.py avec arguments : {sys.argv}")
     
     # Initialisations
     result = None
     
     # Résolution du ticker
-    ticker_symbol = args.ticker
     resolved = resolve_ticker(ticker_symbol, interactive=True)
 
     if resolved is None:
         if USE_LEGACY:
             log_info("Chargement direct KO, tentative legacy_resolve_and_load()")
-            exit_code, ticker_symbol, fund, yqfund, info = legacy_resolve_and_load(args)
+            exit_code, ticker_symbol, fund, yqfund, info = legacy_resolve_and_load(args, ticker_symbol)
             if exit_code != 0:
+                record_failure('resolve', ticker_symbol)
                 return exit_code, None, None, None, None, None
         else:
+            record_failure('resolve', ticker_symbol)
             return 1, None, None, None, None, None           
     else:
         # Ticker résolu → tenter le chargement direct
@@ -284,8 +836,9 @@ def main():
         if result is None:
             # Ticker bien formé mais data indisponible → tenter legacy
             log_warning("Chargement direct KO, tentative legacy_resolve_and_load()")
-            exit_code, ticker_symbol, fund, yqfund, info = legacy_resolve_and_load(args)
+            exit_code, ticker_symbol, fund, yqfund, info = legacy_resolve_and_load(args, ticker_symbol)
             if exit_code != 0:
+                record_failure('fetch', ticker_symbol)
                 print(f"{Fore.RED}Impossible de récupérer '{ticker_symbol}'.{Style.RESET_ALL}")
                 log_error(f"Échec legacy avec exit_code={exit_code} pour {ticker_symbol}")
                 return exit_code, None, None, None, None, None
@@ -319,7 +872,7 @@ def main():
         log_info(f"Note ajoutée pour {ticker_symbol} via --add-note")
         return 0, args, ticker_symbol, None, None, None
     elif args.obsidian:
-        run_obsidian(fund, yqfund, info, ticker_symbol)
+        run_obsidian(fund, yqfund, info, ticker_symbol, args.purchase_date)
     elif args.all:
         run_all(fund, yqfund, info, ticker_symbol)
     else:
@@ -444,5 +997,9 @@ def main():
 
 
 if __name__ == "__main__":
+    # Mode serveur : etfinfo.py serve [--socket CHEMIN | --port N] (voir etfclient.py)
+    if sys.argv[1:2] == ["serve"]:
+        from etf_server import main as serve_main
+        sys.exit(serve_main(sys.argv[2:]))
     exit_code, args, ticker_symbol, fund, yqfund, info = main()
     sys.exit(exit_code)
\ No newline at end of file
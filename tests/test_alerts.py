@@ -0,0 +1,61 @@
+# tests/test_alerts.py - Premier relevé des alertes avec un yahooquery.Ticker simulé
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import etf_core
+import etf_net
+import etf_alerts
+
+
+class StubTicker:
+    """yahooquery.Ticker sans réseau : cotations fixes pour les symboles demandés"""
+
+    QUOTES = {
+        'VWCE.DE': {'regularMarketPrice': 120.0, 'regularMarketPreviousClose': 118.0, 'fiftyTwoWeekHigh': 125.0,
+                    'fiftyDayAverage': 115.0, 'twoHundredDayAverage': 110.0},
+        'IWDA.AS': {'regularMarketPrice': 90.0, 'regularMarketPreviousClose': 95.0, 'fiftyTwoWeekHigh': 100.0,
+                    'fiftyDayAverage': 92.0, 'twoHundredDayAverage': 88.0},
+    }
+
+    def __init__(self, symbols):
+        self.symbols = symbols
+
+    @property
+    def symbols(self):
+        return self._symbols
+
+    @symbols.setter
+    def symbols(self, value):
+        self._symbols = list(value) if isinstance(value, (list, tuple)) else [value]
+
+    @property
+    def quotes(self):
+        return {s: self.QUOTES[s] for s in self._symbols if s in self.QUOTES}
+
+
+def _fresh_session(monkeypatch):
+    # Processus neuf : aucune session yahooquery ouverte
+    monkeypatch.setattr(etf_core, 'Ticker', StubTicker)
+    monkeypatch.setattr(etf_core, '_yq_template', None)
+    etf_net.reset()
+    etf_net.set_rate_limit(100000)
+
+
+def test_first_poll_fetches_quotes(monkeypatch):
+    _fresh_session(monkeypatch)
+    quotes = etf_alerts.fetch_quotes(['IWDA.AS', 'VWCE.DE'])
+    assert not np.isnan(quotes).any()
+    assert quotes[0, 0] == 90.0 and quotes[1, 0] == 120.0
+
+
+def test_first_poll_fires_alerts(monkeypatch):
+    _fresh_session(monkeypatch)
+    engine = etf_alerts.AlertEngine([('VWCE.DE', 'prix_sup', 119.0), ('IWDA.AS', 'variation', -5.0)])
+    messages = etf_alerts.poll(engine)
+    assert len(messages) == 2
+    # Conditions toujours vraies au relevé suivant : pas de nouvelle notification
+    assert etf_alerts.poll(engine) == []
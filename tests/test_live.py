@@ -0,0 +1,83 @@
+# tests/test_live.py - Mode --live contre un serveur websocket local simulant le flux Yahoo
+
+import os
+import sys
+import json
+import base64
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pytest
+from websockets.sync.server import serve
+from yfinance.pricing_pb2 import PricingData
+import etf_live
+
+SYMBOL = 'VWCE.DE'
+
+# Deux séances : (cours, volume cumulé de la séance, clôture précédente)
+TICKS = [
+    (101.0, 10, 100.0),
+    (102.0, 30, 100.0),
+    (103.0, 5, 102.0),
+    (104.0, 15, 102.0),
+]
+
+
+def _message(price, day_volume, previous_close, index):
+    data = PricingData(id=SYMBOL, price=price, time=1_760_000_000_000 + index * 1000,
+                       day_volume=day_volume, previous_close=previous_close)
+    return json.dumps({"message": base64.b64encode(data.SerializeToString()).decode()})
+
+
+@pytest.fixture
+def stand_in():
+    """Serveur local : attend l'abonnement puis envoie TICKS (et un message sans cotation)"""
+    subscriptions = []
+
+    def handler(ws):
+        subscriptions.append(json.loads(ws.recv()))
+        ws.send(json.dumps({"type": "heartbeat"}))
+        for index, (price, day_volume, previous_close) in enumerate(TICKS):
+            ws.send(_message(price, day_volume, previous_close, index))
+        for _ in ws:
+            pass
+
+    with serve(handler, "127.0.0.1", 0) as server:
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield f"ws://127.0.0.1:{server.socket.getsockname()[1]}", subscriptions
+        server.shutdown()
+
+
+def test_decode_ignores_non_quotes():
+    assert etf_live.decode(json.dumps({"type": "heartbeat"})) is None
+    assert etf_live.decode("pas du json") is None
+    assert etf_live.decode(_message(101.0, 10, 100.0, 0)).id == SYMBOL
+
+
+def test_live_metrics_and_session_reset(stand_in, capsys):
+    url, subscriptions = stand_in
+    series = etf_live.run_live([SYMBOL], output_format='ndjson', duration=10, max_ticks=len(TICKS), url=url)
+    assert subscriptions == [{"subscribe": [SYMBOL]}]
+
+    quote = series[SYMBOL].snapshot()
+    assert quote.nb_ticks == len(TICKS)
+    # Seconde séance seulement : variation depuis sa clôture précédente, VWAP de ses deux ticks
+    assert quote.variation_jour == pytest.approx((104 / 102 - 1) * 100)
+    assert quote.vwap == pytest.approx((103 * 5 + 104 * 10) / 15)
+    assert quote.volume == 15
+    assert quote.volatilite_realisee == pytest.approx(abs(np.log(104 / 103)) * np.sqrt(252) * 100)
+
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith('{')]
+    assert lines and lines[-1]['ticker'] == SYMBOL
+
+
+def test_window_volatility_matches_ring():
+    series = etf_live.LiveSeries(SYMBOL, capacity=64, window=16)
+    prices = 100 * np.exp(np.cumsum(np.random.default_rng(1).normal(0, 0.001, 200)))
+    for i, price in enumerate(prices):
+        series.update(i * 1000, float(price), previous_close=100.0)
+    expected = np.sqrt((np.diff(np.log(prices))[-16:] ** 2).sum()) * 100
+    assert series.snapshot().volatilite_fenetre == pytest.approx(expected)